@@ -0,0 +1,88 @@
+"""Compares the multi-string search engines available to MultiStringScanner.
+
+Builds banner-like patterns (similar to those used by the Linux and Mac
+stackers) and times constructing each engine and searching a haystack that
+contains a sprinkling of the patterns.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from volatility3.framework.layers import scanners  # noqa: E402
+from volatility3.framework.layers.scanners import aho_corasick  # noqa: E402
+
+
+def generate_patterns(count: int, rand: random.Random):
+    patterns = set()
+    while len(patterns) < count:
+        patterns.add(
+            b"Linux version %d.%d.%d-%d-generic (buildd@lcy%02d-amd64-%03d) #%d SMP\n\x00"
+            % (
+                rand.randint(2, 6),
+                rand.randint(0, 20),
+                rand.randint(0, 200),
+                rand.randint(0, 100),
+                rand.randint(0, 99),
+                rand.randint(0, 999),
+                rand.randint(1, 300),
+            )
+        )
+    return sorted(patterns)
+
+
+def generate_haystack(size: int, patterns, rand: random.Random) -> bytes:
+    haystack = bytearray(rand.getrandbits(8) for _ in range(size))
+    for _ in range(32):
+        pattern = rand.choice(patterns)
+        offset = rand.randrange(size - len(pattern))
+        haystack[offset : offset + len(pattern)] = pattern
+    return bytes(haystack)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--counts",
+        default="1000,10000",
+        help="Comma separated numbers of patterns to benchmark",
+    )
+    parser.add_argument(
+        "--size", type=int, default=0x100000, help="Size of the haystack to search"
+    )
+    parser.add_argument(
+        "--engines",
+        default=",".join(["regex"] + list(scanners.MultiStringScanner.engines)),
+        help="Comma separated engines to benchmark",
+    )
+    args = parser.parse_args()
+
+    rand = random.Random(0x766F6C)
+    for count in [int(x) for x in args.counts.split(",")]:
+        patterns = generate_patterns(count, rand)
+        haystack = generate_haystack(args.size, patterns, rand)
+        expected = None
+        for engine in args.engines.split(","):
+            if engine == "pyahocorasick" and not aho_corasick.HAS_PYAHOCORASICK:
+                print(f"{count:>6} patterns  {engine:<14} unavailable")
+                continue
+            start = time.perf_counter()
+            scanner = scanners.MultiStringScanner(patterns, engine=engine)
+            built = time.perf_counter()
+            results = list(scanner.search(haystack))
+            searched = time.perf_counter()
+            if expected is None:
+                expected = results
+            print(
+                f"{count:>6} patterns  {engine:<14} build {built - start:8.3f}s  "
+                f"search {searched - built:8.3f}s  ({len(results)} matches"
+                f"{'' if results == expected else ', MISMATCH'})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+import volatility3.plugins
+import volatility3.symbols
+from volatility3.cli import session
+from volatility3.cli.session import server
+from volatility3.framework import constants
+
+
+class TestParseAddress(unittest.TestCase):
+    def test_loopback(self):
+        self.assertEqual(
+            session.parse_address("127.0.0.1:5423"),
+            (socket.AF_INET, ("127.0.0.1", 5423)),
+        )
+        self.assertEqual(
+            session.parse_address("127.1.2.3:80"), (socket.AF_INET, ("127.1.2.3", 80))
+        )
+        self.assertEqual(
+            session.parse_address("localhost:5423"),
+            (socket.AF_INET, ("127.0.0.1", 5423)),
+        )
+        self.assertEqual(
+            session.parse_address("[::1]:5423"), (socket.AF_INET6, ("::1", 5423))
+        )
+
+    def test_not_loopback(self):
+        for address in [
+            "0.0.0.0:5423",
+            "192.168.0.1:5423",
+            "[::]:5423",
+            "example.com:5423",
+        ]:
+            with self.subTest(address=address):
+                with self.assertRaises(ValueError):
+                    session.parse_address(address)
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets not supported")
+    def test_unix_socket(self):
+        self.assertEqual(
+            session.parse_address("/tmp/session.sock"),
+            (socket.AF_UNIX, "/tmp/session.sock"),
+        )
+        self.assertEqual(
+            session.parse_address("/tmp/session:name"),
+            (socket.AF_UNIX, "/tmp/session:name"),
+        )
+
+
+class TestTokenFilename(unittest.TestCase):
+    def test_same_server(self):
+        self.assertEqual(
+            session.token_filename("localhost:5423"),
+            session.token_filename("127.0.0.1:5423"),
+        )
+        self.assertEqual(
+            session.token_filename("[::1]:5423"),
+            session.token_filename("[0:0:0:0:0:0:0:1]:5423"),
+        )
+        self.assertEqual(
+            os.path.dirname(session.token_filename("127.0.0.1:5423")),
+            constants.CACHE_PATH,
+        )
+
+    def test_other_servers(self):
+        filenames = {
+            session.token_filename(address)
+            for address in ["127.0.0.1:5423", "127.0.0.1:5424", "[::1]:5423"]
+        }
+        self.assertEqual(len(filenames), 3)
+
+
+class TestSessionServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_path = constants.CACHE_PATH
+        constants.CACHE_PATH = self.directory
+        self.server = server.SessionServer("127.0.0.1:0", idle_timeout=60)
+        host, port = self.server.server_address
+        self.address = f"{host}:{port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.assertFalse(os.path.exists(session.token_filename(self.address)))
+        constants.CACHE_PATH = self.cache_path
+        shutil.rmtree(self.directory)
+
+    def run_client(self, argv):
+        # The server redirects this process' output whilst it runs a plugin, so the
+        # client is run in a process of its own
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys\n"
+                "from volatility3.cli import session\n"
+                "from volatility3.framework import constants\n"
+                "constants.CACHE_PATH = sys.argv[2]\n"
+                "sys.exit(session.SessionClient(sys.argv[1]).run('vol', sys.argv[3:]))",
+                self.address,
+                self.directory,
+            ]
+            + argv,
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        return process.returncode, process.stdout, process.stderr
+
+    def test_help(self):
+        code, stdout, _ = self.run_client(
+            ["--offline", "--cache-path", self.directory, "-h"]
+        )
+        self.assertEqual(code, 0)
+        self.assertIn("Volatility 3 Framework", stdout)
+        self.assertIn("usage: vol", stdout)
+
+    def test_unknown_plugin(self):
+        code, _, stderr = self.run_client(
+            ["--offline", "--cache-path", self.directory, "no.such.Plugin"]
+        )
+        self.assertEqual(code, 2)
+        self.assertIn("invalid choice", stderr)
+
+    def test_settings_restored(self):
+        settings = (
+            constants.CACHE_PATH,
+            constants.OFFLINE,
+            constants.PARALLELISM,
+            volatility3.plugins.__path__,
+            volatility3.symbols.__path__,
+        )
+        code, _, _ = self.run_client(
+            [
+                "--offline",
+                "--parallelism",
+                "threads",
+                "--cache-path",
+                self.directory,
+                "--plugin-dirs",
+                self.directory,
+                "--symbol-dirs",
+                self.directory,
+                "-h",
+            ]
+        )
+        self.assertEqual(code, 0)
+        self.assertEqual(
+            (
+                constants.CACHE_PATH,
+                constants.OFFLINE,
+                constants.PARALLELISM,
+                volatility3.plugins.__path__,
+                volatility3.symbols.__path__,
+            ),
+            settings,
+        )
+
+    @unittest.skipIf(os.name == "nt", "File permissions not supported")
+    def test_token_file(self):
+        """The token is only readable by the user running the server"""
+        filename = session.token_filename(self.address)
+        self.assertEqual(os.stat(filename).st_mode & 0o777, 0o600)
+        with open(filename) as fp:
+            self.assertTrue(self.server.authenticate({"token": fp.read()}))
+
+    def send_request(self, request):
+        with socket.create_connection(self.server.server_address) as sock:
+            with sock.makefile("rb") as rfile, sock.makefile("wb") as wfile:
+                session.send_message(wfile, request)
+                return [json.loads(line) for line in rfile]
+
+    def test_invalid_token(self):
+        """Requests without the server's token are not run"""
+        request = {"prog": "vol", "argv": ["-h"], "cwd": self.directory}
+        for token in [None, "", "0" * 64, "ü", 1]:
+            with self.subTest(token=token):
+                messages = self.send_request(dict(request, token=token))
+                self.assertEqual(messages[-1], {"type": "exit", "code": 1})
+                self.assertNotIn(
+                    "Volatility 3 Framework",
+                    "".join(message.get("data", "") for message in messages),
+                )
+
+    def test_missing_token(self):
+        os.unlink(session.token_filename(self.address))
+        with self.assertRaises(OSError):
+            session.SessionClient(self.address).run("vol", ["-h"])
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets not supported")
+class TestUnixSessionServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_path = constants.CACHE_PATH
+        constants.CACHE_PATH = self.directory
+        self.address = os.path.join(self.directory, "session.sock")
+
+    def tearDown(self):
+        constants.CACHE_PATH = self.cache_path
+        shutil.rmtree(self.directory)
+
+    def test_socket_permissions(self):
+        """The socket is only accessible by the user running the server, and
+        is removed along with the token when the server stops"""
+        umask = os.umask(0o022)
+        try:
+            session_server = server.SessionServer(self.address, idle_timeout=60)
+        finally:
+            self.assertEqual(os.umask(umask), 0o022)
+        thread = threading.Thread(target=session_server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            self.assertEqual(os.stat(self.address).st_mode & 0o077, 0)
+            self.assertTrue(os.path.exists(session.token_filename(self.address)))
+        finally:
+            session_server.shutdown()
+            thread.join()
+        self.assertEqual(os.listdir(self.directory), [])
@@ -0,0 +1,96 @@
+import random
+import struct
+import unittest
+
+from volatility3.framework import contexts
+from volatility3.framework.layers import crash, physical
+
+PAGE_SIZE = 0x1000
+
+
+def reference_segments(bitmap_ulongs, header_size):
+    """Walks the bitmap one bit at a time, as the layer once did"""
+    segments = []
+    seg_first_bit = None
+    seg_first_offset = 0
+    offset = header_size
+    for index in range(len(bitmap_ulongs) * 32):
+        if bitmap_ulongs[index // 32] & (1 << (index % 32)):
+            if seg_first_bit is None:
+                seg_first_bit = index
+                seg_first_offset = offset
+            offset += PAGE_SIZE
+        elif seg_first_bit is not None:
+            length = (index - seg_first_bit) * PAGE_SIZE
+            segments.append(
+                (seg_first_bit * PAGE_SIZE, seg_first_offset, length, length)
+            )
+            seg_first_bit = None
+    if seg_first_bit is not None:
+        length = (len(bitmap_ulongs) * 32 - seg_first_bit) * PAGE_SIZE
+        segments.append((seg_first_bit * PAGE_SIZE, seg_first_offset, length, length))
+    return segments
+
+
+def build_bitmap_dump(bitmap_ulongs, bitmap_size):
+    """Builds a 32-bit bitmap (type 5) crash dump, with the page contents
+    left out since only the segments are examined"""
+    header = bytearray(PAGE_SIZE)
+    struct.pack_into(
+        "<II", header, 0, crash.WindowsCrashDump32Layer.SIGNATURE, 0x504D5544
+    )
+    struct.pack_into("<I", header, 16, 0x1AB000)
+    struct.pack_into("<I", header, 3976, 0x05)
+
+    bitmap = struct.pack(f"<{len(bitmap_ulongs)}I", *bitmap_ulongs)
+    header_size = PAGE_SIZE + 56 + len(bitmap)
+    header_size += -header_size % PAGE_SIZE
+    summary = bytearray(56)
+    summary[0:4] = b"SDMP"
+    summary[4:8] = b"DUMP"
+    struct.pack_into("<QQQ", summary, 32, header_size, 0, bitmap_size)
+    dump = bytes(header) + bytes(summary) + bitmap
+    return dump + bytes(header_size - len(dump)), header_size
+
+
+class TestCrashDumpBitmap(unittest.TestCase):
+    def load_segments(self, bitmap_ulongs, bitmap_size=None):
+        if bitmap_size is None:
+            bitmap_size = len(bitmap_ulongs) * 32
+        dump, header_size = build_bitmap_dump(bitmap_ulongs, bitmap_size)
+        context = contexts.Context()
+        context.layers.add_layer(
+            physical.BufferDataLayer(context, "base", "base", dump)
+        )
+        context.config["crash.base_layer"] = "base"
+        layer = crash.WindowsCrashDump32Layer(context, "crash", "crash")
+        return layer._segments, header_size
+
+    def check_bitmap(self, bitmap_ulongs, bitmap_size=None):
+        segments, header_size = self.load_segments(bitmap_ulongs, bitmap_size)
+        self.assertEqual(segments, reference_segments(bitmap_ulongs, header_size))
+
+    def test_full_and_empty_ulongs(self):
+        self.check_bitmap([0xFFFFFFFF, 0xFFFFFFFF, 0, 0xFFFFFFFF, 0, 0])
+
+    def test_mixed_ulongs(self):
+        self.check_bitmap([0x0000FFFF, 0xFFFF0000, 0x80000001, 0x55555555, 0x1])
+
+    def test_run_to_end_of_bitmap(self):
+        self.check_bitmap([0, 0xF0000000, 0xFFFFFFFF])
+
+    def test_partial_final_ulong(self):
+        self.check_bitmap([0xFFFFFFFF, 0x000000FF], bitmap_size=40)
+
+    def test_random_bitmap(self):
+        rand = random.Random(0x5DA7)
+        bitmap_ulongs = []
+        for _ in range(512):
+            bitmap_ulongs.append(
+                rand.choice([0, 0xFFFFFFFF, rand.getrandbits(32), 1 << 31, 1])
+            )
+        self.check_bitmap(bitmap_ulongs)
+
+    def test_no_pages(self):
+        with self.assertRaises(crash.WindowsCrashDumpFormatException):
+            self.load_segments([0, 0])
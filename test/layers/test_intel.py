@@ -0,0 +1,83 @@
+import random
+import struct
+import unittest
+
+from volatility3.framework import contexts
+from volatility3.framework.layers import intel, physical
+
+PAGES = 64
+
+
+def build_layer(layer_class, seed):
+    """Builds a layer over pages filled with random page table entries
+
+    Entries are empty, point at other pages (as tables or large pages),
+    point beyond the end of the physical memory, or are not present
+    """
+    rand = random.Random(seed)
+    entry_format = layer_class._entry_format
+    entry_size = struct.calcsize(entry_format)
+    maximum = (1 << (8 * entry_size)) - 1
+    data = bytearray(PAGES * 0x1000)
+    # Deeper structures need fewer empty entries for walks to reach the bottom
+    empty = 0.7 if len(layer_class._structure) < 4 else 0.2
+    for page in range(1, PAGES):
+        for index in range(0x1000 // entry_size):
+            choice = empty + rand.random() * (1 - empty)
+            frame = rand.randrange(PAGES) << 12
+            if rand.random() < empty:
+                continue
+            elif choice < 0.85:
+                entry = frame | 0x1
+            elif choice < 0.9:
+                entry = frame | 0x81
+            elif choice < 0.95:
+                entry = (rand.randrange(PAGES, PAGES * 16) << 12) | 0x1
+            else:
+                entry = frame | 0x800
+            struct.pack_into(
+                entry_format, data, page * 0x1000 + index * entry_size, entry & maximum
+            )
+    context = contexts.Context()
+    context.layers.add_layer(
+        physical.BufferDataLayer(context, "base", "base", bytes(data))
+    )
+    context.config["virt.memory_layer"] = "base"
+    context.config["virt.page_map_offset"] = 0x1000
+    layer = layer_class(context, "virt", "virt")
+    context.layers.add_layer(layer)
+    return layer
+
+
+class TestIntelMapping(unittest.TestCase):
+    layer_classes = [
+        intel.Intel,
+        intel.IntelPAE,
+        intel.Intel32e,
+        intel.WindowsIntel32e,
+        intel.LinuxIntel32e,
+    ]
+
+    def test_table_mapping(self):
+        """Walking whole tables maps the same as translating each page"""
+        for layer_class in self.layer_classes:
+            for seed in range(3):
+                with self.subTest(layer=layer_class.__name__, seed=seed):
+                    layer = build_layer(layer_class, seed)
+                    rand = random.Random(seed)
+                    for _ in range(8):
+                        offset = rand.randrange(layer.maximum_address) & ~0xFFF
+                        offset += rand.choice([0, rand.randrange(0x1000)])
+                        length = rand.randrange(0x1000, 0x1000000)
+                        self.assertEqual(
+                            list(layer._table_mapping(offset, length)),
+                            list(layer._page_mapping(offset, length, True)),
+                        )
+
+    def test_whole_space(self):
+        """The whole space of a small layer maps the same either way"""
+        layer = build_layer(intel.Intel, 7)
+        self.assertEqual(
+            list(layer._mapping(0, layer.maximum_address + 1, ignore_errors=True)),
+            list(layer._page_mapping(0, layer.maximum_address + 1, True)),
+        )
@@ -0,0 +1,78 @@
+import random
+import unittest
+
+from volatility3.framework.layers import scanners
+from volatility3.framework.layers.scanners import aho_corasick
+
+
+# Banners like those searched for by the Linux and Mac stackers, many of which
+# share long prefixes
+BANNERS = [
+    b"Linux version %d.%d.%d-%d-generic (buildd@lcy02-amd64-%03d) #%d SMP\n\x00"
+    % (major, minor, patch, abi, builder, build)
+    for major in range(3, 7)
+    for minor in range(0, 20, 4)
+    for patch, abi, builder, build in [(0, 13, 7, 14), (15, 101, 12, 110)]
+]
+
+
+def build_haystack(patterns, seed):
+    """Builds pseudo-random data with every other pattern, and a truncated copy
+    of the rest, at fixed intervals"""
+    rand = random.Random(seed)
+    haystack = bytearray(rand.getrandbits(8) for _ in range(0x100 * len(patterns)))
+    for index, pattern in enumerate(patterns):
+        if index % 2:
+            pattern = pattern[:-2]
+        haystack[0x100 * index + 0x10 : 0x100 * index + 0x10 + len(pattern)] = pattern
+    return bytes(haystack)
+
+
+class TestMultiStringEngines(unittest.TestCase):
+    def available_engines(self):
+        engines = list(scanners.MultiStringScanner.engines)
+        if not aho_corasick.HAS_PYAHOCORASICK:
+            engines.remove("pyahocorasick")
+        return engines
+
+    def check_engines(self, patterns, haystack):
+        expected = list(
+            scanners.MultiStringScanner(patterns, engine="regex").search(haystack)
+        )
+        for engine in self.available_engines():
+            with self.subTest(engine=engine):
+                scanner = scanners.MultiStringScanner(patterns, engine=engine)
+                self.assertEqual(list(scanner.search(haystack)), expected)
+        return expected
+
+    def test_banners(self):
+        haystack = build_haystack(BANNERS, 0x766F6C)
+        found = self.check_engines(BANNERS, haystack)
+        self.assertEqual(len(found), len(BANNERS) // 2)
+
+    def test_overlapping_patterns(self):
+        patterns = [b"abc", b"abcd", b"bcd", b"cde", b"d", b"abcdef"]
+        haystack = b"xxabcdefxabcdxxbcdexdxxabc"
+        self.check_engines(patterns, haystack)
+
+    def test_random_short_patterns(self):
+        rand = random.Random(0xAC)
+        patterns = sorted(
+            {
+                bytes(rand.choice(b"ab") for _ in range(rand.randint(1, 4)))
+                for _ in range(20)
+            }
+        )
+        haystack = bytes(rand.choice(b"abc") for _ in range(0x1000))
+        self.check_engines(patterns, haystack)
+
+    def test_no_patterns(self):
+        for engine in ["regex"] + self.available_engines():
+            with self.subTest(engine=engine):
+                scanner = scanners.MultiStringScanner([], engine=engine)
+                with self.assertRaises(ValueError):
+                    list(scanner.search(b"anything"))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            scanners.MultiStringScanner([b"abc"], engine="unknown")
@@ -0,0 +1,437 @@
+import os
+import random
+import shutil
+import struct
+import tempfile
+import types
+import unittest
+
+from volatility3.framework import constants, contexts, exceptions
+from volatility3.framework.symbols import intermed
+
+# The registry extensions import the registry layer, so must be imported first
+from volatility3.framework.symbols.windows.extensions import registry as registry_ext
+from volatility3.framework.layers import linear, physical, registry
+
+PAGES_PER_TABLE = registry.RegistryHive._cell_map_table_size
+
+
+def build_isf(entry_fields, entry_size):
+    """Builds just enough of an ISF to describe a hive's two-level cell map"""
+
+    def base(name):
+        return {"kind": "base", "name": name}
+
+    def struct_type(name):
+        return {"kind": "struct", "name": name}
+
+    return {
+        "metadata": {"format": "6.2.0", "producer": {"name": "test"}},
+        "base_types": {
+            "unsigned long": {
+                "kind": "int",
+                "size": 4,
+                "signed": False,
+                "endian": "little",
+            },
+            "unsigned long long": {
+                "kind": "int",
+                "size": 8,
+                "signed": False,
+                "endian": "little",
+            },
+            "pointer": {"kind": "int", "size": 8, "signed": False, "endian": "little"},
+        },
+        "user_types": {
+            "_HHIVE": {
+                "kind": "struct",
+                "size": 0x28,
+                "fields": {
+                    "Signature": {"offset": 0, "type": base("unsigned long")},
+                    "Storage": {
+                        "offset": 8,
+                        "type": {
+                            "kind": "array",
+                            "count": 2,
+                            "subtype": struct_type("_DUAL"),
+                        },
+                    },
+                },
+            },
+            "_DUAL": {
+                "kind": "struct",
+                "size": 0x10,
+                "fields": {
+                    "Length": {"offset": 0, "type": base("unsigned long")},
+                    "Map": {
+                        "offset": 8,
+                        "type": {
+                            "kind": "pointer",
+                            "subtype": struct_type("_HMAP_DIRECTORY"),
+                        },
+                    },
+                },
+            },
+            "_HMAP_DIRECTORY": {
+                "kind": "struct",
+                "size": 0x2000,
+                "fields": {
+                    "Directory": {
+                        "offset": 0,
+                        "type": {
+                            "kind": "array",
+                            "count": 1024,
+                            "subtype": {
+                                "kind": "pointer",
+                                "subtype": struct_type("_HMAP_TABLE"),
+                            },
+                        },
+                    }
+                },
+            },
+            "_HMAP_TABLE": {
+                "kind": "struct",
+                "size": entry_size * PAGES_PER_TABLE,
+                "fields": {
+                    "Table": {
+                        "offset": 0,
+                        "type": {
+                            "kind": "array",
+                            "count": PAGES_PER_TABLE,
+                            "subtype": struct_type("_HMAP_ENTRY"),
+                        },
+                    }
+                },
+            },
+            "_HMAP_ENTRY": {
+                "kind": "struct",
+                "size": entry_size,
+                "fields": {
+                    name: {"offset": offset, "type": base("unsigned long long")}
+                    for name, offset in entry_fields.items()
+                },
+            },
+        },
+        "enums": {},
+        "symbols": {},
+    }
+
+
+class SyntheticHive(registry.RegistryHive):
+    """A registry hive over a bare _HHIVE, without the _CMHIVE and Registry
+    process lookups that need a whole Windows memory image"""
+
+    def __init__(self, context, config_path, name, hive):
+        linear.LinearlyMappedLayer.__init__(self, context, config_path, name)
+        self._base_layer = self.config["base_layer"]
+        self._hive_offset = self.config["hive_offset"]
+        self._table_name = self.config["nt_symbols"]
+        self._page_size = 1 << 12
+        self._cmhive_name = name
+        self._cell_maps = [None, None]
+        self.hive = hive
+        self._base_block = hive
+        self._minaddr = 0
+        self._hive_maxaddr_non_volatile = hive.Storage[0].Length
+        self._hive_maxaddr_volatile = hive.Storage[1].Length
+        self._maxaddr = 0x80000000 | self._hive_maxaddr_volatile
+
+
+def build_hive(entry_fields, entry_size, seed, name="hive", hive_class=SyntheticHive):
+    """Builds a hive whose non-volatile cell map has two whole tables, one
+    table cut short by the end of memory and one table that is unmapped, and
+    whose volatile cell map has one whole and one partially used table"""
+    rand = random.Random(seed)
+    context = contexts.Context()
+    table = intermed.Version8Format(
+        context, "symbols", "registry_test", build_isf(entry_fields, entry_size)
+    )
+    table.set_type_class("_HMAP_ENTRY", registry_ext.HMAP_ENTRY)
+    context.symbol_space.append(table)
+
+    table_size = entry_size * PAGES_PER_TABLE
+    storage = [
+        # (pages, [(table offset, entries present) or None for each directory])
+        (
+            3 * PAGES_PER_TABLE + 100,
+            [
+                (0x10000, PAGES_PER_TABLE),
+                (0x10000 + table_size, PAGES_PER_TABLE),
+                (0x10000 + 3 * table_size, 100),
+                None,
+            ],
+        ),
+        (
+            PAGES_PER_TABLE + 188,
+            [(0x10000 + 2 * table_size, PAGES_PER_TABLE), None],
+        ),
+    ]
+    data = bytearray(0x10000 + 3 * table_size + 100 * entry_size)
+    struct.pack_into("<I", data, 0, 0xBEE0BEE0)
+    for volatile, (pages, tables) in enumerate(storage):
+        directory_offset = 0x100 + volatile * 0x2000
+        struct.pack_into(
+            "<IIQ", data, 8 + volatile * 0x10, pages * 0x1000, 0, directory_offset
+        )
+        for dir_index, location in enumerate(tables):
+            # Tables that aren't mapped lie beyond the end of memory
+            table_offset = len(data) if location is None else location[0]
+            struct.pack_into("<Q", data, directory_offset + dir_index * 8, table_offset)
+            if location is None:
+                continue
+            for index in range(location[1]):
+                for offset in entry_fields.values():
+                    struct.pack_into(
+                        "<Q",
+                        data,
+                        table_offset + index * entry_size + offset,
+                        rand.randrange(0x100000000),
+                    )
+
+    context.layers.add_layer(physical.BufferDataLayer(context, "base", "base", data))
+    config_path = "layers." + name
+    context.config[config_path + ".base_layer"] = "base"
+    context.config[config_path + ".hive_offset"] = 0
+    context.config[config_path + ".nt_symbols"] = "registry_test"
+    hive = hive_class(
+        context,
+        config_path,
+        name,
+        context.object("registry_test!_HHIVE", "base", 0),
+    )
+    context.layers.add_layer(hive)
+    return hive
+
+
+def translation(translate, *args):
+    """Returns either the translated offset or the type of exception raised"""
+    try:
+        return translate(*args)
+    except exceptions.LayerException as excp:
+        return type(excp)
+
+
+class TestCellMap(unittest.TestCase):
+    entry_formats = {
+        "bin address": ({"BlockOffset": 0, "PermanentBinAddress": 8}, 0x18),
+        "block address": ({"BlockAddress": 0, "BinAddress": 8}, 0x10),
+    }
+
+    def test_translate(self):
+        """The flat cell map translates every cell index as the hive's own
+        cell map does, including those in tables that can't be read whole"""
+        for entry_format, (entry_fields, entry_size) in self.entry_formats.items():
+            for seed in range(2):
+                with self.subTest(entry_format=entry_format, seed=seed):
+                    hive = build_hive(entry_fields, entry_size, seed)
+                    rand = random.Random(seed)
+                    for volatile in range(2):
+                        maxaddr = hive._get_hive_maxaddr(volatile)
+                        offsets = list(range(0, maxaddr + 1, 0x1000))
+                        rand.shuffle(offsets)
+                        for offset in offsets:
+                            offset |= rand.randrange(0x1000) if offset < maxaddr else 0
+                            offset |= volatile << 31
+                            self.assertEqual(
+                                translation(hive._translate, offset),
+                                translation(
+                                    hive._translate_from_hive, offset, volatile
+                                ),
+                                hex(offset),
+                            )
+
+    def test_invalid_tables(self):
+        """Tables that can't be read whole fall back to the hive's cell map,
+        which fails for the entries that really are unreadable"""
+        hive = build_hive(*self.entry_formats["bin address"], 0)
+        hive._translate(0x10)
+        cut_short = 2 * PAGES_PER_TABLE * 0x1000
+        self.assertEqual(
+            hive._translate(cut_short + 99 * 0x1000 + 0x10),
+            hive._translate_from_hive(cut_short + 99 * 0x1000 + 0x10, 0),
+        )
+        for offset in [cut_short + 100 * 0x1000, 3 * PAGES_PER_TABLE * 0x1000]:
+            with self.assertRaises(exceptions.InvalidAddressException):
+                hive._translate(offset)
+        cell_map = hive._cell_maps[0]
+        self.assertEqual(
+            set(cell_map[2 * PAGES_PER_TABLE :]),
+            {registry.RegistryHive._cell_map_invalid},
+        )
+        self.assertNotIn(
+            registry.RegistryHive._cell_map_invalid, cell_map[:PAGES_PER_TABLE]
+        )
+
+    def test_beyond_maxaddr(self):
+        hive = build_hive(*self.entry_formats["block address"], 0)
+        for volatile in range(2):
+            with self.assertRaises(registry.RegistryInvalidIndex):
+                hive._translate(
+                    (volatile << 31) | (hive._get_hive_maxaddr(volatile) + 1)
+                )
+
+    def test_mapping(self):
+        hive = build_hive(*self.entry_formats["bin address"], 1)
+        offset = 0x1FF8
+        self.assertEqual(
+            hive.mapping(offset, 0x10),
+            [
+                (offset, 8, hive._translate_from_hive(offset, 0), 8, "base"),
+                (0x2000, 8, hive._translate_from_hive(0x2000, 0), 8, "base"),
+            ],
+        )
+
+
+# Key offsets with the key's name (None if it can't be read) and its subkeys,
+# including a subkey list that leads back to its parent and a key that is
+# the subkey of two others
+KEYS = {
+    0x24: ("ROOT", [0x100, 0x200, 0x300]),
+    0x100: ("Software", [0x110, 0x120]),
+    0x110: ("Microsoft", [0x130, 0x100]),
+    0x120: ("Classes", []),
+    0x130: ("Windows", []),
+    0x200: ("System", [0x210, 0x120]),
+    0x210: ("ControlSet001", []),
+    0x300: (None, [0x310]),
+    0x310: ("Orphan", []),
+}
+
+
+class FakeKey:
+    """Just enough of a _CM_KEY_NODE to build the key index from"""
+
+    def __init__(self, hive, offset):
+        self._hive = hive
+        self.vol = types.SimpleNamespace(
+            offset=offset, type_name="registry_test!_CM_KEY_NODE"
+        )
+
+    def get_name(self):
+        name = KEYS[self.vol.offset][0]
+        if name is None:
+            raise exceptions.InvalidAddressException("hive", self.vol.offset)
+        return name
+
+    def iterate_subkeys(self):
+        self._hive.subkey_reads.append(self.vol.offset)
+        for offset in KEYS[self.vol.offset][1]:
+            yield FakeKey(self._hive, offset)
+
+
+class KeyHive(SyntheticHive):
+    """A hive whose key nodes are described by KEYS, which counts the subkey
+    lists that it is asked for"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subkey_reads = []
+
+    @property
+    def root_cell_offset(self):
+        return 0x20
+
+    def get_node(self, cell_offset):
+        return FakeKey(self, cell_offset + 4)
+
+
+class TestKeyIndex(unittest.TestCase):
+    walk = [
+        ("software", 0x100),
+        ("software\\microsoft", 0x110),
+        ("software\\microsoft\\windows", 0x130),
+        ("software\\classes", 0x120),
+        ("system", 0x200),
+        ("system\\controlset001", 0x210),
+        (None, 0x300),
+        (None, 0x310),
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.original_settings = (
+            constants.CACHE_PATH,
+            constants.PERSISTENT_LAYER_CACHE,
+        )
+        constants.CACHE_PATH = self.directory
+        constants.PERSISTENT_LAYER_CACHE = False
+
+    def tearDown(self):
+        constants.CACHE_PATH, constants.PERSISTENT_LAYER_CACHE = self.original_settings
+        shutil.rmtree(self.directory)
+
+    def build_hive(self):
+        return build_hive(
+            *TestCellMap.entry_formats["bin address"], 0, hive_class=KeyHive
+        )
+
+    def test_get_key(self):
+        """Keys are found by casefolded path, reading each subkey list once"""
+        hive = self.build_hive()
+        self.assertEqual(hive.get_key("SOFTWARE\\Microsoft\\windows").vol.offset, 0x130)
+        self.assertEqual(
+            [
+                node.vol.offset
+                for node in hive.get_key("software\\microsoft\\", return_list=True)
+            ],
+            [0x24, 0x100, 0x110],
+        )
+        self.assertEqual(hive.get_key("System\\ControlSet001").vol.offset, 0x210)
+        self.assertEqual(hive.get_key("Software\\Classes").vol.offset, 0x120)
+        with self.assertRaises(KeyError):
+            hive.get_key("Software\\Missing")
+        with self.assertRaises(KeyError):
+            hive.get_key("Orphan")
+        self.assertEqual(sorted(hive.subkey_reads), [0x24, 0x100, 0x110, 0x200])
+
+    def test_walk_order(self):
+        """Walks yield parents before their children, in subkey list order,
+        and visit keys that are reachable more than once only once"""
+        hive = self.build_hive()
+        self.assertEqual(list(hive.walk_keys()), self.walk)
+        self.assertEqual(sorted(hive.subkey_reads), sorted(KEYS))
+        self.assertEqual(
+            list(hive.walk_keys(hive.get_node(0x100 - 4))),
+            [("microsoft", 0x110), ("microsoft\\windows", 0x130), ("classes", 0x120)],
+        )
+        visited = []
+        hive.visit_nodes(lambda node: visited.append(node.vol.offset))
+        self.assertEqual(visited, [0x24] + [offset for _, offset in self.walk])
+
+    def test_walk_indexes(self):
+        """Once walked from the root, neither lookups nor walks read subkey lists"""
+        hive = self.build_hive()
+        list(hive.walk_keys())
+        hive.subkey_reads.clear()
+        self.assertEqual(list(hive.walk_keys()), self.walk)
+        self.assertEqual(hive.get_key("system\\controlset001").vol.offset, 0x210)
+        self.assertEqual(hive.subkey_reads, [])
+
+    def test_persisted_index(self):
+        """A key index saved by one run is loaded by the next"""
+        constants.PERSISTENT_LAYER_CACHE = True
+        hive = self.build_hive()
+        self.assertEqual(list(hive.walk_keys()), self.walk)
+        filename = hive._key_index_filename()
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(filename)])
+
+        hive = self.build_hive()
+        self.assertEqual(list(hive.walk_keys()), self.walk)
+        self.assertEqual(hive.get_key("Software\\Microsoft\\Windows").vol.offset, 0x130)
+        self.assertEqual(hive.subkey_reads, [])
+
+        with open(filename, "wb") as fp:
+            fp.write(b"not a key index")
+        hive = self.build_hive()
+        self.assertEqual(list(hive.walk_keys()), self.walk)
+        self.assertEqual(sorted(hive.subkey_reads), sorted(KEYS))
+
+    def test_failed_save(self):
+        """A key index that can't be saved leaves no temporary file behind"""
+        constants.PERSISTENT_LAYER_CACHE = True
+        hive = self.build_hive()
+        os.mkdir(hive._key_index_filename())
+        self.assertEqual(list(hive.walk_keys()), self.walk)
+        self.assertEqual(
+            os.listdir(self.directory), [os.path.basename(hive._key_index_filename())]
+        )
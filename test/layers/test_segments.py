@@ -0,0 +1,98 @@
+import bisect
+import random
+import unittest
+
+from volatility3.framework.layers import segmented
+
+MAXIMUM_ADDRESS = (1 << 40) - 1
+
+
+def generate_segments(count, rand):
+    """Generates sorted, non-overlapping segments with gaps between some"""
+    segments = []
+    address = rand.randrange(0x10000)
+    mapped = 0
+    for _ in range(count):
+        length = rand.randrange(1, 0x10000)
+        segments.append((address, mapped, length, length))
+        address += length + rand.choice([0, 0, rand.randrange(1, 0x10000)])
+        mapped += length
+    return segments
+
+
+def reference_find(segments, offset, next=False):
+    """Finds a segment by bisecting a list of segment tuples, as the layer once did"""
+    i = bisect.bisect_right(segments, (offset, MAXIMUM_ADDRESS))
+    if i and not next:
+        segment = segments[i - 1]
+        if segment[0] <= offset < segment[0] + segment[2]:
+            return segment
+    if next:
+        if i < len(segments):
+            return segments[i]
+    return None
+
+
+class TestSegmentTable(unittest.TestCase):
+    def setUp(self):
+        self.rand = random.Random(0x5E6)
+        self.segments = generate_segments(2000, self.rand)
+        self.table = segmented.SegmentTable(self.segments)
+        last = self.segments[-1]
+        self.end = last[0] + last[2]
+
+    def check_find(self, offsets):
+        for offset in offsets:
+            index = self.table.find(offset)
+            found = self.table[index] if index >= 0 else None
+            self.assertEqual(found, reference_find(self.segments, offset), offset)
+
+    def test_container(self):
+        self.assertEqual(len(self.table), len(self.segments))
+        self.assertEqual(list(self.table), self.segments)
+        self.assertEqual(self.table[5], self.segments[5])
+        self.assertEqual(self.table[-1], self.segments[-1])
+        self.assertEqual(self.table[10:20:3], self.segments[10:20:3])
+        self.assertEqual(self.table, self.segments)
+        table = segmented.SegmentTable()
+        self.assertFalse(table)
+        table.append(self.segments[0])
+        table += self.segments[1:]
+        self.assertEqual(table, self.table)
+        self.assertNotEqual(table, self.segments[1:])
+
+    def test_find_random(self):
+        self.check_find(self.rand.randrange(self.end + 0x1000) for _ in range(5000))
+
+    def test_find_sequential(self):
+        self.check_find(range(0, self.end + 0x1000, 0x1FF))
+
+    def test_find_backwards(self):
+        self.check_find(range(self.end + 0x1000, -1, -0x3FF))
+
+    def test_find_boundaries(self):
+        offsets = []
+        for address, _, length, _ in self.segments[:200]:
+            offsets.extend(
+                [address - 1, address, address + length - 1, address + length]
+            )
+        self.check_find(offset for offset in offsets if offset >= 0)
+
+    def test_find_next(self):
+        for offset in [self.rand.randrange(self.end + 0x1000) for _ in range(2000)]:
+            index = self.table.find_next(offset)
+            found = self.table[index] if index >= 0 else None
+            self.assertEqual(found, reference_find(self.segments, offset, True))
+
+    def test_find_many(self):
+        offsets = [self.rand.randrange(self.end + 0x1000) for _ in range(5000)]
+        self.assertEqual(
+            self.table.find_many(offsets),
+            [segmented.SegmentTable(self.segments).find(offset) for offset in offsets],
+        )
+
+    def test_empty(self):
+        table = segmented.SegmentTable()
+        self.assertEqual(table.find(0), -1)
+        self.assertEqual(table.find_next(0), -1)
+        self.assertEqual(table.find_many([0, 1]), [-1, -1])
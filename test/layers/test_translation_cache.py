@@ -0,0 +1,163 @@
+import contextlib
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from volatility3.framework import contexts, exceptions
+from volatility3.framework.layers import intel, physical
+
+# The shifts of an Intel32e layer's walks, which can end after 4k, 2M, 1G or 512G
+SHIFTS = [12, 21, 30, 39, 48]
+
+
+def build_layer(**config):
+    """Builds a four level page table, mapping 0x0-0x3000 to 0x5000-0x8000,
+    with a 2MB page at 0x200000 and everything else unmapped"""
+    data = bytearray(0x8000)
+    struct.pack_into("<Q", data, 0x1000, 0x2000 | 1)
+    struct.pack_into("<Q", data, 0x2000, 0x3000 | 1)
+    struct.pack_into("<Q", data, 0x3000, 0x4000 | 1)
+    struct.pack_into("<Q", data, 0x3008, 0x200000 | 0x81)
+    for index in range(3):
+        struct.pack_into("<Q", data, 0x4000 + 8 * index, (0x5000 + 0x1000 * index) | 1)
+    data[0x5000:0x5004] = b"ABCD"
+    data[0x7000:0x7004] = b"WXYZ"
+    context = contexts.Context()
+    context.layers.add_layer(
+        physical.BufferDataLayer(context, "base", "base", bytes(data))
+    )
+    context.config["virt.memory_layer"] = "base"
+    context.config["virt.page_map_offset"] = 0x1000
+    for key, value in config.items():
+        context.config[f"virt.{key}"] = value
+    layer = intel.Intel32e(context, "virt", "virt")
+    context.layers.add_layer(layer)
+    return layer
+
+
+class TestTranslationCache(unittest.TestCase):
+    def test_store_lookup(self):
+        cache = intel.TranslationCache(SHIFTS, 0x100)
+        for shift in SHIFTS:
+            with self.subTest(shift=shift):
+                offset = 0x123 << shift
+                cache.store(offset, shift, shift - 1)
+                self.assertEqual(cache.lookup(offset), (shift, shift - 1, None))
+                self.assertEqual(
+                    cache.lookup(offset + (1 << shift) - 1), (shift, shift - 1, None)
+                )
+                self.assertIsNone(cache.lookup(offset + (1 << shift)))
+        self.assertEqual(len(cache), len(SHIFTS))
+        self.assertEqual(cache.statistics["hits"], 2 * len(SHIFTS))
+        self.assertEqual(cache.statistics["misses"], len(SHIFTS))
+
+    def test_unknown_position(self):
+        cache = intel.TranslationCache(SHIFTS, 0x100)
+        cache.store(0x1000, 1, 15)
+        self.assertEqual(len(cache), 0)
+        self.assertFalse(cache.modified)
+
+    def test_disabled(self):
+        cache = intel.TranslationCache(SHIFTS, 0)
+        cache.store(0x1000, 1, 11)
+        self.assertIsNone(cache.lookup(0x1000))
+
+    def test_flush_when_full(self):
+        cache = intel.TranslationCache(SHIFTS, 2)
+        cache.store(0x1000, 1, 11)
+        cache.store(0x2000, 2, 11)
+        # Replacing an entry does not need any more room
+        cache.store(0x2000, 3, 11)
+        self.assertEqual(len(cache), 2)
+        cache.store(0x3000, 4, 11)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.lookup(0x1000))
+        self.assertEqual(cache.lookup(0x3000), (4, 11, None))
+
+    def test_fault_prunes_region(self):
+        cache = intel.TranslationCache(SHIFTS, 0x100)
+        cache.store(0x8000000000, 0, 38, "Page Fault")
+        for offset in [0x8000000000, 0x8000001000, 0xFFFFFFFFFF]:
+            self.assertEqual(cache.lookup(offset), (0, 38, "Page Fault"))
+        self.assertIsNone(cache.lookup(0x10000000000))
+
+    def test_save_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "translation.cache")
+            cache = intel.TranslationCache(SHIFTS, 0x100)
+            cache.store(0x1000, 0x5001, 11)
+            cache.store(0x200000, 0x200081, 20)
+            cache.store(0x8000000000, 0x1234, 38, "Page Fault")
+            cache.save(filename)
+            self.assertFalse(cache.modified)
+            self.assertEqual(os.listdir(directory), ["translation.cache"])
+
+            loaded = intel.TranslationCache(SHIFTS, 0x100)
+            loaded.load(filename)
+            self.assertEqual(len(loaded), 3)
+            self.assertEqual(loaded.lookup(0x1FFF), (0x5001, 11, None))
+            self.assertEqual(loaded.lookup(0x3FFFFF), (0x200081, 20, None))
+            entry, position, fault = loaded.lookup(0x8000000000)
+            self.assertEqual((entry, position), (0x1234, 38))
+            self.assertIsNotNone(fault)
+
+            # Entries beyond the maximum size are not loaded
+            small = intel.TranslationCache(SHIFTS, 2)
+            small.load(filename)
+            self.assertEqual(len(small), 2)
+
+            with open(filename, "r+b") as fp:
+                fp.write(b"BADMAGIC")
+            with self.assertRaises(ValueError):
+                intel.TranslationCache(SHIFTS, 0x100).load(filename)
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestIntelTranslationCache(unittest.TestCase):
+    def test_cached_translation(self):
+        layer = build_layer()
+        for _ in range(2):
+            self.assertEqual(layer.read(0x0, 4), b"ABCD")
+            self.assertEqual(layer.read(0x2000, 4), b"WXYZ")
+            self.assertEqual(layer._translate_entry(0x200123)[1], 20)
+            with self.assertRaises(exceptions.PagedInvalidAddressException):
+                layer.translate(0x3000)
+            with self.assertRaises(exceptions.PagedInvalidAddressException):
+                layer.translate(0x8000000000)
+        statistics = layer.translation_cache_statistics
+        self.assertGreater(statistics["hits"], 0)
+        self.assertEqual(statistics["entries"], statistics["misses"])
+
+    def test_default_size(self):
+        layer = build_layer()
+        cache = layer._translation_cache
+        self.assertEqual(cache.maximum_size, intel.Intel32e._translation_cache_size)
+        # A full cache of a layer without modules does not grow
+        for index in range(cache.maximum_size + 1):
+            cache.store((0x100000 + index) << 12, 0, 11)
+        layer.translate(0x1000)
+        self.assertEqual(cache.maximum_size, intel.Intel32e._translation_cache_size)
+
+    def test_module_layer_grows(self):
+        layer = build_layer()
+        layer.context.module("kernel", layer.name, 0)
+        cache = layer._translation_cache
+        for index in range(cache.maximum_size):
+            cache.store((0x100000 + index) << 12, 0, 11)
+        layer.translate(0x1000)
+        self.assertEqual(
+            cache.maximum_size, intel.Intel32e._module_translation_cache_size
+        )
+
+    def test_configured_size(self):
+        layer = build_layer(translation_cache_size=4)
+        layer.context.module("kernel", layer.name, 0)
+        for offset in [0x0, 0x1000, 0x2000, 0x200000, 0x3000, 0x8000000000]:
+            with contextlib.suppress(exceptions.InvalidAddressException):
+                layer._translate_entry(offset)
+        self.assertEqual(layer._translation_cache.maximum_size, 4)
+        self.assertLessEqual(len(layer._translation_cache), 4)
@@ -0,0 +1,310 @@
+import io
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from volatility3.framework import constants, contexts, exceptions, interfaces
+from volatility3.framework.layers import physical
+
+PARALLELISM = [
+    constants.Parallelism.Off,
+    constants.Parallelism.Threading,
+    constants.Parallelism.Multiprocessing,
+]
+
+
+class SlowLayer(physical.BufferDataLayer):
+    """A layer whose reads take a random while, so that runs read on
+    several threads finish in any order"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rand = random.Random(0)
+        self.reads = []
+
+    def read(self, offset, length, pad=False):
+        time.sleep(self.rand.random() * 0.0005)
+        self.reads.append((offset, length))
+        return super().read(offset, length, pad)
+
+
+class FailingLayer(physical.BufferDataLayer):
+    def read(self, offset, length, pad=False):
+        raise exceptions.InvalidAddressException(self.name, offset, "Unreadable")
+
+
+class DiskFileHandler(io.FileIO, interfaces.plugins.FileHandlerInterface):
+    """A file handler with a file descriptor, so that extents are written with
+    pwrite and can leave holes"""
+
+    def __init__(self, path):
+        io.FileIO.__init__(self, path, "w+b")
+        interfaces.plugins.FileHandlerInterface.__init__(self, os.path.basename(path))
+
+
+class MemFileHandler(io.BytesIO, interfaces.plugins.FileHandlerInterface):
+    """A file handler without a file descriptor"""
+
+    def __init__(self, filename):
+        io.BytesIO.__init__(self)
+        interfaces.plugins.FileHandlerInterface.__init__(self, filename)
+
+    def close(self):
+        pass
+
+
+class FailingFileHandler(MemFileHandler):
+    def write(self, data):
+        raise OSError("Disk full")
+
+
+def build_layer(layer_class=SlowLayer, size=0x10000, seed=0):
+    context = contexts.Context()
+    data = random.Random(seed).randbytes(size)
+    layer = layer_class(context, "base", "base", data)
+    context.layers.add_layer(layer)
+    return layer
+
+
+def generate_extents(count, seed, size=0x10000, file_size=0x8000):
+    """Generates extents that overlap each other, some of them adjacent in
+    both the file and the layer"""
+    rand = random.Random(seed)
+    file_offset = address = 0
+    for _ in range(count):
+        length = rand.randrange(1, 0x800)
+        if rand.random() < 0.5 or address + length > size:
+            file_offset = rand.randrange(file_size)
+            address = rand.randrange(size - length)
+        yield file_offset, address, length
+        file_offset += length
+        address += length
+
+
+def reference_file(layer, extents):
+    """Writes the extents into memory one after another, with padding"""
+    data = bytearray()
+    for file_offset, address, length in extents:
+        chunk = layer.read(address, length, pad=True)
+        if len(data) < file_offset + length:
+            data.extend(bytes(file_offset + length - len(data)))
+        data[file_offset : file_offset + length] = chunk
+    return bytes(data)
+
+
+class TestFileExtentWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parallelism = constants.PARALLELISM
+
+    def tearDown(self):
+        constants.PARALLELISM = self.parallelism
+        shutil.rmtree(self.directory)
+
+    def disk_file(self, name="file.dmp"):
+        return DiskFileHandler(os.path.join(self.directory, name))
+
+    def read_file(self, file_handle):
+        if isinstance(file_handle, DiskFileHandler):
+            with open(file_handle.name, "rb") as fp:
+                return fp.read()
+        return file_handle.getvalue()
+
+    def test_overlapping_extents(self):
+        """Later extents overwrite earlier ones, however the runs are read"""
+        for parallelism in PARALLELISM:
+            for handler in [self.disk_file, lambda: MemFileHandler("file.dmp")]:
+                constants.PARALLELISM = parallelism
+                with self.subTest(parallelism=parallelism, handler=handler):
+                    layer = build_layer()
+                    extents = list(generate_extents(300, parallelism.value))
+                    file_handle = handler()
+                    with interfaces.plugins.FileExtentWriter(
+                        chunk_size=0x400, buffer_size=0x1000, threads=4
+                    ) as writer:
+                        for file_offset, address, length in extents:
+                            writer.write(
+                                file_handle, file_offset, layer, address, length
+                            )
+                        self.assertEqual(
+                            writer.finish(file_handle),
+                            sum(length for _, _, length in extents),
+                        )
+                    self.assertEqual(
+                        self.read_file(file_handle), reference_file(layer, extents)
+                    )
+                    file_handle.close()
+
+    def test_coalesced_reads(self):
+        """Extents adjacent in both the file and the layer are read at once"""
+        layer = build_layer()
+        file_handle = MemFileHandler("file.dmp")
+        with interfaces.plugins.FileExtentWriter(chunk_size=0x1000) as writer:
+            for offset in range(0, 0x3000, 0x100):
+                writer.write(file_handle, offset, layer, offset + 0x10, 0x100)
+        self.assertEqual(
+            layer.reads, [(0x10, 0x1000), (0x1010, 0x1000), (0x2010, 0x1000)]
+        )
+        self.assertEqual(file_handle.getvalue(), layer.read(0x10, 0x3000))
+
+    def test_buffer_size(self):
+        """No more data is read than the buffer holds, until it is written"""
+        constants.PARALLELISM = constants.Parallelism.Threading
+        writer = interfaces.plugins.FileExtentWriter(
+            chunk_size=0x400, buffer_size=0x1000, threads=8
+        )
+        buffered = []
+
+        class SlowFileHandler(MemFileHandler):
+            def write(self, data):
+                buffered.append(writer._buffered)
+                time.sleep(0.001)
+                return super().write(data)
+
+        layer = build_layer()
+        file_handle = SlowFileHandler("file.dmp")
+        with writer:
+            for file_offset, address, length in generate_extents(200, 1):
+                writer.write(file_handle, file_offset, layer, address, length)
+        self.assertTrue(buffered)
+        self.assertLessEqual(max(buffered), 0x1000)
+        self.assertGreater(max(buffered), 0x400)
+        self.assertEqual(writer._buffered, 0)
+
+    def test_sparse_file(self):
+        """Runs of zeroes beyond the data written are left as holes, and the
+        file is extended or truncated to its final size"""
+        context = contexts.Context()
+        layer = physical.BufferDataLayer(
+            context, "base", "base", bytes(0x100000) + b"\xff" * 0x1000
+        )
+        file_handle = self.disk_file()
+        file_handle.write(b"header")
+        with interfaces.plugins.FileExtentWriter(chunk_size=0x10000) as writer:
+            writer.write(file_handle, 0x1000, layer, 0, 0x100000)
+            writer.write(file_handle, 0x200000, layer, 0x100000, 0x1000)
+            writer.write(file_handle, 0x300000, layer, 0, 0x10000)
+            writer.finish(file_handle)
+            self.assertEqual(os.stat(file_handle.name).st_size, 0x310000)
+            data = self.read_file(file_handle)
+            self.assertEqual(data[:6], b"header")
+            self.assertEqual(data[0x200000:0x201000], b"\xff" * 0x1000)
+            self.assertEqual(data.count(0), 0x310000 - 0x1006)
+            if hasattr(os.stat_result, "st_blocks") and self.supports_holes():
+                self.assertLess(os.stat(file_handle.name).st_blocks * 512, 0x100000)
+
+            writer.write(file_handle, 0, layer, 0x100000, 0x10)
+            writer.finish(file_handle, 0x400000)
+            self.assertEqual(os.stat(file_handle.name).st_size, 0x400000)
+            writer.write(file_handle, 0x10, layer, 0x100000, 0x10)
+            writer.finish(file_handle, 0x100)
+        self.assertEqual(self.read_file(file_handle), b"\xff" * 0x20 + bytes(0xE0))
+        file_handle.close()
+
+    def supports_holes(self):
+        path = os.path.join(self.directory, "sparse")
+        with open(path, "wb") as fp:
+            fp.truncate(0x100000)
+        return os.stat(path).st_blocks * 512 < 0x100000
+
+    def test_unseekable_file(self):
+        """Files without a file descriptor are written to and sized directly"""
+        layer = build_layer()
+        file_handle = MemFileHandler("file.dmp")
+        file_handle.write(b"header")
+        with interfaces.plugins.FileExtentWriter() as writer:
+            writer.write(file_handle, 0x1000, layer, 0x2000, 0x100)
+            self.assertEqual(writer.finish(file_handle), 0x100)
+            self.assertEqual(
+                file_handle.getvalue(),
+                b"header" + bytes(0xFFA) + layer.read(0x2000, 0x100),
+            )
+            writer.write(file_handle, 0, layer, 0, 0x10)
+            writer.finish(file_handle, 0x2000)
+            self.assertEqual(len(file_handle.getvalue()), 0x2000)
+            writer.write(file_handle, 0x10, layer, 0x10, 0x10)
+            writer.finish(file_handle, 0x20)
+        self.assertEqual(file_handle.getvalue(), layer.read(0, 0x20))
+
+    def test_errors(self):
+        """Failures to read or write are raised by finish, and the runs
+        queued after them are still accounted for"""
+        for parallelism in PARALLELISM:
+            constants.PARALLELISM = parallelism
+            with self.subTest(parallelism=parallelism):
+                writer = interfaces.plugins.FileExtentWriter(
+                    chunk_size=0x100, buffer_size=0x400, threads=4
+                )
+                layer = build_layer()
+                failing = build_layer(FailingLayer)
+                file_handle = MemFileHandler("file.dmp")
+                writer.write(file_handle, 0, layer, 0, 0x1000)
+                writer.write(file_handle, 0x1000, failing, 0, 0x100)
+                writer.write(file_handle, 0x1100, layer, 0x1100, 0x1000)
+                with self.assertRaises(exceptions.InvalidAddressException):
+                    writer.finish(file_handle)
+                self.assertEqual(writer._buffered, 0)
+
+                file_handle = FailingFileHandler("file.dmp")
+                writer.write(file_handle, 0, layer, 0, 0x1000)
+                with self.assertRaises(OSError):
+                    writer.finish(file_handle)
+                self.assertEqual(writer._buffered, 0)
+                writer.close()
+
+    def test_close(self):
+        layer = build_layer()
+        handles = [MemFileHandler(f"file{index}.dmp") for index in range(3)]
+        writer = interfaces.plugins.FileExtentWriter(chunk_size=0x100)
+        for index, file_handle in enumerate(handles):
+            writer.write(file_handle, 0, layer, index * 0x1000, 0x1000)
+        writer.close()
+        for index, file_handle in enumerate(handles):
+            self.assertEqual(file_handle.getvalue(), layer.read(index * 0x1000, 0x1000))
+
+    def test_discard(self):
+        """Discarded extents that have not been written are neither read nor
+        written, whether or not their runs have been queued"""
+        constants.PARALLELISM = constants.Parallelism.Threading
+        started = threading.Event()
+        release = threading.Event()
+
+        class BlockingLayer(SlowLayer):
+            def read(self, offset, length, pad=False):
+                started.set()
+                release.wait()
+                return super().read(offset, length, pad)
+
+        layer = build_layer(BlockingLayer)
+        file_handle = MemFileHandler("file.dmp")
+        writer = interfaces.plugins.FileExtentWriter(chunk_size=0x100, threads=1)
+        for offset in range(0, 0x1000, 0x100):
+            writer.write(file_handle, offset, layer, offset, 0x80)
+        started.wait()
+        discarding = threading.Thread(
+            target=writer.discard, args=(file_handle,), daemon=True
+        )
+        discarding.start()
+        time.sleep(0.05)
+        release.set()
+        discarding.join(10)
+        self.assertFalse(discarding.is_alive())
+        writer.close()
+        self.assertEqual(layer.reads, [(0, 0x80)])
+        self.assertEqual(file_handle.getvalue(), b"")
+        self.assertEqual(writer._buffered, 0)
+
+    def test_discard_on_error(self):
+        """Leaving the context on an error discards the queued extents"""
+        layer = build_layer()
+        file_handle = MemFileHandler("file.dmp")
+        with self.assertRaises(ValueError):
+            with interfaces.plugins.FileExtentWriter(chunk_size=0x100) as writer:
+                writer.write(file_handle, 0, layer, 0, 0x80)
+                raise ValueError("Stop")
+        self.assertEqual(file_handle.getvalue(), b"")
+        self.assertEqual(layer.reads, [])
@@ -0,0 +1,105 @@
+import contextlib
+import io
+import random
+import unittest
+
+from volatility3.cli import text_renderer
+from volatility3.framework import renderers
+from volatility3.framework.renderers import format_hints
+
+
+def generate_rows(count, seed):
+    """Generates rows of a randomly shaped tree, with the occasional jump
+    back up several levels"""
+    rand = random.Random(seed)
+    level = 0
+    for index in range(count):
+        level = rand.randint(0, level + 1) if index else 0
+        yield level, (
+            index,
+            format_hints.Hex(rand.getrandbits(32)),
+            rand.choice(["a", "b,c", 'd"e', "f\tg"]),
+        )
+
+
+def build_grid(count=500, seed=0):
+    return renderers.TreeGrid(
+        [("Index", int), ("Value", format_hints.Hex), ("Name", str)],
+        generate_rows(count, seed),
+    )
+
+
+class TestTreeGridRetain(unittest.TestCase):
+    def visited_rows(self, retain):
+        rows = []
+
+        def visitor(node, accumulator):
+            accumulator.append(
+                (
+                    node.path,
+                    node.path_depth,
+                    node.parent.path if node.parent is not None else None,
+                    tuple(node.values),
+                )
+            )
+            return accumulator
+
+        grid = build_grid()
+        grid.populate(visitor, rows, retain=retain)
+        return grid, rows
+
+    def test_streamed_rows(self):
+        """Streamed rows have the same paths, parents and values as retained ones"""
+        _, retained = self.visited_rows(True)
+        _, streamed = self.visited_rows(False)
+        self.assertEqual(len(retained), 500)
+        self.assertEqual(streamed, retained)
+
+    def test_streamed_not_visitable(self):
+        grid, _ = self.visited_rows(False)
+        self.assertEqual(grid.row_count, 500)
+        with self.assertRaises(ValueError):
+            grid.visit(None, lambda node, accumulator: accumulator, None)
+
+    def test_retained_visitable(self):
+        grid, rows = self.visited_rows(True)
+        visited = []
+        grid.visit(
+            None,
+            lambda node, accumulator: accumulator.append(node.path) or accumulator,
+            visited,
+        )
+        self.assertEqual(visited, [row[0] for row in rows])
+
+
+class TestStreamingRenderers(unittest.TestCase):
+    def render(self, renderer, grid):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            renderer.render(grid)
+        return output.getvalue()
+
+    def test_renderers(self):
+        """Renderers that stream rows output the same as for a retained grid"""
+        for renderer_class in [
+            text_renderer.QuickTextRenderer,
+            text_renderer.CSVRenderer,
+            text_renderer.JsonLinesRenderer,
+        ]:
+            with self.subTest(renderer=renderer_class.name):
+                retained = build_grid()
+                retained.populate()
+                self.assertEqual(
+                    self.render(renderer_class(), build_grid()),
+                    self.render(renderer_class(), retained),
+                )
+
+    def test_json_lines(self):
+        """Streamed JSON lines match the JSON lines of the whole tree"""
+        renderer = text_renderer.JsonLinesRenderer()
+        whole = text_renderer.JsonLinesRenderer()
+        whole.streaming = False
+        self.assertEqual(
+            self.render(renderer, build_grid(seed=1)),
+            self.render(whole, build_grid(seed=1)),
+        )
@@ -0,0 +1,183 @@
+import datetime
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from volatility3.framework import constants, contexts, interfaces, renderers
+from volatility3.plugins import timeliner
+
+
+def generate_events(count, seed):
+    """Generates timestamps for a small pool of items, so that most items have
+    several timestamps (some of them repeated) spread far apart"""
+    rand = random.Random(seed)
+    base = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    for _ in range(count):
+        timestamp = base + datetime.timedelta(seconds=rand.randrange(1000))
+        if not rand.randrange(10):
+            timestamp = renderers.NotAvailableValue()
+        yield (
+            f"item {rand.randrange(count // 4)}",
+            rand.choice(list(timeliner.TimeLinerType)),
+            timestamp,
+        )
+
+
+class EventPlugin(interfaces.plugins.PluginInterface, timeliner.TimeLinerInterface):
+    _required_framework_version = (2, 0, 0)
+
+    seed = 1
+
+    def generate_timeline(self):
+        yield from generate_events(200, self.seed)
+
+    def run(self):
+        return None
+
+
+class OtherEventPlugin(EventPlugin):
+    seed = 2
+
+
+class MemFileHandler(io.BytesIO, interfaces.plugins.FileHandlerInterface):
+    """Keeps the contents of the files written by a plugin once closed"""
+
+    files = {}
+
+    def __init__(self, filename):
+        io.BytesIO.__init__(self)
+        interfaces.plugins.FileHandlerInterface.__init__(self, filename)
+
+    def close(self):
+        if not self.closed:
+            self.files[self.preferred_filename] = self.getvalue()
+        super().close()
+
+
+def reference_timeline(plugin_classes):
+    """Builds the rows and body file by combining every item's timestamps in
+    memory and sorting all the rows at once"""
+    rows = []
+    body = []
+    for plugin_class in plugin_classes:
+        name = plugin_class.__name__
+        timeline = {}
+        for item, timestamp_type, timestamp in plugin_class.generate_timeline(
+            plugin_class
+        ):
+            times = timeline.setdefault(item, {})
+            times[timestamp_type] = timestamp
+            rows.append(
+                (
+                    0,
+                    [name, item]
+                    + [
+                        times.get(time, renderers.NotApplicableValue())
+                        for time in timeliner.TimeLinerType
+                    ],
+                )
+            )
+            if timeliner.Timeliner._any_time_present(times):
+                body.append(
+                    "|{} - {}|0|0|0|0|0|{}|{}|{}|{}\n".format(
+                        name,
+                        item,
+                        *[
+                            timeliner.Timeliner._text_format(times.get(time, "0"))
+                            for time in [
+                                timeliner.TimeLinerType.ACCESSED,
+                                timeliner.TimeLinerType.MODIFIED,
+                                timeliner.TimeLinerType.CHANGED,
+                                timeliner.TimeLinerType.CREATED,
+                            ]
+                        ],
+                    )
+                )
+    return sorted(rows, key=timeliner.Timeliner._sort_function), "".join(body)
+
+
+def comparable(rows):
+    """Replaces absent values, which don't compare equal, by their type"""
+    return [
+        [
+            (
+                type(value)
+                if isinstance(value, interfaces.renderers.BaseAbsentValue)
+                else value
+            )
+            for value in values
+        ]
+        for _, values in rows
+    ]
+
+
+class TestTimelinerRuns(unittest.TestCase):
+    plugin_classes = [EventPlugin, OtherEventPlugin]
+
+    def setUp(self):
+        self.parallelism = constants.PARALLELISM
+        MemFileHandler.files = {}
+
+    def tearDown(self):
+        constants.PARALLELISM = self.parallelism
+
+    def timeline(self, parallelism, create_bodyfile=True, spill_rows=7):
+        constants.PARALLELISM = parallelism
+        context = contexts.Context()
+        context.config["plugins.Timeliner.create-bodyfile"] = create_bodyfile
+        plugin = timeliner.Timeliner(context, "plugins.Timeliner")
+        plugin.spill_rows = spill_rows
+        plugin.set_open_method(MemFileHandler)
+        runnable = [
+            plugin_class(context, f"plugins.Timeliner.{plugin_class.__name__}")
+            for plugin_class in self.plugin_classes
+        ]
+        return list(plugin._generator(runnable))
+
+    def check_timeline(self, rows):
+        expected_rows, expected_body = reference_timeline(self.plugin_classes)
+        self.assertEqual(len(rows), 400)
+        self.assertEqual(comparable(rows), comparable(expected_rows))
+        self.assertEqual(
+            MemFileHandler.files["volatility.body"].decode(), expected_body
+        )
+
+    def test_spilled_runs(self):
+        """Items' timestamps are combined across runs, and the merged runs are
+        ordered as if all the rows were sorted together"""
+        self.check_timeline(self.timeline(constants.Parallelism.Off))
+
+    def test_single_run(self):
+        self.check_timeline(self.timeline(constants.Parallelism.Off, spill_rows=1000))
+
+    def test_thread_pool(self):
+        self.check_timeline(self.timeline(constants.Parallelism.Threading))
+
+    def test_process_pool(self):
+        self.check_timeline(self.timeline(constants.Parallelism.Multiprocessing))
+
+    def test_no_bodyfile(self):
+        rows = self.timeline(constants.Parallelism.Off, create_bodyfile=False)
+        self.assertEqual(len(rows), 400)
+        self.assertEqual(MemFileHandler.files, {})
+
+    def test_spill_files(self):
+        """Only the sorted runs (and body file entries if asked for) are left"""
+        plugin = EventPlugin(contexts.Context(), "plugins.Timeliner.EventPlugin")
+        with tempfile.TemporaryDirectory() as spill_dir:
+            run_filenames, body_filename = timeliner.Timeliner._timeline_runs(
+                plugin, spill_dir, 3, 64
+            )
+            self.assertIsNone(body_filename)
+            self.assertEqual(len(run_filenames), 4)
+            self.assertEqual(
+                sorted(os.listdir(spill_dir)),
+                sorted(os.path.basename(filename) for filename in run_filenames),
+            )
+            _, body_filename = timeliner.Timeliner._timeline_runs(
+                plugin, spill_dir, 4, 64, body=True
+            )
+            self.assertTrue(os.path.exists(body_filename))
+            self.assertEqual(len(os.listdir(spill_dir)), 9)
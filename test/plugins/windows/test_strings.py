@@ -0,0 +1,97 @@
+import random
+import unittest
+
+from volatility3.plugins.windows import strings
+
+
+def generate_runs(count, rand):
+    """Generates runs for a handful of owners, some of which are longer than the
+    map's maximum run length and many of which overlap"""
+    runs = []
+    for _ in range(count):
+        owner = rand.choice(["kernel", "Process 4", "Process 100", "Process 2024"])
+        physical = rand.randrange(0x1000000) & ~0xFFF
+        virtual = rand.randrange(0x7FFFFFFF0000) & ~0xFFF
+        length = rand.choice([0x1000, 0x3000, rand.randrange(1, 0x40000)])
+        runs.append((owner, physical, virtual, length))
+    return runs
+
+
+def reference_lookup(runs, address):
+    return sorted(
+        (owner, virtual + address - physical)
+        for owner, physical, virtual, length in runs
+        if physical <= address < physical + length
+    )
+
+
+class FakeLayer:
+    """A layer that only provides the mapping of its chunks"""
+
+    maximum_address = (1 << 48) - 1
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def mapping(self, offset, length, ignore_errors=False):
+        yield from self.chunks
+
+
+class TestPhysicalReverseMap(unittest.TestCase):
+    def setUp(self):
+        self.rand = random.Random(0x16)
+        self.runs = generate_runs(300, self.rand)
+
+    def addresses(self, count=3000):
+        addresses = [self.rand.randrange(0x1040000) for _ in range(count)]
+        for _, physical, _, length in self.runs[:100]:
+            addresses.extend([physical - 1, physical, physical + length - 1])
+            addresses.append(physical + length)
+        return [address for address in addresses if address >= 0]
+
+    def check_map(self, revmap):
+        for address in self.addresses():
+            self.assertEqual(
+                sorted(revmap.lookup(address)),
+                reference_lookup(self.runs, address),
+                hex(address),
+            )
+
+    def test_lookup(self):
+        revmap = strings.PhysicalReverseMap()
+        for run in self.runs:
+            revmap.add_run(*run)
+        self.assertEqual(sorted(revmap.owners), sorted({run[0] for run in self.runs}))
+        self.assertGreater(len(revmap), len(self.runs))
+        self.check_map(revmap)
+
+    def test_merge(self):
+        """Maps built per owner and merged look up the same as a single map"""
+        revmap = strings.PhysicalReverseMap()
+        revmap.add_run("kernel", 0x1000, 0x2000, 0x1000)
+        revmap.sort()
+        for owner in ["Process 4", "Process 100", "Process 2024", "kernel"]:
+            other = strings.PhysicalReverseMap()
+            for run in self.runs:
+                if run[0] == owner:
+                    other.add_run(*run)
+            revmap.merge(other)
+        self.runs.append(("kernel", 0x1000, 0x2000, 0x1000))
+        self.check_map(revmap)
+
+    def test_add_layer(self):
+        chunks = []
+        for _, physical, virtual, length in self.runs[:50]:
+            chunks.append((virtual, length, physical, length, "memory_layer"))
+        chunks.append((0x1000, 0x1000, 0x5000, 0x1000, "swap_layer"))
+        revmap = strings.PhysicalReverseMap()
+        revmap.add_layer("kernel", FakeLayer(chunks), "memory_layer")
+        self.runs = [("kernel",) + run[1:] for run in self.runs[:50]]
+        self.check_map(revmap)
+        self.assertNotIn(("kernel", 0x1000), revmap.lookup(0x5000))
+
+    def test_empty(self):
+        revmap = strings.PhysicalReverseMap()
+        self.assertEqual(revmap.lookup(0x1000), [])
+        revmap.merge(strings.PhysicalReverseMap())
+        self.assertEqual(len(revmap), 0)
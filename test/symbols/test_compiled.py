@@ -0,0 +1,228 @@
+import json
+import os
+import pathlib
+import pickle
+import shutil
+import tempfile
+import unittest
+import urllib.parse
+import urllib.request
+
+import volatility3.symbols
+from volatility3.framework import constants
+from volatility3.framework.automagic import symbol_cache
+from volatility3.framework.symbols import compiled, intermed
+
+ISF = {
+    "metadata": {"format": "6.2.0", "producer": {"name": "test"}},
+    "base_types": {
+        "int": {"kind": "int", "size": 4, "signed": True, "endian": "little"}
+    },
+    "user_types": {
+        "_LIST_ENTRY": {
+            "kind": "struct",
+            "size": 16,
+            "fields": {
+                "Flink": {"offset": 0, "type": {"kind": "pointer"}},
+                "Blink": {"offset": 8, "type": {"kind": "pointer"}},
+            },
+        },
+        "_EMPTY": {"kind": "struct", "size": 0, "fields": {}},
+        "ünicode": {"kind": "union", "size": 4, "fields": {}},
+    },
+    "enums": {"COLOUR": {"base": "int", "size": 4, "constants": {"RED": 1}}},
+    "symbols": {"banner": {"address": 4096}, "other": {"address": 8192}},
+}
+
+
+class TestCompiledISF(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.original_cache_path = constants.CACHE_PATH
+        constants.CACHE_PATH = self.directory
+        self.path = os.path.join(self.directory, "test.json")
+        self.write_isf(ISF)
+        self.url = pathlib.Path(self.path).as_uri()
+
+    def tearDown(self):
+        constants.CACHE_PATH = self.original_cache_path
+        shutil.rmtree(self.directory)
+
+    def write_isf(self, document):
+        with open(self.path, "w") as fp:
+            json.dump(document, fp)
+
+    def test_round_trip(self):
+        compiled.save(self.url, "abc", ISF)
+        self.assertTrue(os.path.exists(compiled.cache_filename("abc")))
+        document = compiled.load(self.url, "abc")
+        self.assertIsNotNone(document)
+        self.assertEqual(set(document), set(ISF))
+        self.assertEqual(document["metadata"], ISF["metadata"])
+        self.assertEqual(document["base_types"], ISF["base_types"])
+        for section in compiled.LAZY_SECTIONS:
+            with self.subTest(section=section):
+                self.assertIsInstance(document[section], compiled.CompiledSection)
+                self.assertEqual(dict(document[section]), ISF[section])
+                self.assertEqual(list(document[section]), list(ISF[section]))
+
+    def test_section(self):
+        compiled.save(self.url, "abc", ISF)
+        user_types = compiled.load(self.url, "abc")["user_types"]
+        self.assertEqual(len(user_types), 3)
+        self.assertIn("_EMPTY", user_types)
+        self.assertNotIn("_MISSING", user_types)
+        with self.assertRaises(KeyError):
+            user_types["_MISSING"]
+        # Entries are only decoded once they're looked up
+        self.assertEqual(user_types._decoded, {})
+        entry = user_types["_LIST_ENTRY"]
+        self.assertEqual(entry, ISF["user_types"]["_LIST_ENTRY"])
+        self.assertIs(user_types["_LIST_ENTRY"], entry)
+        self.assertEqual(list(user_types._decoded), ["_LIST_ENTRY"])
+
+        copied = pickle.loads(pickle.dumps(user_types))
+        self.assertEqual(copied._decoded, {})
+        self.assertEqual(dict(copied), ISF["user_types"])
+
+    def test_empty_sections(self):
+        document = {"metadata": {}, "user_types": {}, "symbols": {}}
+        compiled.save(self.url, "abc", document)
+        loaded = compiled.load(self.url, "abc")
+        self.assertEqual(len(loaded["user_types"]), 0)
+        self.assertEqual(dict(loaded["symbols"]), {})
+        self.assertNotIn("enums", loaded)
+
+    def test_unknown_hash(self):
+        compiled.save(self.url, "abc", ISF)
+        self.assertIsNone(compiled.load(self.url, "def"))
+
+    def test_changed_source(self):
+        compiled.save(self.url, "abc", ISF)
+        self.write_isf(dict(ISF, symbols={}))
+        self.assertIsNone(compiled.load(self.url, "abc"))
+
+    def test_touched_source(self):
+        compiled.save(self.url, "abc", ISF)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertIsNone(compiled.load(self.url, "abc"))
+
+    def test_jar_source(self):
+        jar_url = "jar:" + self.url + "!/test.json"
+        self.assertEqual(
+            compiled.source_identity(jar_url), compiled.source_identity(self.url)
+        )
+
+    def test_remote_source(self):
+        url = "https://example.com/test.json"
+        self.assertIsNone(compiled.source_identity(url))
+        compiled.save(url, "abc", ISF)
+        self.assertFalse(os.path.exists(compiled.cache_filename("abc")))
+        self.assertIsNone(compiled.load(url, "abc"))
+
+    def test_corrupt_file(self):
+        compiled.save(self.url, "abc", ISF)
+        with open(compiled.cache_filename("abc"), "r+b") as fp:
+            fp.truncate(len(compiled.MAGIC) + 4)
+        self.assertIsNone(compiled.load(self.url, "abc"))
+
+    def test_type_names(self):
+        compiled.save(self.url, "abc", ISF)
+        user_types = compiled.load(self.url, "abc")["user_types"]
+        names = intermed._TypeNamesView(user_types, {"int", "_EMPTY", "pointer"})
+        self.assertEqual(
+            list(names)[:3], ["_LIST_ENTRY", "_EMPTY", "ünicode"], "user types first"
+        )
+        self.assertEqual(sorted(list(names)[3:]), ["int", "pointer"])
+        self.assertEqual(len(names), 5)
+        self.assertIn("pointer", names)
+        self.assertIn("_LIST_ENTRY", names)
+        self.assertNotIn("_MISSING", names)
+        self.assertEqual(set(names) & {"int", "long"}, {"int"})
+        # Listing the names never decodes the types themselves
+        self.assertEqual(user_types._decoded, {})
+
+    def test_remove(self):
+        compiled.save(self.url, "abc", ISF)
+        compiled.remove("abc")
+        self.assertFalse(os.path.exists(compiled.cache_filename("abc")))
+        compiled.remove("abc")
+
+    def test_failed_save(self):
+        """A save that fails part way through leaves no temporary file behind"""
+        compiled.save(self.url, "abc", dict(ISF, symbols={"bad": {"address": {1j}}}))
+        self.assertEqual(os.listdir(self.directory), ["test.json"])
+
+
+class TestSymbolCachePrune(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.symbols = os.path.join(self.directory, "symbols")
+        os.mkdir(self.symbols)
+        self.original_settings = (
+            constants.CACHE_PATH,
+            constants.OFFLINE,
+            volatility3.symbols.__path__,
+        )
+        constants.CACHE_PATH = self.directory
+        constants.OFFLINE = True
+        volatility3.symbols.__path__ = [self.symbols]
+        self.cache = symbol_cache.SqliteCache(
+            os.path.join(self.directory, constants.IDENTIFIERS_FILENAME)
+        )
+
+    def tearDown(self):
+        self.cache._database.close()
+        (
+            constants.CACHE_PATH,
+            constants.OFFLINE,
+            volatility3.symbols.__path__,
+        ) = self.original_settings
+        shutil.rmtree(self.directory)
+
+    def add_isf(self, name, document):
+        path = os.path.join(self.symbols, name)
+        with open(path, "w") as fp:
+            json.dump(document, fp)
+        return pathlib.Path(path).as_uri()
+
+    def compile(self, url):
+        json_hash = self.cache.get_hash(url)
+        compiled.save(url, json_hash, ISF)
+        self.assertTrue(os.path.exists(compiled.cache_filename(json_hash)))
+        return json_hash
+
+    def test_removed_location(self):
+        url = self.add_isf("test.json", ISF)
+        self.cache.update()
+        json_hash = self.compile(url)
+        os.remove(urllib.request.url2pathname(urllib.parse.urlparse(url).path))
+        self.cache.update()
+        self.assertIsNone(self.cache.get_hash(url))
+        self.assertFalse(os.path.exists(compiled.cache_filename(json_hash)))
+
+    def test_rehashed_location(self):
+        url = self.add_isf("test.json", ISF)
+        self.cache.update()
+        json_hash = self.compile(url)
+        self.add_isf("test.json", dict(ISF, symbols={}))
+        # Only entries that haven't been checked recently are checked again
+        with self.cache._database:
+            self.cache._database.execute(
+                "UPDATE cache SET cached = datetime('now', '-1 year')"
+            )
+        self.cache.update()
+        self.assertNotEqual(self.cache.get_hash(url), json_hash)
+        self.assertFalse(os.path.exists(compiled.cache_filename(json_hash)))
+
+    def test_shared_hash(self):
+        """A compiled copy is kept whilst another location has the same hash"""
+        url = self.add_isf("test.json", ISF)
+        other_url = self.add_isf("other.json", ISF)
+        self.cache.update()
+        json_hash = self.compile(url)
+        self.assertEqual(self.cache.get_hash(other_url), json_hash)
+        os.remove(os.path.join(self.symbols, "test.json"))
+        self.cache.update()
+        self.assertTrue(os.path.exists(compiled.cache_filename(json_hash)))
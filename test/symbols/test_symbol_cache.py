@@ -0,0 +1,160 @@
+import base64
+import concurrent.futures
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from volatility3.framework import constants
+from volatility3.framework.automagic import symbol_cache
+from volatility3.framework.symbols import intermed
+
+BANNER = (
+    b"Linux version 5.15.0-91-generic (buildd@lcy02-amd64-045) #101-Ubuntu SMP\n\x00"
+)
+
+ISF = {
+    "metadata": {"format": "6.2.0", "producer": {"name": "test", "version": 12345}},
+    "base_types": {
+        "int": {"kind": "int", "size": 4, "signed": True, "endian": "little"},
+        "char": {"kind": "char", "size": 1, "signed": True, "endian": "little"},
+    },
+    "user_types": {
+        "task_struct": {"kind": "struct", "size": 9999, "fields": {}},
+        "ünicode": {"kind": "union", "size": 4, "fields": {}},
+    },
+    "enums": {},
+    "symbols": {
+        "init_task": {"address": 18446744071600000000},
+        "linux_banner": {
+            "address": 18446744071612345678,
+            "constant_data": base64.b64encode(BANNER).decode(),
+        },
+        'escaped "name"': {"address": 1.5e3},
+    },
+}
+
+
+class TestProcessLocation(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.chunk_size = symbol_cache._JSONStream.chunk_size
+
+    def tearDown(self):
+        symbol_cache._JSONStream.chunk_size = self.chunk_size
+        shutil.rmtree(self.directory)
+
+    def process(self, text):
+        path = pathlib.Path(self.directory) / "test.json"
+        path.write_bytes(text.encode("utf-8"))
+        location, result = symbol_cache._process_location(
+            path.as_uri(), [symbol_cache.LinuxIdentifier]
+        )
+        self.assertEqual(location, path.as_uri())
+        return result
+
+    def test_chunk_sizes(self):
+        """Documents are read the same however their chunks fall"""
+        for indent in [None, 2]:
+            text = json.dumps(ISF, indent=indent, ensure_ascii=False)
+            expected = (
+                BANNER,
+                "linux",
+                hashlib.sha1(text.encode("utf-8")).hexdigest(),
+                2,
+                2,
+                0,
+                3,
+            )
+            for chunk_size in [1, 2, 3, 7, 64, 0x100000]:
+                with self.subTest(indent=indent, chunk_size=chunk_size):
+                    symbol_cache._JSONStream.chunk_size = chunk_size
+                    self.assertEqual(self.process(text), expected)
+
+    def test_no_identifier(self):
+        isf = dict(ISF, symbols={"init_task": {"address": 1}})
+        result = self.process(json.dumps(isf))
+        self.assertEqual(result[:2], (None, None))
+        self.assertEqual(result[3:], (2, 2, 0, 1))
+
+    def test_invalid(self):
+        symbol_cache._JSONStream.chunk_size = 5
+        for text in [
+            "",
+            "[]",
+            '{"symbols": {"a": 1',
+            '{"symbols": {1: 2}}',
+            '{"enums": {} "symbols": {}}',
+        ]:
+            with self.subTest(text=text):
+                self.assertIsInstance(self.process(text), Exception)
+        self.assertEqual(self.process(' {"symbols": {"a": 1}} \n')[3:], (0, 0, 0, 1))
+
+
+class TestIdentifierCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_path = constants.CACHE_PATH
+        constants.CACHE_PATH = self.directory
+
+    def tearDown(self):
+        constants.CACHE_PATH = self.cache_path
+        shutil.rmtree(self.directory)
+
+    def test_reused(self):
+        cache = intermed.IntermediateSymbolTable._identifier_cache()
+        self.assertIsInstance(cache, symbol_cache.SqliteCache)
+        self.assertIs(intermed.IntermediateSymbolTable._identifier_cache(), cache)
+
+        # Other threads open their own, as connections can't be shared between them
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            other = executor.submit(
+                intermed.IntermediateSymbolTable._identifier_cache
+            ).result()
+        self.assertIsNot(other, cache)
+
+        constants.CACHE_PATH = os.path.join(self.directory, "other")
+        os.mkdir(constants.CACHE_PATH)
+        self.assertIsNot(intermed.IntermediateSymbolTable._identifier_cache(), cache)
+
+    def test_interface_defaults(self):
+        """Cache managers written before hashes and validations were tracked
+        still work"""
+
+        class MinimalCache(symbol_cache.CacheManagerInterface):
+            _required_framework_version = (2, 0, 0)
+
+            def add_identifier(self, location, operating_system, identifier):
+                pass
+
+            def find_location(self, identifier, operating_system):
+                return None
+
+            def get_local_locations(self):
+                return []
+
+            def update(self):
+                pass
+
+            def get_identifier_dictionary(
+                self, operating_system=None, local_only=False
+            ):
+                return {}
+
+            def get_identifier(self, location):
+                return None
+
+            def get_identifiers(self, operating_system):
+                return []
+
+            def get_location_statistics(self, location):
+                return None
+
+        cache = MinimalCache(os.path.join(self.directory, "minimal.cache"))
+        self.assertIsNone(cache.get_hash("file:///test.json"))
+        self.assertIsNone(cache.get_validation("abc"))
+        cache.add_validation("abc", True)
+        self.assertIsNone(cache.get_validation("abc"))
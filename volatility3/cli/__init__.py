@@ -33,7 +33,7 @@ from volatility3.cli import text_filter
 import volatility3.plugins
 import volatility3.symbols
 from volatility3 import framework
-from volatility3.cli import text_renderer, volargparse
+from volatility3.cli import plugin_manifest, session, text_renderer, volargparse
 from volatility3.framework import (
     automagic,
     configuration,
@@ -90,6 +90,9 @@ class CommandLine:
 
     CLI_NAME = os.path.basename(sys.argv[0])  # vol or volatility
 
+    forward_to_session = True
+    """Whether runs with the --session argument are sent to a session server"""
+
     def __init__(self):
         self.setup_logging()
         self.output_dir = None
@@ -100,9 +103,9 @@ class CommandLine:
         rootlog.setLevel(1)
         rootlog.addHandler(console)
 
-    def run(self):
-        """Executes the command line module, taking the system arguments,
-        determining the plugin to run and then running it."""
+    def run(self, argv: Optional[List[str]] = None):
+        """Executes the command line module, taking the system arguments (or
+        those provided), determining the plugin to run and then running it."""
 
         volatility3.framework.require_interface_version(2, 0, 0)
 
@@ -233,6 +236,25 @@ class CommandLine:
             default=constants.CACHE_PATH,
             type=str,
         )
+        parser.add_argument(
+            "--persist-layer-cache",
+            help="Store data derived from the image (such as page translations and segment indexes) in the cache to speed up later runs",
+            default=False,
+            action="store_true",
+        )
+        parser.add_argument(
+            "--background-validation",
+            help="Validate symbol files that have not been validated before in the background, rather than before they are used",
+            default=False,
+            action="store_true",
+        )
+        parser.add_argument(
+            "--session",
+            metavar="ADDRESS",
+            help="Run the plugin in the session server (started with volsession) listening at ADDRESS",
+            default=None,
+            type=str,
+        )
         isf_group = parser.add_mutually_exclusive_group()
         isf_group.add_argument(
             "--offline",
@@ -267,9 +289,21 @@ class CommandLine:
 
         # We have to filter out help, otherwise parse_known_args will trigger the help message before having
         # processed the plugin choice or had the plugin subparser added.
-        known_args = [arg for arg in sys.argv if arg != "--help" and arg != "-h"]
+        if argv is None:
+            argv = sys.argv[1:]
+        known_args = [arg for arg in argv if arg != "--help" and arg != "-h"]
         partial_args, _ = parser.parse_known_args(known_args)
 
+        if partial_args.session and self.forward_to_session:
+            try:
+                sys.exit(
+                    session.SessionClient(partial_args.session).run(self.CLI_NAME, argv)
+                )
+            except (OSError, ValueError) as excp:
+                parser.error(
+                    f"Unable to reach the session server at {partial_args.session}: {excp}"
+                )
+
         banner_output = sys.stdout
         if renderers[partial_args.renderer].structured_output:
             banner_output = sys.stderr
@@ -326,16 +360,24 @@ class CommandLine:
         if partial_args.clear_cache:
             framework.clear_cache()
 
+        if partial_args.persist_layer_cache:
+            constants.PERSISTENT_LAYER_CACHE = True
+
+        if partial_args.background_validation:
+            constants.BACKGROUND_ISF_VALIDATION = True
+
         if partial_args.offline:
             constants.OFFLINE = partial_args.offline
         elif partial_args.remote_isf_url:
             constants.REMOTE_ISF_URL = partial_args.remote_isf_url
 
         # Do the initialization
-        ctx = contexts.Context()  # Construct a blank context
-        failures = framework.import_files(
-            volatility3.plugins, True
-        )  # Will not log as console's default level is WARNING
+        ctx = self.construct_context(partial_args)
+        manifest = plugin_manifest.load(volatility3.plugins.__path__)
+        if manifest is None:
+            # Will not log as console's default level is WARNING
+            manifest = plugin_manifest.build(volatility3.plugins)
+        failures = manifest["failures"]
         if failures:
             parser.epilog = (
                 "The following plugins could not be loaded (use -vv to see why): "
@@ -344,8 +386,6 @@ class CommandLine:
             vollog.info(parser.epilog)
         automagics = automagic.available(ctx)
 
-        plugin_list = framework.list_plugins()
-
         seen_automagics = set()
         chosen_configurables_list = {}
         for amagic in automagics:
@@ -362,14 +402,41 @@ class CommandLine:
             action=volargparse.HelpfulSubparserAction,
             metavar="PLUGIN",
         )
-        for plugin in sorted(plugin_list):
-            plugin_parser = subparser.add_parser(
-                plugin,
-                help=plugin_list[plugin].__doc__,
-                description=plugin_list[plugin].__doc__,
-                epilog=plugin_list[plugin].additional_description,
+        plugin_parsers = {}
+        for plugin_name in sorted(manifest["plugins"]):
+            entry = manifest["plugins"][plugin_name]
+            plugin_parsers[plugin_name] = subparser.add_parser(
+                plugin_name,
+                help=entry["description"],
+                description=entry["description"],
+                epilog=entry["additional_description"],
             )
-            self.populate_requirements_argparse(plugin_parser, plugin_list[plugin])
+
+        # Only the chosen plugin is imported and has its arguments added, unless the
+        # arguments of every plugin are needed for autocompletion
+        if HAS_ARGCOMPLETE and "_ARGCOMPLETE" in os.environ:
+            for plugin_name, plugin_parser in plugin_parsers.items():
+                arguments = manifest["plugins"][plugin_name]["arguments"]
+                if arguments is None:
+                    arguments = plugin_manifest.requirement_arguments(
+                        plugin_manifest.load_plugin(manifest, plugin_name)
+                    )
+                self.add_requirement_arguments(plugin_parser, arguments)
+            chosen_plugin = None
+        else:
+            chosen_plugin = parser.parse_known_args(known_args)[0].plugin
+        plugin = None
+        if chosen_plugin is not None:
+            try:
+                plugin = plugin_manifest.load_plugin(manifest, chosen_plugin)
+            except ImportError:
+                # The plugin has changed since the manifest was built, so load them all
+                vollog.debug(f"Plugin {chosen_plugin} could not be loaded alone")
+                manifest = plugin_manifest.build(volatility3.plugins)
+                plugin = framework.list_plugins().get(chosen_plugin, None)
+                if plugin is None:
+                    parser.error(f"Plugin {chosen_plugin} could not be loaded")
+            self.populate_requirements_argparse(plugin_parsers[chosen_plugin], plugin)
 
         ###
         # PASS TO UI
@@ -381,8 +448,8 @@ class CommandLine:
             # The autocompletion line must be after the partial_arg handling, so that it doesn't trip it
             # before all the plugins have been added
             argcomplete.autocomplete(parser)
-        args = parser.parse_args()
-        if args.plugin is None:
+        args = parser.parse_args(argv)
+        if args.plugin is None or plugin is None:
             parser.error(
                 f"Please select a plugin to run (see '{self.CLI_NAME} --help' for options"
             )
@@ -391,7 +458,6 @@ class CommandLine:
             constants.LOGLEVEL_VVV, f"Cache directory used: {constants.CACHE_PATH}"
         )
 
-        plugin = plugin_list[args.plugin]
         chosen_configurables_list[args.plugin] = plugin
         base_config_path = "plugins"
         plugin_config_path = interfaces.configuration.path_join(
@@ -503,6 +569,16 @@ class CommandLine:
         except exceptions.VolatilityException as excp:
             self.process_exceptions(excp)
 
+    def construct_context(
+        self, partial_args: argparse.Namespace
+    ) -> interfaces.context.ContextInterface:
+        """Returns the context that the chosen plugin will be run in.
+
+        Args:
+            partial_args: The general (rather than plugin specific) arguments
+        """
+        return contexts.Context()  # Construct a blank context
+
     @classmethod
     def location_from_file(cls, filename: str) -> str:
         """Returns the URL location from a file parameter (which may be a URL)
@@ -852,54 +928,40 @@ class CommandLine:
             parser: The parser to add the plugin's (simple) requirements to
             configurable: The plugin object to pull the requirements from
         """
-        if not issubclass(configurable, interfaces.configuration.ConfigurableInterface):
-            raise TypeError(
-                f"Expected ConfigurableInterface type, not: {type(configurable)}"
-            )
+        self.add_requirement_arguments(
+            parser, plugin_manifest.requirement_arguments(configurable)
+        )
 
-        # Construct an argparse group
+    def add_requirement_arguments(
+        self,
+        parser: Union[argparse.ArgumentParser, argparse._ArgumentGroup],
+        arguments: List[Dict[str, Any]],
+    ):
+        """Adds the described requirement arguments to the provided parser.
 
-        for requirement in configurable.get_requirements():
+        Args:
+            parser: The parser to add the arguments to
+            arguments: The descriptions of the arguments to add
+        """
+        for argument in arguments:
             additional: Dict[str, Any] = {}
-            if not isinstance(
-                requirement, interfaces.configuration.RequirementInterface
-            ):
-                raise TypeError(
-                    f"Plugin contains requirements that are not RequirementInterfaces: {configurable.__name__}"
-                )
-            if isinstance(requirement, interfaces.configuration.SimpleTypeRequirement):
-                additional["type"] = requirement.instance_type
-                if isinstance(requirement, requirements.IntRequirement):
-                    additional["type"] = lambda x: int(x, 0)
-                if isinstance(requirement, requirements.BooleanRequirement):
-                    additional["action"] = "store_true"
-                    if "type" in additional:
-                        del additional["type"]
-            elif isinstance(
-                requirement,
-                volatility3.framework.configuration.requirements.ListRequirement,
-            ):
-                # Allow a list of integers, specified with the convenient 0x hexadecimal format
-                if requirement.element_type is int:
-                    additional["type"] = lambda x: int(x, 0)
-                else:
-                    additional["type"] = requirement.element_type
-                nargs = "*" if requirement.optional else "+"
-                additional["nargs"] = nargs
-            elif isinstance(
-                requirement,
-                volatility3.framework.configuration.requirements.ChoiceRequirement,
-            ):
-                additional["type"] = str
-                additional["choices"] = requirement.choices
-            else:
-                continue
+            if argument["type"] == "int":
+                # Allow integers, specified with the convenient 0x hexadecimal format
+                additional["type"] = lambda x: int(x, 0)
+            elif argument["type"] is not None:
+                additional["type"] = plugin_manifest.ARGUMENT_TYPES[argument["type"]]
+            if argument["kind"] == "flag":
+                additional["action"] = "store_true"
+            elif argument["kind"] == "list":
+                additional["nargs"] = "*" if argument["optional"] else "+"
+            elif argument["kind"] == "choice":
+                additional["choices"] = argument["choices"]
             parser.add_argument(
-                "--" + requirement.name.replace("_", "-"),
-                help=requirement.description,
-                default=requirement.default,
-                dest=requirement.name,
-                required=not requirement.optional,
+                "--" + argument["name"].replace("_", "-"),
+                help=argument["description"],
+                default=argument["default"],
+                dest=argument["name"],
+                required=not argument["optional"],
                 **additional,
             )
 
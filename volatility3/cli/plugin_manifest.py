@@ -0,0 +1,228 @@
+# This file is Copyright 2026 Volatility Foundation and licensed under the Volatility Software License 1.0
+# which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
+#
+"""A cached manifest of the available plugins, for fast command line startup.
+
+Importing every plugin (and the libraries they depend on) and building the
+command line arguments of each of them takes seconds, even though only one
+plugin is run.  The manifest records the name, module, description, version
+and command line arguments of each plugin, so that the command line can list
+the plugins and then import only the one that was chosen.
+
+The manifest is rebuilt whenever the files in the plugin directories, or the
+directories on the python path (where the plugins' dependencies are
+installed), change.
+"""
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import zipfile
+from typing import Any, Dict, List, Optional, Type
+
+from volatility3 import framework
+from volatility3.framework import constants, interfaces
+from volatility3.framework.configuration import requirements
+
+vollog = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+"""The version of the manifest layout"""
+
+ARGUMENT_TYPES = {"int": int, "bool": bool, "bytes": bytes, "str": str}
+"""The types that command line arguments can be converted to"""
+
+
+def requirement_arguments(
+    configurable: Type[interfaces.configuration.ConfigurableInterface],
+) -> List[Dict[str, Any]]:
+    """Describes the command line arguments for the simple requirements of a
+    configurable.
+
+    Args:
+        configurable: The configurable to describe the requirements of
+
+    Returns:
+        A list of argument descriptions, each with the name, description,
+        default and whether the argument is optional, along with the kind of
+        argument (simple, flag, list or choice), the name of its type and
+        any choices
+    """
+    if not issubclass(configurable, interfaces.configuration.ConfigurableInterface):
+        raise TypeError(
+            f"Expected ConfigurableInterface type, not: {type(configurable)}"
+        )
+
+    arguments = []
+    for requirement in configurable.get_requirements():
+        if not isinstance(requirement, interfaces.configuration.RequirementInterface):
+            raise TypeError(
+                f"Plugin contains requirements that are not RequirementInterfaces: {configurable.__name__}"
+            )
+        argument = {
+            "name": requirement.name,
+            "description": requirement.description,
+            "default": requirement.default,
+            "optional": requirement.optional,
+        }
+        if isinstance(requirement, requirements.BooleanRequirement):
+            argument.update(kind="flag", type=None)
+        elif isinstance(requirement, interfaces.configuration.SimpleTypeRequirement):
+            argument.update(kind="simple", type=requirement.instance_type.__name__)
+            if isinstance(requirement, requirements.IntRequirement):
+                argument.update(type="int")
+        elif isinstance(requirement, requirements.ListRequirement):
+            argument.update(kind="list", type=requirement.element_type.__name__)
+        elif isinstance(requirement, requirements.ChoiceRequirement):
+            argument.update(kind="choice", type="str", choices=requirement.choices)
+        else:
+            continue
+        if argument["type"] is not None and argument["type"] not in ARGUMENT_TYPES:
+            raise TypeError(
+                f"Unsupported type for requirement {requirement.name}: {argument['type']}"
+            )
+        arguments.append(argument)
+    return arguments
+
+
+def plugin_files_signature(paths: List[str]) -> Optional[str]:
+    """Returns a signature of the plugin files within a set of paths, or None
+    if a manifest cannot be used for them (because plugins are loaded from
+    zip files, which the manifest does not track)."""
+    signature = hashlib.sha256(
+        f"{MANIFEST_VERSION}-{constants.PACKAGE_VERSION}-{sys.version}".encode()
+    )
+    for path in paths:
+        signature.update(f"path:{os.path.abspath(path)}".encode())
+        for root, dirs, files in os.walk(path, followlinks=True):
+            dirs.sort()
+            if root.endswith("__pycache__"):
+                continue
+            for filename in sorted(files):
+                full_path = os.path.join(root, filename)
+                if filename.endswith((".py", ".pyc")) and not filename.startswith("__"):
+                    stat = os.stat(full_path)
+                    signature.update(
+                        f"{full_path}-{stat.st_size}-{stat.st_mtime_ns}".encode()
+                    )
+                elif zipfile.is_zipfile(full_path):
+                    return None
+    # Installing or removing a library changes the directory it was installed into
+    for path in sys.path:
+        try:
+            signature.update(f"{path}-{os.stat(path or '.').st_mtime_ns}".encode())
+        except OSError:
+            continue
+    return signature.hexdigest()
+
+
+def manifest_filename(paths: List[str]) -> str:
+    """Returns the location of the manifest for a set of plugin paths"""
+    identifier = hashlib.sha256(
+        ";".join(os.path.abspath(path) for path in paths).encode()
+    ).hexdigest()
+    return os.path.join(constants.CACHE_PATH, f"plugins_{identifier}.cache")
+
+
+def load(paths: List[str]) -> Optional[Dict[str, Any]]:
+    """Loads the manifest for the plugins within a set of paths, if there is an
+    up to date one
+
+    Args:
+        paths: The paths that plugins are loaded from
+
+    Returns:
+        The manifest, holding the modules that failed to import and the
+        details of each plugin by name, or None
+    """
+    signature = plugin_files_signature(paths)
+    filename = manifest_filename(paths)
+    if signature is None or not os.path.exists(filename):
+        return None
+    try:
+        with open(filename) as fp:
+            manifest = json.load(fp)
+    except (OSError, ValueError) as excp:
+        vollog.debug(f"Unable to load plugin manifest {filename}: {excp}")
+        return None
+    if manifest.get("signature") != signature:
+        return None
+    vollog.debug(f"Loaded plugin manifest from {filename}")
+    return manifest
+
+
+def build(base_module) -> Dict[str, Any]:
+    """Imports all the plugins under a module, and writes out a manifest of
+    them to the cache directory
+
+    Args:
+        base_module: The module that plugins are loaded from
+
+    Returns:
+        The manifest, holding the modules that failed to import and the
+        details of each plugin by name
+    """
+    signature = plugin_files_signature(base_module.__path__)
+    failures = framework.import_files(base_module, True)
+    plugins = {}
+    for plugin_name, plugin in framework.list_plugins().items():
+        try:
+            arguments = requirement_arguments(plugin)
+            json.dumps(arguments)
+        except (TypeError, ValueError) as excp:
+            # The arguments are built from the plugin itself when needed
+            vollog.log(
+                constants.LOGLEVEL_VVVV,
+                f"Unable to record the arguments of {plugin_name}: {excp}",
+            )
+            arguments = None
+        plugins[plugin_name] = {
+            "module": plugin.__module__,
+            "class": plugin.__name__,
+            "description": plugin.__doc__,
+            "additional_description": plugin.additional_description,
+            "version": list(plugin.version),
+            "arguments": arguments,
+        }
+    manifest = {"signature": signature, "failures": failures, "plugins": plugins}
+    if signature is not None:
+        filename = manifest_filename(base_module.__path__)
+        try:
+            with tempfile.NamedTemporaryFile(
+                "w", dir=os.path.dirname(filename), prefix=".plugins_", delete=False
+            ) as fp:
+                json.dump(manifest, fp)
+            os.replace(fp.name, filename)
+        except (OSError, TypeError, ValueError) as excp:
+            vollog.debug(f"Unable to save plugin manifest {filename}: {excp}")
+    return manifest
+
+
+def load_plugin(
+    manifest: Dict[str, Any], plugin_name: str
+) -> Type[interfaces.plugins.PluginInterface]:
+    """Imports a single plugin listed in a manifest
+
+    Args:
+        manifest: The manifest listing the plugin
+        plugin_name: The name of the plugin
+
+    Returns:
+        The plugin class
+
+    Raises:
+        ImportError if the plugin's module or class could not be loaded
+    """
+    entry = manifest["plugins"][plugin_name]
+    module = importlib.import_module(entry["module"])
+    plugin = getattr(module, entry["class"], None)
+    if not isinstance(plugin, type) or not issubclass(
+        plugin, interfaces.plugins.PluginInterface
+    ):
+        raise ImportError(
+            f"Plugin {entry['class']} not found in module {entry['module']}"
+        )
+    return plugin
@@ -0,0 +1,135 @@
+# This file is Copyright 2026 Volatility Foundation and licensed under the Volatility Software License 1.0
+# which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
+#
+"""Runs plugins in a long lived session server, to reuse warm contexts.
+
+Each run of the command line stacks the layers of the image, loads the
+symbol tables and fills the layer caches from scratch.  A session server
+(started with volsession) keeps a context for each image it has been asked
+about, and runs plugins against it, so that plugins run one after another
+against the same image only do that work once.
+
+The command line acts as a thin client when given the --session argument,
+sending the arguments it was run with to the server and writing out the
+rendered output that is streamed back.
+
+Requests and responses are sent as lines of JSON over a unix socket (or a
+TCP socket, when the address is given as host:port).  Anyone able to make
+requests can run plugins as the user running the server, so TCP sockets may
+only listen on a loopback address, unix sockets are only accessible to that
+user, and every request must carry the server's token, which is kept in a file
+in the cache directory that only that user can read.
+"""
+import hashlib
+import ipaddress
+import json
+import os
+import socket
+import sys
+from typing import Any, BinaryIO, Dict, List, Tuple, Union
+
+from volatility3.framework import constants
+
+
+def default_address() -> str:
+    """Returns the address that the session server listens on by default"""
+    if hasattr(socket, "AF_UNIX"):
+        return os.path.join(constants.CACHE_PATH, "session.sock")
+    return "127.0.0.1:5423"
+
+
+def parse_address(address: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    """Determines the socket family and address from a session address
+
+    Args:
+        address: Either host:port for a TCP socket, or the path of a unix socket
+
+    Returns:
+        The socket family and the address in the form that family expects
+
+    Raises:
+        ValueError: If the host of a TCP address is not a loopback address
+    """
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        host = host.strip("[]")
+        if host == "localhost":
+            return socket.AF_INET, ("127.0.0.1", int(port))
+        try:
+            ip_address = ipaddress.ip_address(host)
+        except ValueError:
+            ip_address = None
+        if ip_address is None or not ip_address.is_loopback:
+            raise ValueError(
+                f"Session servers may only listen on a loopback address: {address}"
+            )
+        if ip_address.version == 6:
+            return socket.AF_INET6, (host, int(port))
+        return socket.AF_INET, (host, int(port))
+    if not hasattr(socket, "AF_UNIX"):
+        raise ValueError(f"Unix sockets are not supported, use host:port: {address}")
+    return socket.AF_UNIX, address
+
+
+def token_filename(address: str) -> str:
+    """Returns the path of the file holding the token of the session server
+    listening at an address
+
+    Args:
+        address: Either host:port for a TCP socket, or the path of a unix socket
+    """
+    family, socket_address = parse_address(address)
+    if family == getattr(socket, "AF_UNIX", None):
+        name = os.path.abspath(socket_address)
+    else:
+        host, port = socket_address
+        name = f"{ipaddress.ip_address(host)}:{port}"
+    digest = hashlib.sha256(name.encode()).hexdigest()[:16]
+    return os.path.join(constants.CACHE_PATH, f"session_{digest}.token")
+
+
+def send_message(wfile: BinaryIO, message: Dict[str, Any]) -> None:
+    """Sends a single message to the other end of a session connection"""
+    wfile.write(json.dumps(message).encode() + b"\n")
+    wfile.flush()
+
+
+class SessionClient:
+    """Sends the arguments of a command line run to a session server, and
+    writes out the output it returns."""
+
+    def __init__(self, address: str) -> None:
+        self._address = address
+
+    def run(self, prog: str, argv: List[str]) -> int:
+        """Runs a plugin in the session server
+
+        Args:
+            prog: The name of the command line program
+            argv: The arguments that the command line was run with
+
+        Returns:
+            The exit code of the run
+
+        Raises:
+            OSError: If the server or its token could not be reached
+        """
+        family, address = parse_address(self._address)
+        with open(token_filename(self._address)) as fp:
+            token = fp.read().strip()
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.connect(address)
+            with sock.makefile("rb") as rfile, sock.makefile("wb") as wfile:
+                send_message(
+                    wfile,
+                    {"token": token, "prog": prog, "argv": argv, "cwd": os.getcwd()},
+                )
+                for line in rfile:
+                    message = json.loads(line)
+                    if message["type"] == "exit":
+                        return message["code"]
+                    stream = sys.stderr if message["stream"] == "stderr" else sys.stdout
+                    stream.write(message["data"])
+                    stream.flush()
+        sys.stderr.write("The session server closed the connection\n")
+        return 1
@@ -0,0 +1,538 @@
+# This file is Copyright 2026 Volatility Foundation and licensed under the Volatility Software License 1.0
+# which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
+#
+"""A session server, which keeps a warm context for each image and runs the
+plugins requested by command line clients against it."""
+import argparse
+import contextlib
+import gc
+import hmac
+import inspect
+import io
+import json
+import logging
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Type
+
+import volatility3.plugins
+import volatility3.symbols
+from volatility3 import cli
+from volatility3.cli import session
+from volatility3.framework import constants, contexts, interfaces
+
+vollog = logging.getLogger(__name__)
+
+_RUN_CONSTANTS = [
+    "PARALLELISM",
+    "CACHE_PATH",
+    "PERSISTENT_LAYER_CACHE",
+    "BACKGROUND_ISF_VALIDATION",
+    "OFFLINE",
+    "REMOTE_ISF_URL",
+]
+"""The constants that the command line sets from its arguments, which are
+restored after each run so that they don't carry over to the next"""
+
+
+class SessionStream(io.TextIOBase):
+    """A text stream that sends what is written to it back to the client."""
+
+    encoding = "utf-8"
+
+    def __init__(
+        self,
+        wfile: BinaryIO,
+        stream: str,
+        buffer_size: int = 0,
+        preceding: Optional["SessionStream"] = None,
+    ) -> None:
+        """
+        Args:
+            wfile: The stream connected to the client
+            stream: The name of the client's stream to write to
+            buffer_size: How much output can be held back before it is sent
+            preceding: A stream whose output must be sent before that of this one
+        """
+        super().__init__()
+        self._wfile = wfile
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._preceding = preceding
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+
+    def write(self, data: str) -> int:
+        if self._preceding is not None:
+            self._preceding.flush()
+        with self._lock:
+            self._buffer.append(data)
+            self._buffered += len(data)
+            if self._buffered > self._buffer_size:
+                self._flush()
+        return len(data)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffer:
+            data, self._buffer, self._buffered = "".join(self._buffer), [], 0
+            session.send_message(
+                self._wfile, {"type": "output", "stream": self._stream, "data": data}
+            )
+
+
+class Session:
+    """A context kept for a single image, along with the configuration of
+    the layers, symbol tables and modules that plugins have been run with."""
+
+    def __init__(self, key: Tuple[str, int, int]) -> None:
+        self.key = key
+        self.context = contexts.Context()
+        self.last_used = time.monotonic()
+        self.plugin: Optional[Tuple[Type[interfaces.plugins.PluginInterface], str]] = (
+            None
+        )
+        self._requirements: Dict[Tuple[str, str, str], Tuple[Any, Any]] = {}
+
+    @staticmethod
+    def _requirement_key(
+        plugin: Type[interfaces.plugins.PluginInterface],
+        requirement: interfaces.configuration.RequirementInterface,
+    ) -> Tuple[str, str, str]:
+        # Plugins for one operating system should not pick up the kernel of another
+        module = plugin.__module__.split(".")
+        family = module[2] if len(module) > 3 else ""
+        return family, requirement.name, requirement.__class__.__name__
+
+    def _constructable_requirements(
+        self, plugin: Type[interfaces.plugins.PluginInterface]
+    ) -> List[interfaces.configuration.RequirementInterface]:
+        return [
+            requirement
+            for requirement in plugin.get_requirements()
+            if isinstance(
+                requirement, interfaces.configuration.ConstructableRequirementInterface
+            )
+        ]
+
+    def prepare(
+        self, plugin: Type[interfaces.plugins.PluginInterface], config_path: str
+    ) -> None:
+        """Configures a plugin's layer, symbol table and module requirements
+        with those constructed for earlier plugins, where they have not been
+        configured already."""
+        config = self.context.config
+        for requirement in self._constructable_requirements(plugin):
+            key = self._requirement_key(plugin, requirement)
+            recorded = self._requirements.get(key)
+            path = interfaces.configuration.path_join(config_path, requirement.name)
+            if recorded is None or path in config:
+                continue
+            value, branch = recorded
+            config[path] = value
+            config.splice(path, branch.clone())
+        self.plugin = plugin, config_path
+
+    def record(self) -> None:
+        """Records the layer, symbol table and module requirements of the last
+        plugin run, so that later plugins can reuse them."""
+        if self.plugin is None:
+            return None
+        plugin, config_path = self.plugin
+        config = self.context.config
+        for requirement in self._constructable_requirements(plugin):
+            path = interfaces.configuration.path_join(config_path, requirement.name)
+            if path not in config:
+                continue
+            if requirement.unsatisfied(self.context, config_path):
+                continue
+            self._requirements[self._requirement_key(plugin, requirement)] = (
+                config[path],
+                config.branch(path).clone(),
+            )
+
+    def destroy(self) -> None:
+        """Closes the resources held by the layers of the context"""
+        for layer_name in list(self.context.layers):
+            self.context.layers[layer_name].destroy()
+
+
+class SessionCommandLine(cli.CommandLine):
+    """A command line that runs plugins in the session for their image."""
+
+    forward_to_session = False
+
+    def __init__(self, server: "SessionServer", prog: str) -> None:
+        super().__init__()
+        self.CLI_NAME = prog
+        self._server = server
+        self.session: Optional[Session] = None
+
+    def construct_context(
+        self, partial_args: argparse.Namespace
+    ) -> interfaces.context.ContextInterface:
+        self.session = self._server.get_session(partial_args.file)
+        if self.session is None:
+            return super().construct_context(partial_args)
+        # Only the configuration constructed by automagic is kept between plugin runs
+        self.session.context.config.splice(
+            "plugins", interfaces.configuration.HierarchicalDict()
+        )
+        return self.session.context
+
+    def populate_config(
+        self,
+        context: interfaces.context.ContextInterface,
+        configurables_list: Dict[
+            str, Type[interfaces.configuration.ConfigurableInterface]
+        ],
+        args: argparse.Namespace,
+        plugin_config_path: str,
+    ) -> None:
+        if self.session is not None:
+            for configurable in configurables_list.values():
+                if inspect.isclass(configurable) and issubclass(
+                    configurable, interfaces.plugins.PluginInterface
+                ):
+                    self.session.prepare(configurable, plugin_config_path)
+        super().populate_config(context, configurables_list, args, plugin_config_path)
+
+
+class SessionRequestHandler(socketserver.StreamRequestHandler):
+    """Handles a single plugin run requested by a client"""
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return None
+        if not self.server.session_server.authenticate(request):
+            with contextlib.suppress(OSError):
+                session.send_message(
+                    self.wfile,
+                    {
+                        "type": "output",
+                        "stream": "stderr",
+                        "data": "The session server did not accept the request's token\n",
+                    },
+                )
+                session.send_message(self.wfile, {"type": "exit", "code": 1})
+            return None
+        code = self.server.session_server.run_request(request, self.wfile)
+        with contextlib.suppress(OSError):
+            session.send_message(self.wfile, {"type": "exit", "code": code})
+
+
+class _SessionTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+
+class _SessionTCP6Server(_SessionTCPServer):
+    address_family = socket.AF_INET6
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+
+    class _SessionUnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class SessionServer:
+    """Listens for plugin runs from command line clients, and runs them one at
+    a time in a warm context for the image they were run against.
+
+    Sessions that have not been used for idle_timeout seconds are evicted, as
+    are the least recently used sessions whilst the server's memory use is
+    above max_memory bytes (where the memory use can be determined).
+
+    Requests are only run if they carry the token that the server writes to
+    a file in the cache directory that only the user running it can read.
+    """
+
+    check_interval = 30
+
+    def __init__(
+        self, address: str, idle_timeout: int, max_memory: Optional[int] = None
+    ) -> None:
+        self._address = address
+        self._idle_timeout = idle_timeout
+        self._max_memory = max_memory
+        self._sessions: Dict[Tuple[str, int, int], Session] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        family, socket_address = session.parse_address(address)
+        umask = None
+        if family == socket.AF_INET:
+            server_class: Type[socketserver.BaseServer] = _SessionTCPServer
+        elif family == socket.AF_INET6:
+            server_class = _SessionTCP6Server
+        else:
+            server_class = _SessionUnixServer
+            self._remove_stale_socket(socket_address)
+            # Bind under a umask that keeps other users from ever connecting
+            umask = os.umask(0o077)
+        try:
+            self._server = server_class(socket_address, SessionRequestHandler)
+        finally:
+            if umask is not None:
+                os.umask(umask)
+        self._server.session_server = self
+
+        if family == socket.AF_INET6:
+            address = "[{}]:{}".format(*self._server.server_address[:2])
+        elif family == socket.AF_INET:
+            address = "{}:{}".format(*self._server.server_address)
+        self._token_filename = session.token_filename(address)
+        try:
+            self._token = self._write_token(self._token_filename)
+        except OSError:
+            self._server.server_close()
+            if umask is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(socket_address)
+            raise
+
+    @staticmethod
+    def _write_token(filename: str) -> str:
+        """Writes a new token to a file that only the current user can read"""
+        token = secrets.token_hex(32)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(filename)
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as fp:
+            fp.write(token)
+        return token
+
+    def authenticate(self, request: Any) -> bool:
+        """Returns whether a request carries the server's token"""
+        if not isinstance(request, dict) or not isinstance(request.get("token"), str):
+            return False
+        return hmac.compare_digest(request["token"].encode(), self._token.encode())
+
+    @staticmethod
+    def _remove_stale_socket(path: str) -> None:
+        if not os.path.exists(path):
+            return None
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(path)
+            except OSError:
+                os.unlink(path)
+                return None
+        raise OSError(f"A session server is already listening at {path}")
+
+    def serve_forever(self) -> None:
+        """Serves requests until interrupted"""
+        evictor = threading.Thread(target=self._evict_sessions, daemon=True)
+        evictor.start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._stop.set()
+            self._server.server_close()
+            with self._lock:
+                for key in list(self._sessions):
+                    self._evict(key)
+            with contextlib.suppress(OSError):
+                os.unlink(self._token_filename)
+            family, socket_address = session.parse_address(self._address)
+            if family not in (socket.AF_INET, socket.AF_INET6):
+                with contextlib.suppress(OSError):
+                    os.unlink(socket_address)
+
+    @property
+    def server_address(self) -> Any:
+        """The address that the server is listening on"""
+        return self._server.server_address
+
+    def shutdown(self) -> None:
+        """Stops serve_forever, from another thread"""
+        self._server.shutdown()
+
+    def get_session(self, filename: Optional[str]) -> Optional[Session]:
+        """Returns the session for an image file, creating it if necessary
+
+        Args:
+            filename: The path of the image, relative to the current directory
+
+        Returns:
+            The session, or None if the filename does not refer to a file
+        """
+        if not filename:
+            return None
+        try:
+            path = os.path.abspath(filename)
+            stat = os.stat(path)
+        except OSError:
+            return None
+        # A modified image must not be read through the caches of the old one
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        if key not in self._sessions:
+            vollog.info(f"Starting session for {path}")
+            self._sessions[key] = Session(key)
+        self._sessions[key].last_used = time.monotonic()
+        return self._sessions[key]
+
+    def run_request(self, request: Dict[str, Any], wfile: BinaryIO) -> int:
+        """Runs the command line requested by a client, sending its output
+        back as it is produced
+
+        Args:
+            request: The program name, arguments and working directory of the client
+            wfile: The stream connected to the client
+
+        Returns:
+            The exit code of the run
+        """
+        stdout = SessionStream(wfile, "stdout", 0x4000)
+        stderr = SessionStream(wfile, "stderr", preceding=stdout)
+        with self._lock:
+            command_line = SessionCommandLine(self, request.get("prog", "vol"))
+            handlers = list(logging.getLogger().handlers)
+            cwd = os.getcwd()
+            console_stream = cli.console.setStream(stderr)
+            console_level = cli.console.level
+            # The command line sets these from its arguments, for the whole process
+            run_constants = {name: getattr(constants, name) for name in _RUN_CONSTANTS}
+            plugins_path = volatility3.plugins.__path__
+            symbols_path = volatility3.symbols.__path__
+            tracebacklimit = getattr(sys, "tracebacklimit", None)
+            code = 0
+            try:
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(
+                    stderr
+                ):
+                    try:
+                        os.chdir(request["cwd"])
+                        command_line.run(request["argv"])
+                    except SystemExit as excp:
+                        if isinstance(excp.code, int):
+                            code = excp.code
+                        elif excp.code is not None:
+                            stderr.write(f"{excp.code}\n")
+                            code = 1
+                    except Exception:
+                        stderr.write(traceback.format_exc())
+                        code = 1
+                    finally:
+                        if command_line.session is not None:
+                            command_line.session.record()
+                            command_line.session.last_used = time.monotonic()
+                        with contextlib.suppress(OSError):
+                            stdout.flush()
+                            stderr.flush()
+            finally:
+                os.chdir(cwd)
+                cli.console.setStream(console_stream)
+                cli.console.setLevel(console_level)
+                for name, value in run_constants.items():
+                    setattr(constants, name, value)
+                volatility3.plugins.__path__ = plugins_path
+                volatility3.symbols.__path__ = symbols_path
+                if tracebacklimit is None:
+                    with contextlib.suppress(AttributeError):
+                        del sys.tracebacklimit
+                else:
+                    sys.tracebacklimit = tracebacklimit
+                # Drop any log files opened for this run
+                for handler in logging.getLogger().handlers:
+                    if handler not in handlers:
+                        logging.getLogger().removeHandler(handler)
+                        handler.close()
+        return code
+
+    def _evict(self, key: Tuple[str, int, int]) -> None:
+        vollog.info(f"Evicting session for {key[0]}")
+        self._sessions.pop(key).destroy()
+        gc.collect()
+
+    def _evict_sessions(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            with self._lock:
+                now = time.monotonic()
+                for key, value in list(self._sessions.items()):
+                    if now - value.last_used > self._idle_timeout:
+                        self._evict(key)
+                if self._max_memory:
+                    # The memory freed may not be returned to the system straight away,
+                    # so evict one session per check
+                    memory_use = _memory_use()
+                    if memory_use is not None and memory_use > self._max_memory:
+                        if self._sessions:
+                            self._evict(
+                                min(
+                                    self._sessions,
+                                    key=lambda key: self._sessions[key].last_used,
+                                )
+                            )
+
+
+def _memory_use() -> Optional[int]:
+    """Returns the resident memory of the process, where it can be determined"""
+    try:
+        with open("/proc/self/statm") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def main():
+    """Starts a session server, listening for command line clients."""
+    parser = argparse.ArgumentParser(
+        description="A session server that keeps images loaded between plugin runs"
+    )
+    parser.add_argument(
+        "address",
+        nargs="?",
+        default=session.default_address(),
+        help="The path of the unix socket, or loopback host:port, to listen on (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        help="Seconds after which an unused session is evicted",
+        default=1800,
+        type=int,
+    )
+    parser.add_argument(
+        "--max-memory",
+        help="Memory use (in MB) above which the least recently used sessions are evicted",
+        default=None,
+        type=int,
+    )
+    parser.add_argument(
+        "-v",
+        "--verbosity",
+        help="Increase output verbosity",
+        default=0,
+        action="count",
+    )
+    args = parser.parse_args()
+    cli.CommandLine.setup_logging()
+    cli.console.setLevel(logging.WARNING - min(args.verbosity, 3) * 10)
+
+    try:
+        server = SessionServer(
+            args.address,
+            args.idle_timeout,
+            args.max_memory * 1024 * 1024 if args.max_memory else None,
+        )
+    except (OSError, ValueError) as excp:
+        parser.error(f"Unable to listen at {args.address}: {excp}")
+    sys.stdout.write(
+        f"Volatility 3 session server {constants.PACKAGE_VERSION} listening at {args.address}\n"
+        f"Run plugins with: vol --session {args.address} -f <image> <plugin>\n"
+    )
+    sys.stdout.flush()
+    with contextlib.suppress(KeyboardInterrupt):
+        server.serve_forever()
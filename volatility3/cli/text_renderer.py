@@ -229,7 +229,7 @@ class QuickTextRenderer(CLIRenderer):
             return accumulator
 
         if not grid.populated:
-            grid.populate(visitor, outfd)
+            grid.populate(visitor, outfd, retain=False)
         else:
             grid.visit(node=None, function=visitor, initial_accumulator=outfd)
 
@@ -246,7 +246,7 @@ class NoneRenderer(CLIRenderer):
 
     def render(self, grid: interfaces.renderers.TreeGrid) -> None:
         if not grid.populated:
-            grid.populate(lambda x, y: True, True)
+            grid.populate(lambda x, y: True, True, retain=False)
 
 
 class CSVRenderer(CLIRenderer):
@@ -308,7 +308,7 @@ class CSVRenderer(CLIRenderer):
             return accumulator
 
         if not grid.populated:
-            grid.populate(visitor, writer)
+            grid.populate(visitor, writer, retain=False)
         else:
             grid.visit(node=None, function=visitor, initial_accumulator=writer)
 
@@ -461,6 +461,9 @@ class JsonRenderer(CLIRenderer):
 
     name = "JSON"
     structured_output = True
+    streaming = False
+    """Whether each top level row (and its descendants) is output as soon as
+    it is complete, rather than once all rows have been produced"""
 
     def get_render_options(self) -> List[interfaces.renderers.RenderOption]:
         pass
@@ -503,16 +506,21 @@ class JsonRenderer(CLIRenderer):
             if self.filter and self.filter.filter(line):
                 return accumulator
 
-            if node.parent:
+            if node.parent is not None:
                 acc_map[node.parent.path]["__children"].append(node_dict)
             else:
+                if self.streaming and final_tree:
+                    # The previous top level row can have no further descendants
+                    self.output_result(outfd, final_tree)
+                    final_tree.clear()
+                    acc_map.clear()
                 final_tree.append(node_dict)
             acc_map[node.path] = node_dict
 
             return (acc_map, final_tree)
 
         if not grid.populated:
-            grid.populate(visitor, final_output)
+            grid.populate(visitor, final_output, retain=not self.streaming)
         else:
             grid.visit(node=None, function=visitor, initial_accumulator=final_output)
 
@@ -521,6 +529,7 @@ class JsonRenderer(CLIRenderer):
 
 class JsonLinesRenderer(JsonRenderer):
     name = "JSONL"
+    streaming = True
 
     def output_result(self, outfd, result):
         """Outputs the JSON results as JSON lines"""
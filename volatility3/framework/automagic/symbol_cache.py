@@ -2,22 +2,38 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 import base64
+import codecs
 import datetime
+import functools
 import json
 import logging
+import multiprocessing
 import os
+import re
 import sqlite3
 import urllib
 import urllib.parse
 import urllib.request
 from abc import abstractmethod
-from typing import Dict, Generator, Iterable, List, Optional, Tuple
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
 from volatility3 import framework, schemas
 from volatility3.framework import constants, interfaces
 from volatility3.framework.configuration import requirements
 from volatility3.framework.layers import resources
-from volatility3.framework.symbols import intermed
+from volatility3.framework.symbols import compiled, intermed
 
 vollog = logging.getLogger(__name__)
 
@@ -93,6 +109,160 @@ class LinuxIdentifier(IdentifierProcessor):
         return None
 
 
+_json_decoder = json.JSONDecoder()
+_json_whitespace = re.compile(r"[ \t\n\r]*")
+
+_COUNTED_SECTIONS = ["base_types", "user_types", "enums", "symbols"]
+"""The sections of an ISF whose entries are counted for the cache"""
+
+
+class _JSONStream:
+    """Decodes the values of a JSON document one at a time, reading the file
+    a chunk at a time so that only a bounded amount of it is held in memory.
+
+    The raw contents are hashed as they are read.
+    """
+
+    chunk_size = 0x100000
+
+    def __init__(self, fp: IO[bytes]) -> None:
+        self._fp = fp
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._hasher = schemas.content_hasher()
+        self._text = ""
+        self._index = 0
+        self._eof = False
+
+    def _read(self, size: int) -> bool:
+        """Adds up to size more bytes of the file to the buffer, dropping the
+        text that has already been consumed, and returns whether there was
+        anything left to read."""
+        if self._eof:
+            return False
+        data = self._fp.read(size)
+        self._hasher.update(data)
+        self._eof = not data
+        self._text = self._text[self._index :] + self._decoder.decode(
+            data, final=self._eof
+        )
+        self._index = 0
+        return not self._eof
+
+    def peek(self) -> str:
+        """Returns the next character that isn't whitespace, or an empty
+        string at the end of the document."""
+        while True:
+            self._index = _json_whitespace.match(self._text, self._index).end()
+            if self._index < len(self._text) or not self._read(self.chunk_size):
+                return self._text[self._index : self._index + 1]
+
+    def expect(self, characters: str) -> str:
+        """Consumes the next character, which must be one of characters."""
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f"Expected one of {characters} in JSON document")
+        self._index += 1
+        return character
+
+    def decode(self) -> Any:
+        """Decodes the next value in the document."""
+        self.peek()
+        while True:
+            try:
+                value, end = _json_decoder.raw_decode(self._text, self._index)
+                # A value at the end of the buffer may continue in the file
+                if end < len(self._text) or self._eof:
+                    self._index = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._read(max(self.chunk_size, len(self._text) - self._index))
+
+    def hexdigest(self) -> str:
+        """Returns the hash of the contents of the whole file."""
+        while self._read(self.chunk_size):
+            self._text = ""
+        return self._hasher.hexdigest()
+
+
+def _scan_json_object(stream: _JSONStream, member: Callable[[str], None]) -> None:
+    """Walks the members of the next JSON object in a stream, without
+    decoding them
+
+    Args:
+        stream: The JSON document
+        member: Called with the name of each member, which must consume its value
+    """
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.expect("}")
+        return None
+    while True:
+        name = stream.decode()
+        if not isinstance(name, str):
+            raise ValueError("Expected a JSON object member name")
+        stream.expect(":")
+        member(name)
+        if stream.expect(",}") == "}":
+            return None
+
+
+def _process_location(
+    location: str, idextractors: List[Type[IdentifierProcessor]]
+) -> Tuple[str, Union[Tuple, Exception]]:
+    """Reads a single ISF file and returns only the values the cache stores
+    for it.
+
+    The file is read a chunk at a time and the large sections are walked
+    one entry at a time, keeping only the symbols with constant data (from
+    which the identifiers are drawn), so that neither the file nor the
+    document is ever held in memory at once.  Each file is still parsed in
+    full, which is why files are processed across a pool.
+
+    Returns:
+        The location and either a tuple of identifier, operating system,
+        hash, base_types, types, enums and symbols, or the exception
+        raised while processing it
+    """
+    try:
+        json_obj: Dict[str, Any] = {}
+        counts = dict.fromkeys(_COUNTED_SECTIONS, 0)
+
+        with resources.ResourceAccessor().open(location) as fp:
+            stream = _JSONStream(fp)
+
+            def document_member(name: str) -> None:
+                if name not in counts:
+                    json_obj[name] = stream.decode()
+                    return None
+                kept = json_obj[name] = {}
+
+                def section_member(entry_name: str) -> None:
+                    counts[name] += 1
+                    value = stream.decode()
+                    if isinstance(value, dict) and "constant_data" in value:
+                        kept[entry_name] = value
+
+                _scan_json_object(stream, section_member)
+
+            _scan_json_object(stream, document_member)
+            hash = stream.hexdigest()
+
+        operating_system = identifier = None
+        for idextractor in idextractors:
+            identifier = idextractor.get_identifier(json_obj)
+            if identifier is not None:
+                operating_system = idextractor.operating_system
+                break
+
+        return location, (identifier, operating_system, hash) + tuple(
+            counts[section] for section in _COUNTED_SECTIONS
+        )
+    except Exception as excp:
+        return location, excp
+
+
 ### CacheManagers
 
 
@@ -165,14 +335,26 @@ class CacheManagerInterface(interfaces.configuration.VersionableInterface):
             A tuple of base_types, types, enums, symbols, or None is location not found
         """
 
-    @abstractmethod
     def get_hash(self, location: str) -> Optional[str]:
-        """Returns the hash of the JSON from within a location ISF"""
+        """Returns the hash of the JSON from within a location ISF, or None
+        if the cache does not track hashes"""
+        return None
+
+    def get_validation(self, json_hash: str) -> Optional[bool]:
+        """Returns whether the ISF with a particular hash passed validation
+        against the current schemas, or None if it has not been validated
+        (or the cache does not record validations)"""
+        return None
+
+    def add_validation(self, json_hash: str, valid: bool) -> None:
+        """Records the result of validating the ISF with a particular hash
+        against the current schemas, if the cache records validations"""
+        return None
 
 
 class SqliteCache(CacheManagerInterface):
     _required_framework_version = (2, 0, 0)
-    _version = (1, 0, 0)
+    _version = (1, 2, 0)
 
     def __init__(self, filename: str):
         super().__init__(filename)
@@ -215,6 +397,9 @@ class SqliteCache(CacheManagerInterface):
             "CREATE TABLE IF NOT EXISTS cache (location TEXT UNIQUE NOT NULL, identifier TEXT, operating_system TEXT, hash TEXT,"
             "stats_base_types INT DEFAULT 0, stats_types INT DEFAULT 0, stats_enums INT DEFAULT 0, stats_symbols INT DEFAULT 0, local BOOL, cached DATETIME)"
         )
+        database.cursor().execute(
+            "CREATE TABLE IF NOT EXISTS validations (hash TEXT NOT NULL, schemas TEXT NOT NULL, valid BOOL, UNIQUE(hash, schemas))"
+        )
         database.commit()
         return database
 
@@ -296,6 +481,59 @@ class SqliteCache(CacheManagerInterface):
             return row["hash"]
         return None
 
+    def get_validation(self, json_hash: str) -> Optional[bool]:
+        results = (
+            self._database.cursor()
+            .execute(
+                "SELECT valid FROM validations WHERE hash = ? AND schemas = ?",
+                (json_hash, schemas.schemas_hash()),
+            )
+            .fetchall()
+        )
+        for row in results:
+            return bool(row["valid"])
+        return None
+
+    def add_validation(self, json_hash: str, valid: bool) -> None:
+        with self._database:
+            self._database.execute(
+                "INSERT OR REPLACE INTO validations (hash, schemas, valid) VALUES (?, ?, ?)",
+                (json_hash, schemas.schemas_hash(), valid),
+            )
+
+    def _location_hashes(self, locations: Iterable[str]) -> List[str]:
+        """Returns the hashes recorded for the locations"""
+        locations = list(locations)
+        if not locations:
+            return []
+        return [
+            row["hash"]
+            for row in self._database.execute(
+                f"SELECT hash FROM cache WHERE hash IS NOT NULL AND location IN ({','.join(['?'] * len(locations))})",
+                locations,
+            )
+        ]
+
+    def _process_locations(
+        self, locations: Iterable[str], idextractors: List[Type[IdentifierProcessor]]
+    ) -> Iterable[Tuple[str, Union[Tuple, Exception]]]:
+        """Processes each of the ISF locations, across a pool of processes if
+        there are several, yielding the results as each file completes"""
+        locations = list(locations)
+        process_location = functools.partial(
+            _process_location, idextractors=idextractors
+        )
+        if (
+            len(locations) <= 1
+            or (os.cpu_count() or 1) <= 1
+            # Daemonic processes (such as pool workers) can't start their own pool
+            or multiprocessing.current_process().daemon
+        ):
+            yield from map(process_location, locations)
+            return None
+        with multiprocessing.Pool(min(os.cpu_count(), len(locations))) as pool:
+            yield from pool.imap_unordered(process_location, locations)
+
     def update(self, progress_callback=None):
         """Locates all files under the symbol directories.  Updates the cache with additions, modifications and removals.
         This also updates remote locations based on a cache timeout.
@@ -319,8 +557,13 @@ class SqliteCache(CacheManagerInterface):
         new_locations = on_disk_locations.difference(cached_locations)
         missing_locations = cached_locations.difference(on_disk_locations)
 
+        # The hashes of entries that are removed or processed again, whose compiled
+        # copies are removed if no entry has the same hash afterwards
+        stale_hashes = set()
+
         # Missing entries
         if missing_locations:
+            stale_hashes.update(self._location_hashes(missing_locations))
             self._database.cursor().execute(
                 f"DELETE FROM cache WHERE location IN ({','.join(['?'] * len(missing_locations))})",
                 [x for x in missing_locations],
@@ -372,65 +615,46 @@ class SqliteCache(CacheManagerInterface):
 
         files_to_process = new_locations.union(cache_update)
         number_files_to_process = len(files_to_process)
-        cursor = self._database.cursor()
+        stale_hashes.update(self._location_hashes(cache_update))
+        rows = []
         try:
-            for counter, location in enumerate(files_to_process):
-                # Open location
+            for counter, (location, result) in enumerate(
+                self._process_locations(files_to_process, idextractors)
+            ):
                 progress_callback(
-                    counter * 100 / number_files_to_process,
+                    (counter + 1) * 100 / number_files_to_process,
                     f"Updating caches for {number_files_to_process} files...",
                 )
-                try:
-                    with resources.ResourceAccessor().open(location) as fp:
-                        json_obj = json.load(fp)
-                        hash = schemas.create_json_hash(json_obj)
-                        identifier = None
-
-                        # Get stats
-                        stats_base_types = len(json_obj.get("base_types", {}))
-                        stats_types = len(json_obj.get("user_types", {}))
-                        stats_enums = len(json_obj.get("enums", {}))
-                        stats_symbols = len(json_obj.get("symbols", {}))
-
-                        operating_system = None
-                        for idextractor in idextractors:
-                            identifier = idextractor.get_identifier(json_obj)
-                            if identifier is not None:
-                                operating_system = idextractor.operating_system
-                                break
-
-                        # We don't try to validate schemas here, we do that on first use
-                        # Store in database
-                        cursor.execute(
-                            "INSERT OR REPLACE INTO cache (location, identifier, operating_system, hash,"
-                            "stats_base_types, stats_types, stats_enums, stats_symbols, "
-                            "local, cached) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))",
-                            (
-                                location,
-                                identifier,
-                                operating_system,
-                                hash,
-                                stats_base_types,
-                                stats_types,
-                                stats_enums,
-                                stats_symbols,
-                                self.is_url_local(location),
-                            ),
-                        )
-                        if identifier is not None:
-                            vollog.log(
-                                constants.LOGLEVEL_VV,
-                                f"Identified {location} as {identifier}",
-                            )
-                        else:
-                            vollog.log(
-                                constants.LOGLEVEL_VVVV,
-                                f"No identifier found for {location}",
-                            )
-                except Exception as excp:
-                    vollog.log(constants.LOGLEVEL_VVVV, excp)
+                if isinstance(result, Exception):
+                    vollog.log(constants.LOGLEVEL_VVVV, result)
+                    continue
+                identifier = result[0]
+                if identifier is not None:
+                    vollog.log(
+                        constants.LOGLEVEL_VV,
+                        f"Identified {location} as {identifier}",
+                    )
+                else:
+                    vollog.log(
+                        constants.LOGLEVEL_VVVV,
+                        f"No identifier found for {location}",
+                    )
+                # We don't try to validate schemas here, we do that on first use
+                rows.append((location,) + result + (self.is_url_local(location),))
         finally:
-            self._database.commit()
+            # Store everything found in the database as a single transaction
+            with self._database:
+                self._database.executemany(
+                    "INSERT OR REPLACE INTO cache (location, identifier, operating_system, hash,"
+                    "stats_base_types, stats_types, stats_enums, stats_symbols, "
+                    "local, cached) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))",
+                    rows,
+                )
+        for json_hash in stale_hashes:
+            if not self._database.execute(
+                "SELECT 1 FROM cache WHERE hash = ?", (json_hash,)
+            ).fetchone():
+                compiled.remove(json_hash)
 
         # Remote Entries
 
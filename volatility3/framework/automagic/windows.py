@@ -172,6 +172,7 @@ class PageMapScanner(interfaces.layers.ScannerInterface):
 
     overlap = 0x4000
     thread_safe = True
+    accepts_buffer = True
     tests = [DtbSelfRef64bit(), DtbSelfRefPae(), DtbSelfRef32bit()]
     """The default tests to run when searching for DTBs"""
 
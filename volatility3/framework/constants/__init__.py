@@ -85,7 +85,7 @@ os.makedirs(CACHE_PATH, exist_ok=True)
 IDENTIFIERS_FILENAME = "identifier.cache"
 """Default location to record information about available identifiers"""
 
-CACHE_SQLITE_SCHEMA_VERSION = 1
+CACHE_SQLITE_SCHEMA_VERSION = 2
 """Version for the sqlite3 cache schema"""
 
 BUG_URL = "https://github.com/volatilityfoundation/volatility3/issues"
@@ -108,6 +108,15 @@ class Parallelism(enum.IntEnum):
 PARALLELISM = Parallelism.Off
 """Default value to the parallelism setting used throughout volatility"""
 
+PARALLEL_SCAN_WINDOW = 4
+"""The number of chunks per worker that a parallel scan may have in flight (or awaiting output) at once"""
+
+FILE_EXTRACTION_CHUNK_SIZE = 0x100000
+"""The largest run of adjacent extents that is read and written to an extracted file at once"""
+
+FILE_EXTRACTION_BUFFER_SIZE = 0x4000000
+"""The most data that may be read but not yet written out, across all files being extracted"""
+
 ISF_MINIMUM_SUPPORTED = (2, 0, 0)
 """The minimum supported version of the Intermediate Symbol Format"""
 ISF_MINIMUM_DEPRECATED = (3, 9, 9)
@@ -115,6 +124,12 @@ ISF_MINIMUM_DEPRECATED = (3, 9, 9)
 OFFLINE = False
 """Whether to go online to retrieve missing/necessary JSON files"""
 
+PERSISTENT_LAYER_CACHE = False
+"""Whether layers should store data derived from an image (such as page translations) in the cache for later runs"""
+
+BACKGROUND_ISF_VALIDATION = False
+"""Whether ISF files that have not been validated before are validated in a separate process, rather than before they are used"""
+
 REMOTE_ISF_URL = None  # 'http://localhost:8000/banners.json'
 """Remote URL to query for a list of ISF addresses"""
 
@@ -12,9 +12,12 @@ import logging
 import math
 import multiprocessing
 import multiprocessing.managers
+import multiprocessing.pool
+import multiprocessing.sharedctypes
+import os
+import queue
 import threading
 import traceback
-import types
 from abc import ABCMeta, abstractmethod
 from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
@@ -22,9 +25,34 @@ from volatility3.framework import constants, exceptions, interfaces
 
 vollog = logging.getLogger(__name__)
 
-ProgressValue = Union["DummyProgress", multiprocessing.managers.ValueProxy]
+ProgressValue = Union[
+    "DummyProgress",
+    multiprocessing.managers.ValueProxy,
+    multiprocessing.sharedctypes.Synchronized,
+]
 IteratorValue = Tuple[List[Tuple[str, int, int]], int]
 
+_scan_buffers = threading.local()
+"""Per-thread storage for the reusable buffers used to assemble scan chunks"""
+
+_scan_worker: Dict[str, Any] = {}
+"""The layer, scanner and progress value that a scanning worker process was initialized with"""
+
+
+def _scan_worker_initialize(
+    layer: "DataLayerInterface", scanner: "ScannerInterface", progress: ProgressValue
+) -> None:
+    """Stores the layer stack and scanner once per worker process, so that
+    tasks need only describe the chunks to be scanned."""
+    _scan_worker.update(layer=layer, scanner=scanner, progress=progress)
+
+
+def _scan_worker_chunk(iterator_value: IteratorValue) -> List[Any]:
+    """Scans a chunk described by iterator_value within a worker process."""
+    return _scan_worker["layer"]._scan_chunk(
+        _scan_worker["scanner"], _scan_worker["progress"], iterator_value
+    )
+
 
 class ScannerInterface(
     interfaces.configuration.VersionableInterface, metaclass=ABCMeta
@@ -53,10 +81,18 @@ class ScannerInterface(
     Scanners can mark themselves as thread_safe, if they do not require state
     in either their own class or the context.  This will allow the scanner to be run
     in parallel against multiple blocks.
+
+    Scanners can mark themselves as accepts_buffer, if they can operate on any
+    bytes-like object (such as a bytearray) rather than only `bytes`.  Such scanners
+    are handed the reusable buffer that the chunk was assembled into, avoiding a copy,
+    and therefore must not retain a reference to the data (or any memoryview of it)
+    once the call has completed, nor return parts of it without converting them to `bytes`.
     """
 
     thread_safe = False
 
+    accepts_buffer = False
+
     _required_framework_version = (2, 0, 0)
 
     def __init__(self) -> None:
@@ -65,6 +101,8 @@ class ScannerInterface(
         self.overlap = 0x1000  # A page of overlap by default
         self._context: Optional[interfaces.context.ContextInterface] = None
         self._layer_name: Optional[str] = None
+        # The exception that ended the last scan early, if there was one
+        self.scan_error: Optional[Exception] = None
 
     @property
     def context(self) -> Optional["interfaces.context.ContextInterface"]:
@@ -93,7 +131,8 @@ class ScannerInterface(
         volatility object)
 
         data is the chunk of data to search through data_offset is the
-        offset within the layer that the data being searched starts at
+        offset within the layer that the data being searched starts at.
+        If the scanner is marked as accepts_buffer, data may be a bytearray
         """
 
 
@@ -211,6 +250,7 @@ class DataLayerInterface(
         scanner: ScannerInterface,
         progress_callback: constants.ProgressCallback = None,
         sections: Optional[Iterable[Tuple[int, int]]] = None,
+        ordered: bool = True,
     ) -> Iterable[Any]:
         """Scans a Translation layer by chunk.
 
@@ -221,6 +261,7 @@ class DataLayerInterface(
              scanner: The constructed Scanner object to be applied
              progress_callback: Method that is called periodically during scanning to update progress
              sections: A list of (start, size) tuples defining the portions of the layer to scan
+             ordered: Whether results from parallel scans must be returned in the order of the layer, or may be returned as soon as each chunk completes
 
         Returns:
              The output iterable from the scanner object having been run against the layer
@@ -230,6 +271,7 @@ class DataLayerInterface(
 
         scanner.context = context
         scanner.layer_name = self.name
+        scanner.scan_error = None
 
         if sections is None:
             sections = [
@@ -256,28 +298,12 @@ class DataLayerInterface(
                         )
                     yield from scan_chunk(value)
             else:
-                progress = multiprocessing.Manager().Value("Q", 0)
-                parallel_module: types.ModuleType = multiprocessing
-                if constants.PARALLELISM == constants.Parallelism.Threading:
-                    progress = DummyProgress()
-                    parallel_module = threading
-                scan_chunk = functools.partial(self._scan_chunk, scanner, progress)
-                with parallel_module.Pool() as pool:
-                    result = pool.map_async(scan_chunk, scan_iterator())
-                    while not result.ready():
-                        if progress_callback:
-                            # Run the progress_callback
-                            progress_callback(
-                                scan_metric(progress.value),
-                                f"Scanning {self.name} using {scanner.__class__.__name__}",
-                            )
-                        # Ensures we don't burn CPU cycles going round in a ready waiting loop
-                        # without delaying the user too long between progress updates/results
-                        result.wait(0.1)
-                    for result_value in result.get():
-                        yield from result_value
+                yield from self._scan_parallel(
+                    scanner, scan_iterator, scan_metric, progress_callback, ordered
+                )
         except Exception as e:
             # We don't care the kind of exception, so catch and report on everything, yielding nothing further
+            scanner.scan_error = e
             vollog.debug(f"Scan Failure: {str(e)}")
             vollog.log(
                 constants.LOGLEVEL_VVV,
@@ -286,6 +312,101 @@ class DataLayerInterface(
                 ),
             )
 
+    def _scan_parallel(
+        self,
+        scanner: ScannerInterface,
+        scan_iterator: Callable[[], Iterable[IteratorValue]],
+        scan_metric: Callable[[int], float],
+        progress_callback: constants.ProgressCallback = None,
+        ordered: bool = True,
+    ) -> Iterable[Any]:
+        """Scans the chunks from scan_iterator using a pool of threads or
+        processes, yielding the results of each chunk as soon as it has been
+        scanned.
+
+        Worker processes receive the layer and scanner once, when they
+        start, and then only the description of each chunk to scan.
+        Progress is reported through a shared memory value.  At most
+        constants.PARALLEL_SCAN_WINDOW chunks per worker are in flight (or
+        waiting to be yielded) at any time, bounding the memory used.  If
+        ordered is False, results are yielded in the order that chunks
+        complete, rather than the order of the chunks in the layer.
+        """
+        processes = os.cpu_count() or 1
+        progress: ProgressValue
+        if constants.PARALLELISM == constants.Parallelism.Threading:
+            progress = DummyProgress()
+            pool = multiprocessing.pool.ThreadPool(processes)
+            scan_chunk: Callable[[IteratorValue], List[Any]] = functools.partial(
+                self._scan_chunk, scanner, progress
+            )
+        else:
+            progress = multiprocessing.Value("Q", 0)
+            pool = multiprocessing.Pool(
+                processes,
+                initializer=_scan_worker_initialize,
+                initargs=(self, scanner, progress),
+            )
+            scan_chunk = _scan_worker_chunk
+
+        window = max(1, processes * constants.PARALLEL_SCAN_WINDOW)
+        completed: queue.Queue = queue.Queue()
+        chunks = enumerate(scan_iterator())
+        # Results that have completed out of order, waiting to be yielded
+        waiting: Dict[int, List[Any]] = {}
+        in_flight = next_index = 0
+        exhausted = False
+
+        with pool:
+            while not exhausted or in_flight:
+                # Keep the window full
+                while not exhausted and in_flight < window:
+                    try:
+                        index, chunk = next(chunks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pool.apply_async(
+                        scan_chunk,
+                        (chunk,),
+                        callback=functools.partial(
+                            self._scan_completed, completed, index
+                        ),
+                        error_callback=functools.partial(
+                            self._scan_completed, completed, index
+                        ),
+                    )
+                    in_flight += 1
+
+                if progress_callback:
+                    progress_callback(
+                        scan_metric(progress.value),
+                        f"Scanning {self.name} using {scanner.__class__.__name__}",
+                    )
+                try:
+                    # Ensures we don't burn CPU cycles going round in a ready waiting loop
+                    # without delaying the user too long between progress updates/results
+                    index, result_value = completed.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if isinstance(result_value, BaseException):
+                    raise result_value
+
+                if not ordered:
+                    in_flight -= 1
+                    yield from result_value
+                    continue
+                waiting[index] = result_value
+                while next_index in waiting:
+                    in_flight -= 1
+                    yield from waiting.pop(next_index)
+                    next_index += 1
+
+    @staticmethod
+    def _scan_completed(completed: queue.Queue, index: int, result: Any) -> None:
+        """Records the result (or exception) of a scanned chunk."""
+        completed.put((index, result))
+
     def _coalesce_sections(
         self, sections: Iterable[Tuple[int, int]]
     ) -> Iterable[Tuple[int, int]]:
@@ -354,20 +475,50 @@ class DataLayerInterface(
         iterator_value: IteratorValue,
     ) -> List[Any]:
         data_to_scan, chunk_end = iterator_value
-        data = b""
-        for layer_name, address, chunk_size in data_to_scan:
-            try:
-                data += self.context.layers[layer_name].read(address, chunk_size)
-            except exceptions.InvalidAddressException:
-                vollog.debug(
-                    f"Invalid address in layer {layer_name} found scanning {self.name} at address {address:x}"
-                )
+        # Take ownership of this thread's buffer, so that a nested scan cannot reuse it whilst it's in use
+        data = self._scan_buffer(sum(chunk_size for _, _, chunk_size in data_to_scan))
+        try:
+            position = 0
+            with memoryview(data) as view:
+                for layer_name, address, chunk_size in data_to_scan:
+                    try:
+                        chunk = self.context.layers[layer_name].read(
+                            address, chunk_size
+                        )
+                        view[position : position + len(chunk)] = chunk
+                        position += len(chunk)
+                    except exceptions.InvalidAddressException:
+                        vollog.debug(
+                            f"Invalid address in layer {layer_name} found scanning {self.name} at address {address:x}"
+                        )
+            # Drop anything that could not be read, keeping the data contiguous
+            del data[position:]
 
-        if len(data) > scanner.chunk_size + scanner.overlap:
-            vollog.debug(f"Scan chunk too large: {hex(len(data))}")
+            if len(data) > scanner.chunk_size + scanner.overlap:
+                vollog.debug(f"Scan chunk too large: {hex(len(data))}")
 
-        progress.value = chunk_end
-        return list(scanner(data, chunk_end - len(data)))
+            progress.value = chunk_end
+            scan_data = data if scanner.accepts_buffer else bytes(data)
+            return list(scanner(scan_data, chunk_end - len(data)))
+        finally:
+            _scan_buffers.buffer = data
+
+    @staticmethod
+    def _scan_buffer(size: int) -> bytearray:
+        """Returns the current thread's scan buffer, resized to size bytes.
+
+        The buffer is removed from the thread's storage until it is
+        returned, so that reentrant scans allocate their own.
+        """
+        buffer = getattr(_scan_buffers, "buffer", None)
+        _scan_buffers.buffer = None
+        if buffer is None:
+            return bytearray(size)
+        if len(buffer) > size:
+            del buffer[size:]
+        elif len(buffer) < size:
+            buffer += bytes(size - len(buffer))
+        return buffer
 
     def _scan_metric(
         self, _scanner: "ScannerInterface", sections: List[Tuple[int, int]]
@@ -448,6 +599,32 @@ class TranslationLayerInterface(DataLayerInterface, metaclass=ABCMeta):
              The data to be read from the underlying layer."""
         return data
 
+    def _read_mapped_data(
+        self,
+        layer_name: str,
+        mapped_offset: int,
+        mapped_length: int,
+        offset: int,
+        output_length: int,
+        pad: bool,
+    ) -> bytes:
+        """Reads the data of a single mapping from the underlying layer and
+        decodes it.  Layers that can produce the decoded data without reading
+        the underlying layer (such as from a cache) may override this.
+
+        Args:
+            layer_name: The layer to read the data from
+            mapped_offset: The offset in the underlying layer where the data would begin
+            mapped_length: The length of the data in the underlying layer
+            offset: The offset in the higher-layer where the data would begin
+            output_length: The expected length of the returned data
+            pad: Whether to pad the read of the underlying layer
+
+        Returns:
+             The decoded data of the mapping."""
+        data = self._context.layers.read(layer_name, mapped_offset, mapped_length, pad)
+        return self._decode_data(data, mapped_offset, offset, output_length)
+
     def _encode_data(
         self, layer_name: str, mapped_offset: int, offset: int, value: bytes
     ) -> bytes:
@@ -470,7 +647,9 @@ class TranslationLayerInterface(DataLayerInterface, metaclass=ABCMeta):
         """Reads an offset for length bytes and returns 'bytes' (not 'str') of
         length size."""
         current_offset = offset
-        output: bytes = b""
+        # Collect the pieces and join them once, repeated concatenation is quadratic for many small mappings
+        output: List[bytes] = []
+        output_length = 0
         for (
             layer_offset,
             sublength,
@@ -485,24 +664,24 @@ class TranslationLayerInterface(DataLayerInterface, metaclass=ABCMeta):
                     f"Layer {self.name} cannot map offset: {current_offset}",
                 )
             elif layer_offset > current_offset:
-                output += b"\x00" * (layer_offset - current_offset)
+                output.append(b"\x00" * (layer_offset - current_offset))
+                output_length += layer_offset - current_offset
                 current_offset = layer_offset
             # The layer_offset can be less than the current_offset in non-linearly mapped layers
             # it does not suggest an overlap, but that the data is in an encoded block
             if mapped_length > 0:
-                unprocessed_data = self._context.layers.read(
-                    layer, mapped_offset, mapped_length, pad
-                )
-                processed_data = self._decode_data(
-                    unprocessed_data, mapped_offset, layer_offset, sublength
+                processed_data = self._read_mapped_data(
+                    layer, mapped_offset, mapped_length, layer_offset, sublength, pad
                 )
                 if len(processed_data) != sublength:
                     raise ValueError(
                         "ProcessedData length does not match expected length of chunk"
                     )
-                output += processed_data
+                output.append(processed_data)
+                output_length += sublength
                 current_offset += sublength
-        return output + (b"\x00" * (length - len(output)))
+        output.append(b"\x00" * (length - output_length))
+        return b"".join(output)
 
     def write(self, offset: int, value: bytes) -> None:
         """Writes a value at offset, distributing the writing across any
@@ -8,11 +8,13 @@ using objects constructed from symbols.
 """
 
 # Configuration interfaces must be imported separately, since we're part of interfaces and can't import ourselves
+import concurrent.futures
 import io
 import logging
 import os
+import threading
 from abc import ABCMeta, abstractmethod
-from typing import List, Tuple, Type
+from typing import Dict, List, Optional, Tuple, Type
 
 from volatility3.framework import exceptions, constants, interfaces
 
@@ -82,6 +84,291 @@ class FileHandlerInterface(io.RawIOBase):
             self.close()
 
 
+class _ExtractedFile:
+    """The state of a file that a FileExtentWriter is writing extents to"""
+
+    def __init__(self, file_handle: FileHandlerInterface) -> None:
+        self.file_handle = file_handle
+        # Data written to the file directly must reach it before extents are
+        self.file_handle.flush()
+        self.fileno: Optional[int] = None
+        self.end = 0
+        if hasattr(os, "pwrite"):
+            try:
+                self.fileno = file_handle.fileno()
+                self.end = os.fstat(self.fileno).st_size
+            except OSError:
+                self.fileno = None
+        self.submitted = 0
+        # The run of adjacent extents that has not yet been submitted
+        self.run_offset = 0
+        self.run_length = 0
+        self.run_segments: List[list] = []
+        # Runs are written out in the order they were submitted
+        self.pending: List[concurrent.futures.Future] = []
+        self.written = 0
+        self.turn = threading.Condition()
+        self.discarded = False
+
+
+class FileExtentWriter:
+    """Writes extents of layers out to files, on a pool of threads.
+
+    Extents that are adjacent in the file (and in the layer they are read
+    from) are coalesced into larger reads and writes, and the amount of data
+    that has been read but not yet written is capped, no matter how large the
+    files are.  Where the file handler has a file descriptor, runs of zeroes
+    past the data already written are left as holes, so that filesystems that
+    support sparse files do not store them.
+
+    Layers are only safe to read from several threads when threading
+    parallelism is enabled, so otherwise the extents are read on the thread
+    that queues them, and only written out on the pool.
+
+    This can be used as a ContextManager, which writes out (or on error,
+    discards) the remaining extents when exiting the context block.
+    """
+
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        buffer_size: Optional[int] = None,
+        threads: Optional[int] = None,
+    ) -> None:
+        """
+
+        Args:
+            chunk_size: The largest run of extents to read and write at once
+            buffer_size: The most data that may be read but not yet written
+            threads: The number of threads to write (and, with threading
+                parallelism, read) on, which defaults to one unless
+                parallelism is enabled
+        """
+        self._chunk_size = chunk_size or constants.FILE_EXTRACTION_CHUNK_SIZE
+        self._buffer_size = max(
+            buffer_size or constants.FILE_EXTRACTION_BUFFER_SIZE, self._chunk_size
+        )
+        if threads is None:
+            threads = 1
+            if constants.PARALLELISM != constants.Parallelism.Off:
+                threads = os.cpu_count() or 1
+        self._threads = threads
+        self._read_in_threads = constants.PARALLELISM == constants.Parallelism.Threading
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._buffered = 0
+        self._buffered_condition = threading.Condition()
+        self._files: Dict[int, _ExtractedFile] = {}
+
+    def write(
+        self,
+        file_handle: FileHandlerInterface,
+        file_offset: int,
+        layer: interfaces.layers.DataLayerInterface,
+        address: int,
+        length: int,
+    ) -> None:
+        """Queues an extent of a layer to be written to a file
+
+        The extent is read with padding, so unavailable data is written out as
+        zeroes.  Later extents overwrite earlier ones where they overlap.
+
+        Args:
+            file_handle: The file to write to
+            file_offset: The offset within the file to write the extent at
+            layer: The layer to read the extent from
+            address: The address of the extent within the layer
+            length: The length of the extent
+        """
+        extracted = self._files.get(id(file_handle))
+        if extracted is None:
+            extracted = self._files[id(file_handle)] = _ExtractedFile(file_handle)
+        extracted.submitted += length
+        while length > 0:
+            if extracted.run_length and (
+                file_offset != extracted.run_offset + extracted.run_length
+                or extracted.run_length >= self._chunk_size
+            ):
+                self._submit(extracted)
+            if not extracted.run_length:
+                extracted.run_offset = file_offset
+            chunk = min(length, self._chunk_size - extracted.run_length)
+            segments = extracted.run_segments
+            if (
+                segments
+                and segments[-1][0] is layer
+                and segments[-1][1] + segments[-1][2] == address
+            ):
+                segments[-1][2] += chunk
+            else:
+                segments.append([layer, address, chunk])
+            extracted.run_length += chunk
+            file_offset += chunk
+            address += chunk
+            length -= chunk
+
+    def finish(
+        self, file_handle: FileHandlerInterface, size: Optional[int] = None
+    ) -> int:
+        """Writes out the extents queued for a file, and waits for them to be
+        written
+
+        Args:
+            file_handle: The file to finish writing
+            size: The size to set the file to, otherwise the file is extended
+                to the end of the last extent
+
+        Returns:
+            The number of bytes of extents that were written to the file
+
+        Raises:
+            Any exception raised while reading or writing the extents
+        """
+        extracted = self._files.pop(id(file_handle), None)
+        if extracted is None:
+            return 0
+        try:
+            self._submit(extracted)
+        finally:
+            concurrent.futures.wait(extracted.pending)
+        for future in extracted.pending:
+            future.result()
+
+        end = extracted.end if size is None else size
+        if extracted.fileno is not None:
+            if size is not None or os.fstat(extracted.fileno).st_size < end:
+                os.ftruncate(extracted.fileno, end)
+        else:
+            file_handle.seek(0, io.SEEK_END)
+            current = file_handle.tell()
+            if current < end:
+                file_handle.seek(end - 1)
+                file_handle.write(b"\x00")
+            elif current > end and size is not None:
+                file_handle.truncate(end)
+        return extracted.submitted
+
+    def discard(self, file_handle: FileHandlerInterface) -> None:
+        """Drops the extents queued for a file that have not yet been written,
+        and waits for any that are being written"""
+        extracted = self._files.pop(id(file_handle), None)
+        if extracted is not None:
+            # Runs still queued on the pool are skipped once they start, so
+            # that the runs after them and the buffer are still accounted for
+            extracted.discarded = True
+            concurrent.futures.wait(extracted.pending)
+
+    def close(self) -> None:
+        """Writes out the extents queued for all files, and stops the threads"""
+        try:
+            for extracted in list(self._files.values()):
+                self.finish(extracted.file_handle)
+        finally:
+            self._shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            for extracted in list(self._files.values()):
+                self.discard(extracted.file_handle)
+            self._shutdown()
+
+    def _shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _submit(self, extracted: _ExtractedFile) -> None:
+        """Submits the pending run of extents of a file, once there is room in
+        the buffer for it"""
+        length = extracted.run_length
+        if not length:
+            return None
+        with self._buffered_condition:
+            self._buffered_condition.wait_for(
+                lambda: not self._buffered
+                or self._buffered + length <= self._buffer_size
+            )
+            self._buffered += length
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(self._threads)
+        # Zeroes only need writing over data that may have been written already
+        sparse = extracted.fileno is not None and extracted.run_offset >= extracted.end
+        data: Optional[concurrent.futures.Future] = None
+        if not self._read_in_threads:
+            # Any failure is raised when the run is written, as it would be on a thread
+            data = concurrent.futures.Future()
+            try:
+                data.set_result(self._read_run(extracted.run_segments))
+            except Exception as excp:
+                data.set_exception(excp)
+        extracted.pending.append(
+            self._executor.submit(
+                self._write_run,
+                extracted,
+                len(extracted.pending),
+                extracted.run_offset,
+                extracted.run_segments,
+                data,
+                sparse,
+            )
+        )
+        extracted.end = max(extracted.end, extracted.run_offset + length)
+        extracted.run_length = 0
+        extracted.run_segments = []
+
+    def _write_run(
+        self,
+        extracted: _ExtractedFile,
+        sequence: int,
+        offset: int,
+        segments: List[list],
+        data: Optional[concurrent.futures.Future],
+        sparse: bool,
+    ) -> None:
+        """Reads a run of extents (unless it has been read already), and
+        writes it out once the runs submitted before it have been written"""
+        length = sum(segment[2] for segment in segments)
+        try:
+            if extracted.discarded:
+                return None
+            if data is None:
+                run_data = self._read_run(segments)
+            else:
+                run_data = data.result()
+            with extracted.turn:
+                extracted.turn.wait_for(lambda: extracted.written == sequence)
+                if extracted.discarded:
+                    return None
+                if extracted.fileno is None:
+                    extracted.file_handle.seek(offset)
+                    extracted.file_handle.write(run_data)
+                elif not sparse or run_data.count(0) != len(run_data):
+                    view = memoryview(run_data)
+                    while view:
+                        written = os.pwrite(extracted.fileno, view, offset)
+                        view = view[written:]
+                        offset += written
+        finally:
+            with extracted.turn:
+                extracted.turn.wait_for(lambda: extracted.written == sequence)
+                extracted.written += 1
+                extracted.turn.notify_all()
+            with self._buffered_condition:
+                self._buffered -= length
+                self._buffered_condition.notify_all()
+
+    @staticmethod
+    def _read_run(segments: List[list]) -> bytes:
+        """Reads the extents of a run, as a single block of data"""
+        return b"".join(
+            layer.read(address, size, pad=True) for layer, address, size in segments
+        )
+
+
 #
 # Plugins
 # - Take in relevant number of TranslationLayers (of specified type)
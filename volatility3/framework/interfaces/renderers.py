@@ -186,12 +186,14 @@ class TreeGrid(metaclass=ABCMeta):
         function: Optional[VisitorSignature] = None,
         initial_accumulator: Any = None,
         fail_on_errors: bool = True,
+        retain: bool = True,
     ) -> Optional[Exception]:
         """Populates the tree by consuming the TreeGrid's construction
         generator Func is called on every node, so can be used to create output
         on demand.
 
-        This is equivalent to a one-time visit.
+        This is equivalent to a one-time visit.  If retain is False, the rows
+        are not kept in the tree once they have been visited.
         """
 
     @property
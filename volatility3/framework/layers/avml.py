@@ -6,12 +6,16 @@
 
 The user of the file doesn't have to worry about the compression,
 but random access is not allowed."""
+import collections
 import ctypes
+import functools
 import logging
 import struct
-from typing import Tuple, List, Optional
+import threading
+from typing import Any, Dict, Tuple, List, Optional
 
 from volatility3.framework import exceptions, interfaces, constants
+from volatility3.framework.configuration import requirements
 from volatility3.framework.layers import segmented
 
 vollog = logging.getLogger(__name__)
@@ -67,6 +71,17 @@ def uncompress(s):
     return ubuf.raw
 
 
+def uncompressed_length(data: bytes) -> int:
+    """Returns the uncompressed length of a snappy compressed string, read
+    from the varint preamble at its start, without uncompressing it."""
+    length = 0
+    for index, byte in enumerate(data[:5]):
+        length |= (byte & 0x7F) << (7 * index)
+        if not byte & 0x80:
+            return length
+    raise SnappyException("Invalid snappy uncompressed length preamble")
+
+
 class AVMLLayer(segmented.NonLinearlySegmentedLayer):
     """A Lime format TranslationLayer.
 
@@ -74,6 +89,9 @@ class AVMLLayer(segmented.NonLinearlySegmentedLayer):
     are large holes in the physical layer
     """
 
+    _frame_cache_size = 256
+    _persist_segments = True
+
     def __init__(self, *args, **kwargs):
         self._compressed = {}
         super().__init__(*args, **kwargs)
@@ -109,14 +127,15 @@ class AVMLLayer(segmented.NonLinearlySegmentedLayer):
 
             if magic not in [0x4C4D5641] or version != 2:
                 raise exceptions.LayerException("File not completely in AVML format")
-            chunk_data = base_layer.read(
+            segments, consumed = self._read_snappy_frames(
+                base_layer,
                 offset + avml_header_size,
                 min(
                     end - start,
                     base_layer.maximum_address - (offset + avml_header_size),
                 ),
+                end - start,
             )
-            segments, consumed = self._read_snappy_frames(chunk_data, end - start)
             # The returned segments are accurate the chunk_data that was passed in, but needs shifting
             for thing, mapped_offset, size, mapped_size, compressed in segments:
                 self._segments.append(
@@ -132,14 +151,31 @@ class AVMLLayer(segmented.NonLinearlySegmentedLayer):
             # TODO: Check whatever the remaining 8 bytes are
             offset += avml_header_size + consumed + 8
 
+    def _segment_flags(self, segment: Tuple[int, int, int, int]) -> int:
+        return int(self._compressed[segment[1]])
+
+    def _restore_segment_flags(
+        self, segment: Tuple[int, int, int, int], flags: int
+    ) -> None:
+        self._compressed[segment[1]] = bool(flags)
+
     def _read_snappy_frames(
-        self, data: bytes, expected_length: int
+        self,
+        base_layer: interfaces.layers.DataLayerInterface,
+        data_offset: int,
+        data_length: int,
+        expected_length: int,
     ) -> Tuple[List[Tuple[int, int, int, int, bool]], int]:
         """
         Reads a framed-format snappy stream
 
+        Only the frame headers and the uncompressed length preamble of each compressed frame are read,
+        the frames themselves are not uncompressed.
+
         Args:
-            data: The stream to read
+            base_layer: The layer containing the stream
+            data_offset: The offset of the stream within the base layer
+            data_length: The amount of the base layer available to the stream
             expected_length: How big the decompressed stream is expected to be (termination limit)
 
         Returns:
@@ -152,18 +188,16 @@ class AVMLLayer(segmented.NonLinearlySegmentedLayer):
         frame_header_struct = "<L"
         frame_header_len = struct.calcsize(frame_header_struct)
         while decompressed_len <= expected_length:
-            if offset + frame_header_len < len(data):
-                frame_header = data[offset : offset + frame_header_len]
+            if offset + frame_header_len < data_length:
+                frame_header = base_layer.read(data_offset + offset, frame_header_len)
                 frame_header_val = struct.unpack("<L", frame_header)[0]
                 frame_type, frame_size = frame_header_val & 0xFF, frame_header_val >> 8
                 if frame_type == 0xFF:
                     if (
-                        data[
-                            offset
-                            + frame_header_len : offset
-                            + frame_header_len
-                            + frame_size
-                        ]
+                        base_layer.read(
+                            data_offset + offset + frame_header_len,
+                            min(frame_size, data_length - offset - frame_header_len),
+                        )
                         != b"sNaPpY"
                     ):
                         raise ValueError(f"Snappy header missing at offset: {offset}")
@@ -171,23 +205,30 @@ class AVMLLayer(segmented.NonLinearlySegmentedLayer):
                     # CRC + (Un)compressed data
                     mapped_start = offset + frame_header_len
                     # frame_crc = data[mapped_start: mapped_start + crc_len]
-                    frame_data = data[
-                        mapped_start + crc_len : mapped_start + frame_size
-                    ]
+                    mapped_length = (
+                        min(frame_size, data_length - mapped_start) - crc_len
+                    )
                     if frame_type == 0x00:
-                        # Compressed data
-                        frame_data = uncompress(frame_data)
+                        # Compressed data, the preamble is at most 5 bytes
+                        frame_length = uncompressed_length(
+                            base_layer.read(
+                                data_offset + mapped_start + crc_len,
+                                min(5, mapped_length),
+                            )
+                        )
+                    else:
+                        frame_length = mapped_length
                     # TODO: Verify CRC
                     segments.append(
                         (
                             decompressed_len,
                             mapped_start + crc_len,
-                            len(frame_data),
+                            frame_length,
                             frame_size - crc_len,
                             frame_type == 0x00,
                         )
                     )
-                    decompressed_len += len(frame_data)
+                    decompressed_len += frame_length
                 elif frame_type in range(0x2, 0x80):
                     # Unskippable
                     raise exceptions.LayerException(
@@ -196,17 +237,88 @@ class AVMLLayer(segmented.NonLinearlySegmentedLayer):
                 offset += frame_header_len + frame_size
         return segments, offset
 
+    @functools.cached_property
+    def _frame_cache(self) -> "collections.OrderedDict[int, bytes]":
+        """Recently uncompressed frames, by mapped offset, shared by all
+        reads of the layer."""
+        return collections.OrderedDict()
+
+    @functools.cached_property
+    def _frame_cache_lock(self) -> threading.Lock:
+        return threading.Lock()
+
+    def _cached_frame(self, mapped_offset: int) -> Optional[bytes]:
+        """Returns the uncompressed frame at mapped_offset if it is cached."""
+        cache = self._frame_cache
+        with self._frame_cache_lock:
+            decoded_data = cache.get(mapped_offset)
+            if decoded_data is not None:
+                cache.move_to_end(mapped_offset)
+            return decoded_data
+
+    def _uncompress_frame(self, data: bytes, mapped_offset: int) -> bytes:
+        """Uncompresses the frame at mapped_offset, using the frame cache."""
+        decoded_data = self._cached_frame(mapped_offset)
+        if decoded_data is not None:
+            return decoded_data
+        decoded_data = uncompress(data)
+        cache = self._frame_cache
+        with self._frame_cache_lock:
+            cache[mapped_offset] = decoded_data
+            while len(cache) > self.config.get(
+                "frame_cache_size", self._frame_cache_size
+            ):
+                cache.popitem(last=False)
+        return decoded_data
+
+    def _read_mapped_data(
+        self,
+        layer_name: str,
+        mapped_offset: int,
+        mapped_length: int,
+        offset: int,
+        output_length: int,
+        pad: bool,
+    ) -> bytes:
+        """Serves compressed frames from the frame cache, before their
+        compressed data is read from the base layer."""
+        if self._compressed.get(mapped_offset):
+            decoded_data = self._cached_frame(mapped_offset)
+            if decoded_data is not None:
+                return self._slice_frame(decoded_data, offset, output_length)
+        return super()._read_mapped_data(
+            layer_name, mapped_offset, mapped_length, offset, output_length, pad
+        )
+
+    def _slice_frame(self, data: bytes, offset: int, output_length: int) -> bytes:
+        """Cuts the data of the frame containing offset down to the output."""
+        start_offset, _, _, _ = self._find_segment(offset)
+        return data[offset - start_offset : offset - start_offset + output_length]
+
     def _decode_data(
         self, data: bytes, mapped_offset: int, offset: int, output_length: int
     ) -> bytes:
-        start_offset, _, _, _ = self._find_segment(offset)
         if self._compressed[mapped_offset]:
-            decoded_data = uncompress(data)
-        else:
-            decoded_data = data
-        decoded_data = decoded_data[offset - start_offset :]
-        decoded_data = decoded_data[:output_length]
-        return decoded_data
+            data = self._uncompress_frame(data, mapped_offset)
+        return self._slice_frame(data, offset, output_length)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Do not pickle the frame cache, it is rebuilt in each process"""
+        state = self.__dict__.copy()
+        state.pop("_frame_cache", None)
+        state.pop("_frame_cache_lock", None)
+        return state
+
+    @classmethod
+    def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
+        return super().get_requirements() + [
+            requirements.IntRequirement(
+                name="frame_cache_size",
+                description="Maximum number of uncompressed frames to cache",
+                default=cls._frame_cache_size,
+                optional=True,
+            ),
+        ]
 
 
 class AVMLStacker(interfaces.automagic.StackerLayerInterface):
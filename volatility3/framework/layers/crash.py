@@ -2,8 +2,9 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 import logging
+import re
 import struct
-from typing import Tuple, Optional
+from typing import Generator, Optional, Tuple
 
 from volatility3.framework import constants, exceptions, interfaces
 from volatility3.framework.layers import segmented
@@ -34,6 +35,12 @@ class WindowsCrashDump32Layer(segmented.SegmentedLayer):
 
     _magic_struct = struct.Struct("<II")
     headerpages = 1
+    _persist_segments = True
+
+    # The positions of the set bits in each possible byte value
+    _bit_positions = [
+        tuple(bit for bit in range(8) if value & (1 << bit)) for value in range(256)
+    ]
 
     def __init__(
         self, context: interfaces.context.ContextInterface, config_path: str, name: str
@@ -129,78 +136,25 @@ class WindowsCrashDump32Layer(segmented.SegmentedLayer):
 
         elif self.dump_type == 0x05:
             summary_header = self.get_summary_header()
-            seg_first_bit = None  # First bit in a run
-            seg_first_offset = 0  # File offset of first bit
-            offset = (
-                summary_header.HeaderSize
-            )  # Offset to the start of actual memory dump
-            ulong_bitmap_array = summary_header.get_buffer_long()
-            # outer_index points to a 32 bits array inside a list of arrays,
-            # each bit indicating a page mapping state
-            for outer_index in range(ulong_bitmap_array.vol.count):
-                ulong_bitmap = ulong_bitmap_array[outer_index]
-                # All pages in this 32 bits array are mapped (speedup iteration process)
-                if ulong_bitmap == 0xFFFFFFFF:
-                    # New segment
-                    if seg_first_bit is None:
-                        seg_first_offset = offset
-                        seg_first_bit = outer_index * 32
-                    offset += 32 * self._page_size
-                # No pages in this 32 bits array are mapped (speedup iteration process)
-                elif ulong_bitmap == 0:
-                    # End of segment
-                    if seg_first_bit is not None:
-                        last_bit = (outer_index - 1) * 32 + 31
-                        segment_length = (
-                            last_bit - seg_first_bit + 1
-                        ) * self._page_size
-                        segments.append(
-                            (
-                                seg_first_bit * self._page_size,
-                                seg_first_offset,
-                                segment_length,
-                                segment_length,
-                            )
-                        )
-                        seg_first_bit = None
-                # Some pages in this 32 bits array are mapped and some aren't
-                else:
-                    for inner_bit_position in range(32):
-                        current_bit = outer_index * 32 + inner_bit_position
-                        page_mapped = ulong_bitmap & (1 << inner_bit_position)
-                        if page_mapped:
-                            # New segment
-                            if seg_first_bit is None:
-                                seg_first_offset = offset
-                                seg_first_bit = current_bit
-                            offset += self._page_size
-                        else:
-                            # End of segment
-                            if seg_first_bit is not None:
-                                segment_length = (
-                                    current_bit - 1 - seg_first_bit + 1
-                                ) * self._page_size
-                                segments.append(
-                                    (
-                                        seg_first_bit * self._page_size,
-                                        seg_first_offset,
-                                        segment_length,
-                                        segment_length,
-                                    )
-                                )
-                                seg_first_bit = None
-                last_bit_seen = outer_index * 32 + 31
-
-            if seg_first_bit is not None:
-                segment_length = (last_bit_seen - seg_first_bit + 1) * self._page_size
+            # Offset to the start of actual memory dump
+            offset = int(summary_header.HeaderSize)
+            # Each bit of the bitmap indicates whether a page is present, and the
+            # bitmap is stored (and so read) as a whole number of 32-bit ULONGs
+            bitmap_length = ((summary_header.BitmapSize + 31) // 32) * 4
+            bitmap = self.context.layers.read(
+                self._base_layer, summary_header.BufferChar.vol.offset, bitmap_length
+            )
+            for first_page, page_count in self._bitmap_runs(bitmap):
+                segment_length = page_count * self._page_size
                 segments.append(
                     (
-                        seg_first_bit * self._page_size,
-                        seg_first_offset,
+                        first_page * self._page_size,
+                        offset,
                         segment_length,
                         segment_length,
                     )
                 )
+                offset += segment_length
         else:
             vollog.log(
                 constants.LOGLEVEL_VVVV, f"unsupported dump format 0x{self.dump_type:x}"
@@ -224,6 +178,28 @@ class WindowsCrashDump32Layer(segmented.SegmentedLayer):
 
         self._segments = segments
 
+    @classmethod
+    def _bitmap_runs(cls, bitmap: bytes) -> Generator[Tuple[int, int], None, None]:
+        """Yields the first page and page count of each run of set bits in a
+        (little-endian) page bitmap.
+
+        Rather than testing each bit, the bitmap is XORed with itself shifted
+        up by one bit, which sets only the bits where a run starts or ends.
+        Those are found by searching for the non-zero bytes, so the work done
+        in python depends on the number of runs rather than the bitmap size.
+        """
+        bits = int.from_bytes(bitmap, "little")
+        edges = (bits ^ (bits << 1)).to_bytes(len(bitmap) + 1, "little")
+        run_start = None
+        for match in re.finditer(rb"[^\x00]", edges):
+            base = match.start() * 8
+            for bit in cls._bit_positions[edges[match.start()]]:
+                if run_start is None:
+                    run_start = base + bit
+                else:
+                    yield run_start, base + bit - run_start
+                    run_start = None
+
     @classmethod
     def check_header(
         cls, base_layer: interfaces.layers.DataLayerInterface, offset: int = 0
@@ -24,6 +24,7 @@ class Elf64Layer(segmented.SegmentedLayer):
     _header_struct = struct.Struct("<IBBB")
     MAGIC = 0x464C457F  # "\x7fELF"
     ELF_CLASS = ELF_CLASS.ELFCLASS64
+    _persist_segments = True
 
     def __init__(
         self, context: interfaces.context.ContextInterface, config_path: str, name: str
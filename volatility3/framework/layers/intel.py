@@ -2,12 +2,20 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 
+import array
+import atexit
 import collections
 import functools
+import hashlib
 import logging
 import math
+import os
 import struct
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+import sys
+import tempfile
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib import parse, request
 
 from volatility3 import classproperty
 from volatility3.framework import exceptions, interfaces, constants
@@ -18,6 +26,125 @@ vollog = logging.getLogger(__name__)
 
 INTEL_TRANSLATION_DEBUGGING = False
 
+_persistent_translation_layers: "weakref.WeakSet[Intel]" = weakref.WeakSet()
+"""The layers whose translation caches are written out when volatility exits"""
+
+
+@atexit.register
+def _save_translation_caches() -> None:
+    for layer in list(_persistent_translation_layers):
+        # The files beneath the layers may already have been closed
+        try:
+            layer.save_translation_cache()
+        except Exception as excp:
+            vollog.debug(f"Unable to save translation cache for {layer.name}: {excp}")
+
+
+class TranslationCache:
+    """A software translation lookaside buffer for page table walks.
+
+    Stores the final entry of a walk (and the position at which the walk
+    ended) against the page number of the page it mapped, and stores faults
+    found part way through a walk against the whole region that the missing
+    table would have covered, so that holes are pruned in a single lookup.
+
+    When the cache reaches its maximum size it is flushed entirely.
+    """
+
+    _file_magic = b"VOLTLB\x00\x01"
+
+    def __init__(self, shifts: Iterable[int], maximum_size: int) -> None:
+        self._shifts = sorted(set(shifts))
+        self._tables: Dict[int, Dict[int, Tuple[int, int, Optional[str]]]] = {
+            shift: {} for shift in self._shifts
+        }
+        self.maximum_size = maximum_size
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.modified = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def statistics(self) -> Dict[str, int]:
+        """Returns the number of entries, hits and misses of the cache"""
+        return {"entries": self._size, "hits": self.hits, "misses": self.misses}
+
+    def lookup(self, offset: int) -> Optional[Tuple[int, int, Optional[str]]]:
+        """Returns the (entry, position, fault) for an offset if it has been
+        cached, where fault is None unless the walk failed part way."""
+        for shift in self._shifts:
+            result = self._tables[shift].get(offset >> shift)
+            if result is not None:
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def store(
+        self, offset: int, entry: int, position: int, fault: Optional[str] = None
+    ) -> None:
+        """Stores the result of a walk that ended at position (and therefore
+        applies to every offset sharing the bits above position)"""
+        if self.maximum_size <= 0:
+            return None
+        table = self._tables.get(position + 1)
+        if table is None:
+            return None
+        key = offset >> (position + 1)
+        if key not in table:
+            if self._size >= self.maximum_size:
+                self.clear()
+            self._size += 1
+        table[key] = (entry, position, fault)
+        self.modified = True
+
+    def clear(self) -> None:
+        """Removes all entries from the cache."""
+        for table in self._tables.values():
+            table.clear()
+        self._size = 0
+
+    def save(self, filename: str) -> None:
+        """Writes the cache (without fault descriptions) to filename."""
+        records = array.array("Q")
+        for shift, table in self._tables.items():
+            for key, (entry, position, fault) in table.items():
+                records.extend(
+                    [shift, key, entry, (position << 1) | (fault is not None)]
+                )
+        if sys.byteorder != "little":
+            records.byteswap()
+        directory = os.path.dirname(filename)
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=directory, prefix=".translation_", delete=False
+        ) as fp:
+            fp.write(self._file_magic)
+            records.tofile(fp)
+        os.replace(fp.name, filename)
+        self.modified = False
+
+    def load(self, filename: str) -> None:
+        """Populates the cache from a file written by :meth:`save`."""
+        with open(filename, "rb") as fp:
+            if fp.read(len(self._file_magic)) != self._file_magic:
+                raise ValueError(f"Invalid translation cache file: {filename}")
+            records = array.array("Q")
+            records.frombytes(fp.read())
+        if sys.byteorder != "little":
+            records.byteswap()
+        for index in range(0, len(records) - 3, 4):
+            shift, key, entry, flags = records[index : index + 4]
+            table = self._tables.get(shift)
+            if table is None or len(self) >= self.maximum_size:
+                continue
+            fault = f"Page Fault at entry {hex(entry)} (cached)" if flags & 1 else None
+            if key not in table:
+                self._size += 1
+            table[key] = (entry, flags >> 1, fault)
+
 
 class Intel(linear.LinearlyMappedLayer):
     """Translation Layer for the Intel IA32 memory mapping."""
@@ -39,6 +166,10 @@ class Intel(linear.LinearlyMappedLayer):
     _maxphyaddr = 32
     _maxvirtaddr = _maxphyaddr
     _structure = [("page directory", 10, False), ("page table", 10, True)]
+    # Every layer (including each process layer) has a small cache, which grows
+    # for layers that modules (such as the kernel) are based on
+    _translation_cache_size = 0x1000
+    _module_translation_cache_size = 0x40000
     _direct_metadata = collections.ChainMap(
         {"architecture": "Intel32"},
         {"mapped": True},
@@ -58,6 +189,7 @@ class Intel(linear.LinearlyMappedLayer):
         self._base_layer = self.config["memory_layer"]
         self._swap_layers: List[str] = []
         self._page_map_offset = self.config["page_map_offset"]
+        self._translation_cache_file: Optional[str] = None
 
         # Assign constants
         self._initial_position = min(self._maxvirtaddr, self._bits_per_register) - 1
@@ -74,6 +206,134 @@ class Intel(linear.LinearlyMappedLayer):
 
         # These can vary depending on the type of space
         self._index_shift = math.ceil(math.log2(struct.calcsize(self._entry_format)))
+        self._table_format = (
+            self._entry_format[0] + str(self._entry_number) + self._entry_format[1:]
+        )
+
+    @functools.cached_property
+    def _translation_cache(self) -> TranslationCache:
+        """The per-layer cache of page table walks, loaded from disk if
+        persistent caching is enabled."""
+        # Walks can end (or fault) at any level, the shift is the number of bits that the level covers
+        positions = [self._initial_position]
+        for _, size, _ in self._structure:
+            positions.append(positions[-1] - size)
+        cache = TranslationCache(
+            [position + 1 for position in positions],
+            self.config.get("translation_cache_size", None)
+            or self._translation_cache_size,
+        )
+        if constants.PERSISTENT_LAYER_CACHE:
+            # The name is determined now, whilst the layers beneath are still open
+            filename = self._translation_cache_file = self._translation_cache_filename()
+            if filename and os.path.exists(filename):
+                try:
+                    cache.load(filename)
+                    vollog.debug(
+                        f"Loaded {len(cache)} cached translations for {self.name} from {filename}"
+                    )
+                except (OSError, ValueError) as excp:
+                    vollog.debug(f"Unable to load translation cache {filename}: {excp}")
+            _persistent_translation_layers.add(self)
+        return cache
+
+    def _translation_cache_filename(self) -> Optional[str]:
+        """Returns the filename for the persisted translation cache.
+
+        This is based on the layer type, the page map offset, a sample of the
+        image and the path, size and modification time of the files beneath
+        the layer.
+        """
+        try:
+            identifier = hashlib.sha256(
+                f"{self.__class__.__module__}.{self.__class__.__name__}-{self._page_map_offset}".encode()
+            )
+            seen: Set[str] = set()
+            pending = list(self.dependencies)
+            while pending:
+                layer_name = pending.pop(0)
+                if layer_name in seen or layer_name not in self._context.layers:
+                    continue
+                seen.add(layer_name)
+                layer = self._context.layers[layer_name]
+                location = layer.config.get("location", None)
+                if location and parse.urlparse(location).scheme == "file":
+                    path = request.url2pathname(parse.urlparse(location).path)
+                    try:
+                        stat = os.stat(path)
+                        identifier.update(
+                            f"{os.path.abspath(path)}-{stat.st_size}-"
+                            f"{stat.st_mtime_ns}".encode()
+                        )
+                    except OSError:
+                        pass
+                pending.extend(layer.dependencies)
+            base_layer = self._context.layers[self._base_layer]
+            identifier.update(str(base_layer.maximum_address).encode())
+            # The top-level table is specific to both the image and the address space
+            identifier.update(
+                base_layer.read(
+                    self._mask(self._page_map_offset, self._maxphyaddr - 1, 0),
+                    self.page_size,
+                    pad=True,
+                )
+            )
+        except exceptions.InvalidAddressException:
+            return None
+        return os.path.join(
+            constants.CACHE_PATH, f"translation_{identifier.hexdigest()}.cache"
+        )
+
+    @property
+    def translation_cache_statistics(self) -> Dict[str, int]:
+        """Returns the statistics (entries, hits and misses) for this layer's
+        translation cache."""
+        return self._translation_cache.statistics
+
+    def save_translation_cache(self) -> None:
+        """Writes the translation cache to the cache directory, if it has
+        changed since it was loaded.
+
+        Only the caches of layers that modules are based on (such as the
+        kernel) are written, rather than one for every process layer.
+        """
+        cache = self._translation_cache
+        vollog.log(
+            constants.LOGLEVEL_VVV,
+            f"Translation cache statistics for {self.name}: {cache.statistics}",
+        )
+        if not cache.modified:
+            return None
+        if not self._is_module_layer():
+            return None
+        filename = self._translation_cache_file
+        if filename:
+            try:
+                cache.save(filename)
+            except OSError as excp:
+                vollog.debug(f"Unable to save translation cache {filename}: {excp}")
+
+    def _is_module_layer(self) -> bool:
+        """Returns whether any module (such as the kernel) is based on this layer"""
+        return any(
+            module.layer_name == self.name for module in self._context.modules.values()
+        )
+
+    def _grow_translation_cache(self, cache: TranslationCache) -> None:
+        """Raises the maximum size of a full translation cache, unless a size
+        was configured, if the layer turns out to be a module layer"""
+        if (
+            cache.maximum_size < self._module_translation_cache_size
+            and self.config.get("translation_cache_size", None) is None
+            and self._is_module_layer()
+        ):
+            cache.maximum_size = self._module_translation_cache_size
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Do not pickle the translation cache, it is rebuilt in each process"""
+        state = self.__dict__.copy()
+        state.pop("_translation_cache", None)
+        return state
 
     @classproperty
     @functools.lru_cache
@@ -186,23 +446,50 @@ class Intel(linear.LinearlyMappedLayer):
 
         Returns the translated entry value
         """
-        # Setup the entry and how far we are through the offset
-        # Position maintains the number of bits left to process
-        # We or with 0x1 to ensure our page_map_offset is always valid
-        position = self._initial_position
-        entry = self._initial_entry
-
         if not (
             self.minimum_address <= (offset & self.address_mask) <= self.maximum_address
         ):
             raise exceptions.PagedInvalidAddressException(
                 self.name,
                 offset,
-                position + 1,
-                entry,
-                "Entry outside virtual address range: " + hex(entry),
+                self._initial_position + 1,
+                self._initial_entry,
+                "Entry outside virtual address range: " + hex(self._initial_entry),
             )
 
+        cache = self._translation_cache
+        cached = cache.lookup(offset)
+        if cached is not None:
+            entry, position, fault = cached
+            if fault is not None:
+                raise exceptions.PagedInvalidAddressException(
+                    self.name, offset, position + 1, entry, fault
+                )
+            return entry, position
+
+        if len(cache) >= cache.maximum_size:
+            self._grow_translation_cache(cache)
+        try:
+            entry, position = self._walk_page_tables(offset)
+        except exceptions.PagedInvalidAddressException as excp:
+            cache.store(offset, excp.entry, excp.invalid_bits - 1, str(excp))
+            raise
+        cache.store(offset, entry, position)
+        return entry, position
+
+    def _walk_page_tables(self, offset: int) -> Tuple[int, int]:
+        """Walks the page tables for an offset, without consulting the
+        translation cache.
+
+        Returns the final entry and the position at which the walk
+        finished
+        """
+        # Setup the entry and how far we are through the offset
+        # Position maintains the number of bits left to process
+        # We or with 0x1 to ensure our page_map_offset is always valid
+        position = self._initial_position
+        entry = self._initial_entry
+
         # Run through the offset in various chunks
         for name, size, large_page in self._structure:
             # Check we're valid
@@ -338,8 +625,125 @@ class Intel(linear.LinearlyMappedLayer):
         mappings.
 
         This allows translation layers to provide maps of contiguous
-        regions in one layer
+        regions in one layer.  Large regions that ignore errors are
+        enumerated by walking the page tables once, rather than page by
+        page.
+        """
+        if ignore_errors and length >= self.page_size * self._entry_number:
+            yield from self._table_mapping(offset, length)
+        else:
+            yield from self._page_mapping(offset, length, ignore_errors)
+
+    def _table_mapping(
+        self, offset: int, length: int
+    ) -> Iterable[Tuple[int, int, int, int, str]]:
+        """Returns the same mappings as :meth:`_page_mapping` with ignore_errors
+        set, but by walking the page tables top-down once, decoding whole
+        tables at a time and skipping empty entries without raising
+        exceptions."""
+        # Offsets beyond the virtual address space wrap, since only the lower bits are used to walk the tables
+        window_size = 1 << (self._initial_position + 1)
+        end = offset + length
+        while offset < end:
+            window_base = offset - (offset % window_size)
+            window_end = min(end, window_base + window_size)
+            yield from self._walk_tables(
+                self._initial_entry,
+                self._initial_position,
+                0,
+                window_base,
+                offset,
+                window_end,
+            )
+            offset = window_end
+
+    def _walk_tables(
+        self,
+        entry: int,
+        position: int,
+        level: int,
+        region_start: int,
+        start: int,
+        end: int,
+    ) -> Iterable[Tuple[int, int, int, int, str]]:
+        """Yields the mappings between start and end, within the region
+        (covering position + 1 bits from region_start) described by entry,
+        which points to a table at the given level of the structure."""
+        _, size, large_page = self._structure[level]
+        if not self._page_is_valid(entry):
+            yield from self._invalid_entry_mapping(entry, start, end)
+            return None
+        if large_page and (entry & self._PAGE_PSE):
+            if entry & self._PAGE_PAT_LARGE:
+                entry -= self._PAGE_PAT_LARGE
+            yield from self._entry_mapping(entry, position, start, end)
+            return None
+
+        position -= size
+        base_address = self._mask(entry, self._maxphyaddr - 1, size + self._index_shift)
+        try:
+            table = self._get_valid_table(base_address)
+        except exceptions.InvalidAddressException:
+            table = None
+        if table is None:
+            return None
+        entries = struct.unpack(self._table_format, table)
+
+        child_size = 1 << (position + 1)
+        first_index = (start - region_start) >> (position + 1)
+        last_index = (end - 1 - region_start) >> (position + 1)
+        is_leaf = level + 1 == len(self._structure)
+        for index in range(first_index, last_index + 1):
+            child = entries[index]
+            if not child:
+                continue
+            child_start = region_start + index * child_size
+            child_range = (max(start, child_start), min(end, child_start + child_size))
+            if not is_leaf:
+                yield from self._walk_tables(
+                    child, position, level + 1, child_start, *child_range
+                )
+            elif self._page_is_valid(child):
+                yield from self._entry_mapping(child, position, *child_range)
+            else:
+                yield from self._invalid_entry_mapping(child, *child_range)
+
+    def _entry_mapping(
+        self, entry: int, position: int, start: int, end: int
+    ) -> Iterable[Tuple[int, int, int, int, str]]:
+        """Yields the mappings between start and end for a valid final entry,
+        skipping any portions that are not valid in the base layer in the same
+        way that :meth:`_page_mapping` does."""
+        page_size = 1 << (position + 1)
+        page_frame = self._pte_pfn(entry) << self.page_shift
+        small_page_mask = (1 << self._page_size_in_bits) - 1
+        base_layer = self._context.layers[self._base_layer]
+        offset = start
+        while offset < end:
+            chunk_offset = page_frame | self._mask(offset, position, 0)
+            chunk_size = min(page_size - (chunk_offset % page_size), end - offset)
+            if base_layer.is_valid(chunk_offset, chunk_size):
+                yield offset, chunk_size, chunk_offset, chunk_size, self._base_layer
+                offset += chunk_size
+            else:
+                offset += small_page_mask + 1 - (offset & small_page_mask)
+
+    def _invalid_entry_mapping(
+        self, entry: int, start: int, end: int
+    ) -> Iterable[Tuple[int, int, int, int, str]]:
+        """Yields the mappings for a region whose entry is not valid.
+
+        Empty entries map nothing, but others may still be mapped
+        elsewhere (such as into swap), so are translated individually
         """
+        if entry:
+            yield from self._page_mapping(start, end - start, True)
+
+    def _page_mapping(
+        self, offset: int, length: int, ignore_errors: bool = False
+    ) -> Iterable[Tuple[int, int, int, int, str]]:
+        """Returns a sorted iterable of (offset, sublength, mapped_offset, mapped_length, layer)
+        mappings, translating each page in turn."""
         if length == 0:
             try:
                 mapped_offset, _, layer_name = self._translate(offset)
@@ -398,6 +802,11 @@ class Intel(linear.LinearlyMappedLayer):
             requirements.IntRequirement(name="page_map_offset", optional=False),
             requirements.IntRequirement(name="kernel_virtual_offset", optional=True),
             requirements.StringRequirement(name="kernel_banner", optional=True),
+            requirements.IntRequirement(
+                name="translation_cache_size",
+                description="Maximum number of cached page table walks",
+                optional=True,
+            ),
         ]
 
 
@@ -26,6 +26,7 @@ class LimeLayer(segmented.SegmentedLayer):
     # Magic[4], Version[4], Start[8], End[8], Reserved[8]
     # XXX move this to a custom SymbolSpace?
     _header_struct = struct.Struct("<IIQQQ")
+    _persist_segments = True
 
     def __init__(
         self, context: interfaces.context.ContextInterface, config_path: str, name: str
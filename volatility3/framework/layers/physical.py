@@ -1,7 +1,10 @@
 # This file is Copyright 2019 Volatility Foundation and licensed under the Volatility Software License 1.0
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
+import io
 import logging
+import mmap
+import os
 import threading
 from typing import Any, Dict, IO, List, Optional, Union
 
@@ -84,7 +87,12 @@ class DummyLock:
 
 
 class FileLayer(interfaces.layers.DataLayerInterface):
-    """a DataLayer backed by a file on the filesystem."""
+    """a DataLayer backed by a file on the filesystem.
+
+    Local, uncompressed files are memory mapped (unless the `memory_map` option is disabled), which
+    allows reads to be serviced without taking the file lock.  Any file that cannot be mapped
+    (remote, compressed or otherwise non-seekable resources) falls back to locked seek/read access.
+    """
 
     def __init__(
         self,
@@ -103,6 +111,9 @@ class FileLayer(interfaces.layers.DataLayerInterface):
         self._file_: Optional[IO[Any]] = None
         self._size: Optional[int] = None
         self._maximum_address: Optional[int] = None
+        self._use_mmap = self.config.get("memory_map", True)
+        self._mmap_: Optional[mmap.mmap] = None
+        self._mmap_failed = False
         # Construct the lock now (shared if made before threading) in case we ever need it
         self._lock: Union[DummyLock, threading.Lock] = DummyLock()
         if constants.PARALLELISM == constants.Parallelism.Threading:
@@ -124,12 +135,51 @@ class FileLayer(interfaces.layers.DataLayerInterface):
         self._file_ = self._file_ or self._accessor.open(self._location, mode)
         return self._file_
 
+    @property
+    def _mmap(self) -> Optional[mmap.mmap]:
+        """Property to lazily construct a read-only memory map of the file,
+        returns None if the file cannot be mapped"""
+        if self._mmap_ is None and self._use_mmap and not self._mmap_failed:
+            with self._lock:
+                if self._mmap_ is None and not self._mmap_failed:
+                    self._mmap_ = self._open_mmap()
+                    self._mmap_failed = self._mmap_ is None
+        return self._mmap_
+
+    def _open_mmap(self) -> Optional[mmap.mmap]:
+        """Attempts to memory map the underlying file.
+
+        Only plain local files can be mapped, decompressing or remote
+        file objects may expose the file descriptor of their (encoded)
+        source, so those must continue to use the file object.
+        """
+        # Files opened through urllib are wrapped, but expose the original file object
+        raw_file = getattr(self._file, "file", self._file)
+        if not isinstance(raw_file, (io.BufferedReader, io.FileIO)):
+            return None
+        try:
+            fileno = raw_file.fileno()
+            # Devices and empty files report no size and cannot be mapped
+            if os.fstat(fileno).st_size <= 0:
+                return None
+            return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, OverflowError) as excp:
+            vollog.log(
+                constants.LOGLEVEL_VVVV,
+                f"Unable to memory map {self._location}, using file reads: {excp}",
+            )
+        return None
+
     @property
     def maximum_address(self) -> int:
         """Returns the largest available address in the space."""
         # Zero based, so we return the size of the file minus 1
         if self._maximum_address:
             return self._maximum_address
+        if self._mmap is not None:
+            self._size = len(self._mmap)
+            self._maximum_address = self._size - 1
+            return self._maximum_address
         with self._lock:
             orig = self._file.tell()
             self._file.seek(0, 2)
@@ -162,10 +212,12 @@ class FileLayer(interfaces.layers.DataLayerInterface):
                 self.name, invalid_address, "Offset outside of the buffer boundaries"
             )
 
-        # TODO: implement locking for multi-threading
-        with self._lock:
-            self._file.seek(offset)
-            data = self._file.read(length)
+        if self._mmap is not None:
+            data = self._mmap[offset : offset + length]
+        else:
+            with self._lock:
+                self._file.seek(offset)
+                data = self._file.read(length)
 
         if len(data) < length:
             if pad:
@@ -207,11 +259,19 @@ class FileLayer(interfaces.layers.DataLayerInterface):
 
         This is necessary for multi-processing
         """
-        self._file_ = None
-        return self.__dict__
+        state = self.__dict__.copy()
+        state.update(_file_=None, _mmap_=None, _mmap_failed=False)
+        return state
 
     def destroy(self) -> None:
         """Closes the file handle."""
+        if self._mmap_ is not None:
+            try:
+                self._mmap_.close()
+            except BufferError:
+                # Views are still held on the mapping, it'll be closed when they are released
+                pass
+            self._mmap_ = None
         self._file.close()
 
     def __exit__(self, type, value, traceback) -> None:
@@ -219,4 +279,12 @@ class FileLayer(interfaces.layers.DataLayerInterface):
 
     @classmethod
     def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
-        return [requirements.StringRequirement(name="location", optional=False)]
+        return [
+            requirements.StringRequirement(name="location", optional=False),
+            requirements.BooleanRequirement(
+                name="memory_map",
+                description="Memory map local files for lock-free reads",
+                default=True,
+                optional=True,
+            ),
+        ]
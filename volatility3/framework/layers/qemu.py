@@ -37,6 +37,8 @@ class QemuSuspendLayer(segmented.NonLinearlySegmentedLayer):
     SEGMENT_FLAG_XBZRLE = 0x40
     SEGMENT_FLAG_HOOK = 0x80
 
+    _persist_segments = True
+
     # See https://qemu.readthedocs.io/en/latest/devel/memory.html for more info
     #
     # At least the following values could occur for devices using > 3-4 GB RAM:
@@ -355,6 +357,37 @@ class QemuSuspendLayer(segmented.NonLinearlySegmentedLayer):
                     self._name, f"QEMU unknown section encountered: {section_byte}"
                 )
 
+    def _segment_flags(self, segment: Tuple[int, int, int, int]) -> int:
+        return int(segment[0] in self._compressed)
+
+    def _restore_segment_flags(
+        self, segment: Tuple[int, int, int, int], flags: int
+    ) -> None:
+        if flags:
+            self._compressed.add(segment[0])
+
+    def _segment_index_state(self) -> Dict[str, Any]:
+        return {
+            "configuration": self._configuration,
+            "architecture": (
+                None if self._architecture is None else str(self._architecture)
+            ),
+            "pci_hole": [
+                self._pci_hole_minimum,
+                self._pci_hole_start,
+                self._pci_hole_end,
+            ],
+        }
+
+    def _restore_segment_index_state(self, state: Dict[str, Any]) -> None:
+        self._configuration = state["configuration"]
+        self._architecture = state["architecture"]
+        (
+            self._pci_hole_minimum,
+            self._pci_hole_start,
+            self._pci_hole_end,
+        ) = state["pci_hole"]
+
     def _fallback_determine_architecture(self) -> str:
         architecture_pattern = rb"pc-(i440fx|q35)-(\d{1,2}\.\d{1,2}|\w+[\d{1,2}\.]*)"
         default_suffix = "-2.0"
@@ -1,9 +1,27 @@
 # This file is Copyright 2019 Volatility Foundation and licensed under the Volatility Software License 1.0
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
+import array
 import contextlib
+import hashlib
+import json
 import logging
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+import os
+import struct
+import tempfile
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from urllib import parse, request
 
 from volatility3.framework import constants, exceptions, interfaces, objects
 from volatility3.framework.configuration import requirements
@@ -28,6 +46,11 @@ class RegistryInvalidIndex(exceptions.LayerException):
 
 
 class RegistryHive(linear.LinearlyMappedLayer):
+    _cell_map_unloaded = 0xFFFFFFFFFFFFFFFF
+    _cell_map_invalid = 0xFFFFFFFFFFFFFFFE
+    _cell_map_table_size = 512
+    _key_index_magic = b"VOLREGK\x01"
+
     def __init__(
         self,
         context: interfaces.context.ContextInterface,
@@ -54,6 +77,7 @@ class RegistryHive(linear.LinearlyMappedLayer):
             self._hive_offset,
         )
         self._cmhive_name = cmhive.get_name()
+        self._cell_maps: List[Optional[array.array]] = [None, None]
         self.hive = cmhive.Hive
 
         # TODO: Check the checksum
@@ -96,6 +120,21 @@ class RegistryHive(linear.LinearlyMappedLayer):
                 f"Exception when setting hive {self.name} max address, using {hex(self._maxaddr)}",
             )
 
+    @property
+    def hive(self) -> interfaces.objects.ObjectInterface:
+        """The _HHIVE for the registry hive."""
+        return self._hive
+
+    @hive.setter
+    def hive(self, value: interfaces.objects.ObjectInterface) -> None:
+        # The cell maps and key index were built from the previous hive, so are rebuilt
+        self._hive = value
+        self._cell_maps = [None, None]
+        self._subkey_index: Dict[int, List[Tuple[int, Optional[str]]]] = {}
+        self._key_paths: Dict[str, int] = {}
+        self._key_index_complete = False
+        self._key_index_loaded = False
+
     def _get_hive_maxaddr(self, volatile):
         return (
             self._hive_maxaddr_volatile if volatile else self._hive_maxaddr_non_volatile
@@ -166,6 +205,33 @@ class RegistryHive(linear.LinearlyMappedLayer):
             )
             return cell
 
+    def get_subkey_offsets(
+        self, node_offset: int, node: Optional[objects.StructType] = None
+    ) -> List[Tuple[int, Optional[str]]]:
+        """Returns the offset and casefolded name (or None if the name could
+        not be read) of each subkey of the key node at node_offset.
+
+        The subkey lists of each key are only walked the first time its
+        subkeys are requested, and are recorded in the hive's key index.
+        """
+        if not self._key_index_loaded:
+            self._key_index_loaded = True
+            if constants.PERSISTENT_LAYER_CACHE:
+                self._load_key_index()
+        subkeys = self._subkey_index.get(node_offset)
+        if subkeys is None:
+            if node is None:
+                node = self.get_node(node_offset - 4)
+            subkeys = []
+            for subkey in node.iterate_subkeys():
+                try:
+                    name = subkey.get_name().casefold()
+                except exceptions.InvalidAddressException:
+                    name = None
+                subkeys.append((subkey.vol.offset, name))
+            self._subkey_index[node_offset] = subkeys
+        return subkeys
+
     def get_key(
         self, key: str, return_list: bool = False
     ) -> Union[List[objects.StructType], objects.StructType]:
@@ -184,29 +250,71 @@ class RegistryHive(linear.LinearlyMappedLayer):
                 self.name,
                 f"Encountered {root_node.vol.type_name} instead of _CM_KEY_NODE",
             )
-        node_key = [root_node]
         if key.endswith("\\"):
             key = key[:-1]
         key_array = key.split("\\")
-        found_key: List[str] = []
-        while key_array and node_key:
-            subkeys = node_key[-1].get_subkeys()
-            for subkey in subkeys:
-                # registry keys are not case sensitive so compare likewise
-                # https://learn.microsoft.com/en-us/windows/win32/sysinfo/structure-of-the-registry
-                if subkey.get_name().casefold() == key_array[0].casefold():
-                    node_key = node_key + [subkey]
-                    found_key, key_array = found_key + [key_array[0]], key_array[1:]
-                    break
-            else:
-                node_key = []
-        if not node_key:
-            raise KeyError(
-                "Key {} not found under {}".format(key_array[0], "\\".join(found_key))
-            )
+        offsets = [root_node.vol.offset]
+        path = None
+        for depth, key_name in enumerate(key_array):
+            # registry keys are not case sensitive so compare likewise
+            # https://learn.microsoft.com/en-us/windows/win32/sysinfo/structure-of-the-registry
+            key_name = key_name.casefold()
+            path = key_name if path is None else path + "\\" + key_name
+            offset = self._key_paths.get(path)
+            if offset is None:
+                for subkey_offset, subkey_name in self.get_subkey_offsets(
+                    offsets[-1], root_node if depth == 0 else None
+                ):
+                    if subkey_name == key_name:
+                        offset = self._key_paths[path] = subkey_offset
+                        break
+                else:
+                    raise KeyError(
+                        "Key {} not found under {}".format(
+                            key_array[depth], "\\".join(key_array[:depth])
+                        )
+                    )
+            offsets.append(offset)
         if return_list:
-            return node_key
-        return node_key[-1]
+            return [root_node] + [self.get_node(offset - 4) for offset in offsets[1:]]
+        return self.get_node(offsets[-1] - 4)
+
+    def walk_keys(
+        self, node: Optional[objects.StructType] = None
+    ) -> Iterator[Tuple[Optional[str], int]]:
+        """Walks the registry tree (without recursion) from a given node,
+        yielding the casefolded path (or None if the name of the key or one of
+        its parents could not be read) and offset of each key node beneath it,
+        parents before their children.
+
+        Walking from the root indexes every key in the hive, so that later
+        lookups and walks do not need to read any subkey lists.
+        """
+        from_root = node is None
+        if node is None:
+            node = self.get_node(self.root_cell_offset)
+        seen: Set[int] = {node.vol.offset}
+        stack = [("", iter(self.get_subkey_offsets(node.vol.offset, node)))]
+        while stack:
+            path, subkeys = stack[-1]
+            for offset, name in subkeys:
+                if offset in seen:
+                    continue
+                seen.add(offset)
+                subkey_path = None
+                if path is not None and name is not None:
+                    subkey_path = path + "\\" + name if path else name
+                    if from_root:
+                        self._key_paths.setdefault(subkey_path, offset)
+                yield subkey_path, offset
+                stack.append((subkey_path, iter(self.get_subkey_offsets(offset))))
+                break
+            else:
+                stack.pop()
+        if from_root and not self._key_index_complete:
+            self._key_index_complete = True
+            if constants.PERSISTENT_LAYER_CACHE:
+                self._save_key_index()
 
     def visit_nodes(
         self,
@@ -215,11 +323,92 @@ class RegistryHive(linear.LinearlyMappedLayer):
     ) -> None:
         """Applies a callable (visitor) to all nodes within the registry tree
         from a given node."""
-        if not node:
-            node = self.get_node(self.root_cell_offset)
-        visitor(node)
-        for node in node.get_subkeys():
-            self.visit_nodes(visitor, node)
+        visitor(node or self.get_node(self.root_cell_offset))
+        for _path, offset in self.walk_keys(node or None):
+            visitor(self.get_node(offset - 4))
+
+    def _key_index_filename(self) -> str:
+        """Returns the filename for the persisted key index.
+
+        This is based on the hive's location, name, base block and storage
+        lengths, and the path, size and modification time of the files
+        beneath it.
+        """
+        identifier = hashlib.sha256(
+            f"{self._hive_offset}-{self.get_name()}-{self._hive_maxaddr_non_volatile}-"
+            f"{self._hive_maxaddr_volatile}".encode()
+        )
+        identifier.update(
+            self.context.layers.read(
+                self._base_block.vol.layer_name,
+                self._base_block.vol.offset,
+                0x200,
+                pad=True,
+            )
+        )
+        seen: Set[str] = set()
+        pending = [self._base_layer] + self.dependencies
+        while pending:
+            layer_name = pending.pop(0)
+            if layer_name in seen or layer_name not in self.context.layers:
+                continue
+            seen.add(layer_name)
+            layer = self.context.layers[layer_name]
+            location = layer.config.get("location", None)
+            if location and parse.urlparse(location).scheme == "file":
+                path = request.url2pathname(parse.urlparse(location).path)
+                with contextlib.suppress(OSError):
+                    stat = os.stat(path)
+                    identifier.update(
+                        f"{os.path.abspath(path)}-{stat.st_size}-"
+                        f"{stat.st_mtime_ns}".encode()
+                    )
+            pending.extend(layer.dependencies)
+        return os.path.join(
+            constants.CACHE_PATH, f"registry_{identifier.hexdigest()}.cache"
+        )
+
+    def _load_key_index(self) -> bool:
+        """Populates the key index from the persisted key index, returning
+        whether one could be loaded."""
+        try:
+            filename = self._key_index_filename()
+            if not os.path.exists(filename):
+                return False
+            with open(filename, "rb") as fp:
+                if fp.read(len(self._key_index_magic)) != self._key_index_magic:
+                    raise ValueError(f"Invalid key index file: {filename}")
+                subkey_index = json.loads(fp.read())
+        except (OSError, ValueError, exceptions.InvalidAddressException) as excp:
+            vollog.debug(f"Unable to load key index for {self.name}: {excp}")
+            return False
+        for node_offset, subkeys in subkey_index:
+            self._subkey_index[node_offset] = [
+                (offset, name) for offset, name in subkeys
+            ]
+        self._key_index_complete = True
+        vollog.debug(
+            f"Loaded {len(self._subkey_index)} keys for {self.name} from {filename}"
+        )
+        return True
+
+    def _save_key_index(self) -> None:
+        """Writes the key index to the cache directory, for later runs."""
+        data = json.dumps(list(self._subkey_index.items())).encode()
+        fp = None
+        try:
+            filename = self._key_index_filename()
+            with tempfile.NamedTemporaryFile(
+                "wb", dir=os.path.dirname(filename), prefix=".registry_", delete=False
+            ) as fp:
+                fp.write(self._key_index_magic)
+                fp.write(data)
+            os.replace(fp.name, filename)
+        except (OSError, exceptions.InvalidAddressException) as excp:
+            vollog.debug(f"Unable to save key index for {self.name}: {excp}")
+            if fp is not None:
+                with contextlib.suppress(OSError):
+                    os.remove(fp.name)
 
     @staticmethod
     def _mask(value: int, high_bit: int, low_bit: int) -> int:
@@ -270,6 +459,27 @@ class RegistryHive(linear.LinearlyMappedLayer):
                 self.name, "Mapping request for value greater than maxaddr"
             )
 
+        # The cell map is indexed by the directory and table indices together
+        cell_map = self._cell_maps[volatile]
+        if cell_map is None:
+            cell_map = self._cell_maps[volatile] = array.array(
+                "Q",
+                [self._cell_map_unloaded]
+                * ((self._get_hive_maxaddr(volatile) >> 12) + 1),
+            )
+        map_index = (offset & 0x7FFFFFFF) >> 12
+        block_offset = cell_map[map_index]
+        if block_offset == self._cell_map_unloaded:
+            self._load_cell_map_table(volatile, map_index >> 9)
+            block_offset = cell_map[map_index]
+        if block_offset == self._cell_map_invalid:
+            return self._translate_from_hive(offset, volatile)
+        return block_offset + (offset & 0xFFF)
+
+    def _translate_from_hive(self, offset: int, volatile: int) -> int:
+        """Translates a cell index by reading the hive's cell map entry for
+        it, for those parts of the cell map that could not be decoded in
+        bulk."""
         storage = self.hive.Storage[volatile]
         dir_index = self._mask(offset, 30, 21) >> 21
         table_index = self._mask(offset, 20, 12) >> 12
@@ -279,6 +489,50 @@ class RegistryHive(linear.LinearlyMappedLayer):
         entry = table.Table[table_index]
         return entry.get_block_offset() + suboffset
 
+    def _load_cell_map_table(self, volatile: int, dir_index: int) -> None:
+        """Decodes the block offsets of one table of the hive's two-level
+        cell map into the flat cell map for the storage.
+
+        Any table that cannot be read in one go is marked as invalid, and
+        its entries are translated individually from the hive.
+        """
+        cell_map = self._cell_maps[volatile]
+        start = dir_index * self._cell_map_table_size
+        count = min(self._cell_map_table_size, len(cell_map) - start)
+        try:
+            entries = self.hive.Storage[volatile].Map.Directory[dir_index].Table
+            entry_type = entries.vol.subtype
+            data = self.context.layers.read(
+                entries.vol.layer_name,
+                entries.vol.offset,
+                entry_type.size * count,
+            )
+        except exceptions.InvalidAddressException:
+            cell_map[start : start + count] = array.array(
+                "Q", [self._cell_map_invalid] * count
+            )
+            return None
+
+        formats = {1: "B", 2: "H", 4: "I", 8: "Q"}
+        members = entry_type.vol.members
+        if "PermanentBinAddress" in members and "BlockOffset" in members:
+            bin_offset, bin_type = members["PermanentBinAddress"]
+            block_offset, block_type = members["BlockOffset"]
+            bin_format = struct.Struct("<" + formats[bin_type.size])
+            block_format = struct.Struct("<" + formats[block_type.size])
+            for index in range(count):
+                base = index * entry_type.size
+                (bin_address,) = bin_format.unpack_from(data, base + bin_offset)
+                (block,) = block_format.unpack_from(data, base + block_offset)
+                cell_map[start + index] = (bin_address & ~0xF) + block
+        else:
+            address_offset, address_type = members["BlockAddress"]
+            address_format = struct.Struct("<" + formats[address_type.size])
+            for index in range(count):
+                (cell_map[start + index],) = address_format.unpack_from(
+                    data, index * entry_type.size + address_offset
+                )
+
     def mapping(
         self, offset: int, length: int, ignore_errors: bool = False
     ) -> Iterable[Tuple[int, int, int, int, str]]:
@@ -5,12 +5,15 @@ import re
 from typing import Generator, List, Tuple, Dict, Optional
 
 from volatility3.framework.interfaces import layers
+from volatility3.framework.layers.scanners import aho_corasick as aho_corasick
 from volatility3.framework.layers.scanners import multiregexp as multiregexp
 
 
 class BytesScanner(layers.ScannerInterface):
     thread_safe = True
 
+    accepts_buffer = True
+
     _required_framework_version = (2, 0, 0)
 
     def __init__(self, needle: bytes) -> None:
@@ -38,6 +41,8 @@ class RegExScanner(layers.ScannerInterface):
 
     thread_safe = True
 
+    accepts_buffer = True
+
     _required_framework_version = (2, 0, 0)
 
     def __init__(self, pattern: bytes, flags: int = re.DOTALL) -> None:
@@ -55,16 +60,56 @@ class RegExScanner(layers.ScannerInterface):
 
 
 class MultiStringScanner(layers.ScannerInterface):
+    """A scanner that searches for any of a list of byte strings, reporting
+    the leftmost (and then longest) non-overlapping matches.
+
+    The search engine can be chosen as one of the following, and otherwise
+    defaults to pyahocorasick where it is available, or else the regex for
+    fewer than automaton_threshold patterns and the pure python automaton
+    beyond that (where the regular expression becomes the bottleneck):
+
+    * regex - a regular expression built from a trie of the patterns
+    * aho-corasick - a pure python Aho-Corasick automaton
+    * pyahocorasick - the Aho-Corasick automaton from the pyahocorasick library
+    """
+
     thread_safe = True
 
+    accepts_buffer = True
+
     _required_framework_version = (2, 0, 0)
 
-    def __init__(self, patterns: List[bytes]) -> None:
+    engines = {
+        "aho-corasick": aho_corasick.AhoCorasick,
+        "pyahocorasick": aho_corasick.PyAhoCorasick,
+    }
+
+    automaton_threshold = 2000
+
+    def __init__(self, patterns: List[bytes], engine: Optional[str] = None) -> None:
         super().__init__()
+        if engine is None:
+            if aho_corasick.HAS_PYAHOCORASICK:
+                engine = "pyahocorasick"
+            elif len(patterns) >= self.automaton_threshold:
+                engine = "aho-corasick"
+            else:
+                engine = "regex"
+        if engine != "regex" and engine not in self.engines:
+            raise ValueError(f"Unknown multi-string search engine: {engine}")
+        self.engine = engine
         self._pattern_trie: Optional[Dict[int, Optional[Dict]]] = {}
-        for pattern in patterns:
-            self._process_pattern(pattern)
-        self._regex = self._process_trie(self._pattern_trie)
+        self._regex = b""
+        self._automaton: Optional[aho_corasick.AhoCorasick] = None
+        if engine == "regex":
+            for pattern in patterns:
+                self._process_pattern(pattern)
+            self._regex = self._process_trie(self._pattern_trie)
+        elif patterns:
+            self._automaton = self.engines[engine]()
+            for pattern in patterns:
+                self._automaton.add_pattern(pattern)
+            self._automaton.preprocess()
 
     def _process_pattern(self, value: bytes) -> None:
         trie = self._pattern_trie
@@ -128,8 +173,11 @@ class MultiStringScanner(layers.ScannerInterface):
                 yield offset + data_offset, pattern
 
     def search(self, haystack: bytes) -> Generator[Tuple[int, bytes], None, None]:
-        if not isinstance(haystack, bytes):
-            raise TypeError("Search haystack must be a byte string")
+        if not isinstance(haystack, (bytes, bytearray, memoryview)):
+            raise TypeError("Search haystack must be a bytes-like object")
+        if self._automaton is not None:
+            yield from self._automaton.search(haystack)
+            return None
         if not self._regex:
             raise ValueError(
                 "MultiRegexp cannot be used with an empty set of search strings"
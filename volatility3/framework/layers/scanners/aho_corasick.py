@@ -0,0 +1,130 @@
+# This file is Copyright 2026 Volatility Foundation and licensed under the Volatility Software License 1.0
+# which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
+#
+
+import collections
+from typing import Deque, Dict, Generator, Iterable, List, Tuple
+
+try:
+    import ahocorasick
+
+    HAS_PYAHOCORASICK = True
+except ImportError:
+    HAS_PYAHOCORASICK = False
+
+
+def leftmost_longest(
+    matches: Iterable[Tuple[int, int]], patterns: List[bytes]
+) -> Generator[Tuple[int, bytes], None, None]:
+    """Reduces (start, pattern index) matches to the leftmost, longest, non-
+    overlapping set of matches, as would be returned by a regular expression
+    search through the haystack."""
+    position = 0
+    for start, _, index in sorted(
+        (start, -len(patterns[index]), index) for start, index in matches
+    ):
+        if start >= position:
+            position = start + len(patterns[index])
+            yield start, patterns[index]
+
+
+class AhoCorasick:
+    """Algorithm for multi-string matching using an Aho-Corasick automaton.
+
+    Results match those of a regular expression search for the
+    patterns, the leftmost and then longest pattern is returned, and
+    matches do not overlap.
+    """
+
+    def __init__(self) -> None:
+        self._pattern_strings: List[bytes] = []
+        self._goto: List[Dict[int, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self._lengths: List[int] = []
+
+    def add_pattern(self, pattern: bytes) -> None:
+        if not pattern:
+            raise ValueError("Cannot search for an empty pattern")
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(len(self._pattern_strings))
+        self._pattern_strings.append(pattern)
+
+    def preprocess(self) -> None:
+        if not self._pattern_strings:
+            raise ValueError("No strings to compile into an automaton")
+        self._lengths = [len(pattern) for pattern in self._pattern_strings]
+        # Breadth first, so that the failure state of every shorter prefix is known
+        queue: Deque[int] = collections.deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._output[next_state] = self._output[next_state] + self._output[fail]
+
+    def _matches(self, haystack: bytes) -> Generator[Tuple[int, int], None, None]:
+        goto, fail, output = self._goto, self._fail, self._output
+        lengths = self._lengths
+        state = 0
+        for position, char in enumerate(haystack):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                yield position - lengths[index] + 1, index
+
+    def search(self, haystack: bytes) -> Generator[Tuple[int, bytes], None, None]:
+        if not isinstance(haystack, (bytes, bytearray, memoryview)):
+            raise TypeError("Search haystack must be a bytes-like object")
+        if not self._pattern_strings:
+            raise ValueError(
+                "AhoCorasick cannot be used with an empty set of search strings"
+            )
+        yield from leftmost_longest(self._matches(haystack), self._pattern_strings)
+
+
+class PyAhoCorasick(AhoCorasick):
+    """Algorithm for multi-string matching using the pyahocorasick library's
+    Aho-Corasick automaton.
+
+    Bytes are mapped one-to-one onto latin-1 characters, since the
+    library generally operates on strings.
+    """
+
+    def __init__(self) -> None:
+        if not HAS_PYAHOCORASICK:
+            raise ImportError("pyahocorasick is not available")
+        super().__init__()
+        self._automaton = ahocorasick.Automaton()
+
+    def add_pattern(self, pattern: bytes) -> None:
+        if not pattern:
+            raise ValueError("Cannot search for an empty pattern")
+        key = pattern.decode("latin-1")
+        if key not in self._automaton:
+            self._automaton.add_word(key, len(self._pattern_strings))
+        self._pattern_strings.append(pattern)
+
+    def preprocess(self) -> None:
+        if not self._pattern_strings:
+            raise ValueError("No strings to compile into an automaton")
+        self._lengths = [len(pattern) for pattern in self._pattern_strings]
+        self._automaton.make_automaton()
+
+    def _matches(self, haystack: bytes) -> Generator[Tuple[int, int], None, None]:
+        for end, index in self._automaton.iter(bytes(haystack).decode("latin-1")):
+            yield end - self._lengths[index] + 1, index
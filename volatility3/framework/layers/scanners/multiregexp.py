@@ -22,8 +22,8 @@ class MultiRegexp:
         self._regex = re.compile(b"|".join(map(re.escape, self._pattern_strings)))
 
     def search(self, haystack: bytes) -> Generator[Tuple[int, bytes], None, None]:
-        if not isinstance(haystack, bytes):
-            raise TypeError("Search haystack must be a byte string")
+        if not isinstance(haystack, (bytes, bytearray, memoryview)):
+            raise TypeError("Search haystack must be a bytes-like object")
         if not self._regex.pattern:
             raise ValueError(
                 "MultiRegexp cannot be used with an empty set of search strings"
@@ -1,14 +1,135 @@
 # This file is Copyright 2019 Volatility Foundation and licensed under the Volatility Software License 1.0
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
+import array
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import tempfile
 from abc import ABCMeta, abstractmethod
 from bisect import bisect_right
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib import parse, request
 
-from volatility3.framework import exceptions, interfaces
+from volatility3.framework import constants, exceptions, interfaces
 from volatility3.framework.configuration import requirements
 from volatility3.framework.layers import linear
 
+vollog = logging.getLogger(__name__)
+
+
+class SegmentTable:
+    """A sorted table of (address, mapped address, length, mapped length)
+    segments, stored as columns of unsigned 64-bit integers.
+
+    The table can be built and read as though it were a list of segment
+    tuples, but takes a fraction of the memory for images with many
+    segments.  Lookups remember the last segment found, so that sequential
+    accesses generally avoid searching the table.
+    """
+
+    def __init__(self, segments: Iterable[Tuple[int, int, int, int]] = ()) -> None:
+        self._addresses = array.array("Q")
+        self._mapped_addresses = array.array("Q")
+        self._lengths = array.array("Q")
+        self._mapped_lengths = array.array("Q")
+        self._last_index = 0
+        self.extend(segments)
+
+    def append(self, segment: Tuple[int, int, int, int]) -> None:
+        address, mapped_address, length, mapped_length = segment
+        self._addresses.append(address)
+        self._mapped_addresses.append(mapped_address)
+        self._lengths.append(length)
+        self._mapped_lengths.append(mapped_length)
+
+    def extend(self, segments: Iterable[Tuple[int, int, int, int]]) -> None:
+        for segment in segments:
+            self.append(segment)
+
+    def __iadd__(self, segments: Iterable[Tuple[int, int, int, int]]) -> "SegmentTable":
+        self.extend(segments)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return (
+            self._addresses[index],
+            self._mapped_addresses[index],
+            self._lengths[index],
+            self._mapped_lengths[index],
+        )
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int, int]]:
+        return zip(
+            self._addresses,
+            self._mapped_addresses,
+            self._lengths,
+            self._mapped_lengths,
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        try:
+            return len(self) == len(other) and all(
+                tuple(mine) == tuple(theirs) for mine, theirs in zip(self, other)
+            )
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}: {len(self)} segments>"
+
+    def find(self, offset: int) -> int:
+        """Returns the index of the segment containing offset, or -1 if there
+        is no such segment."""
+        addresses = self._addresses
+        count = len(addresses)
+        index = self._last_index
+        if index < count and addresses[index] <= offset:
+            # Accesses tend to be sequential, so only search beyond the last segment
+            if index + 1 < count and addresses[index + 1] <= offset:
+                index = bisect_right(addresses, offset, index + 1) - 1
+        else:
+            index = bisect_right(addresses, offset) - 1
+        if index >= 0 and offset < addresses[index] + self._lengths[index]:
+            self._last_index = index
+            return index
+        return -1
+
+    def find_next(self, offset: int) -> int:
+        """Returns the index of the first segment starting after offset, or
+        -1 if there is no such segment."""
+        index = bisect_right(self._addresses, offset)
+        if index < len(self._addresses):
+            return index
+        return -1
+
+    def find_many(self, offsets: Iterable[int]) -> List[int]:
+        """Returns the index of the segment containing each of the offsets
+        (or -1 where there is none), in the order they were given.
+
+        The offsets are looked up in sorted order, so that each search of
+        the table starts where the last one finished.
+        """
+        offsets = list(offsets)
+        addresses, lengths = self._addresses, self._lengths
+        results = [-1] * len(offsets)
+        lower = 0
+        for position in sorted(range(len(offsets)), key=offsets.__getitem__):
+            offset = offsets[position]
+            lower = bisect_right(addresses, offset, lower)
+            index = lower - 1
+            if index >= 0 and offset < addresses[index] + lengths[index]:
+                results[position] = index
+        return results
+
 
 class NonLinearlySegmentedLayer(
     interfaces.layers.TranslationLayerInterface, metaclass=ABCMeta
@@ -17,8 +138,17 @@ class NonLinearlySegmentedLayer(
 
     In the documentation "mapped address" or "mapped offset" refers to
     an offset once it has been mapped to the underlying layer
+
+    Layers can opt in to having their segments stored in the cache directory
+    (when persistent layer caching is enabled), so that later runs against the
+    same image skip parsing the container's metadata.  Layers that hold state
+    derived from the metadata beyond the segments must also store and restore
+    it, through the _segment_flags and _segment_index_state methods.
     """
 
+    _persist_segments = False
+    _segment_index_magic = b"VOLSEG\x00\x01"
+
     def __init__(
         self,
         context: interfaces.context.ContextInterface,
@@ -31,11 +161,11 @@ class NonLinearlySegmentedLayer(
         )
 
         self._base_layer = self.config["base_layer"]
-        self._segments: List[Tuple[int, int, int, int]] = []
+        self._segments = SegmentTable()
         self._minaddr: Optional[int] = None
         self._maxaddr: Optional[int] = None
 
-        self._load_segments()
+        self._initialize_segments()
 
     @abstractmethod
     def _load_segments(self) -> None:
@@ -45,6 +175,149 @@ class NonLinearlySegmentedLayer(
         sorted by address when this method exits
         """
 
+    @property
+    def _segments(self) -> SegmentTable:
+        return self._segment_table
+
+    @_segments.setter
+    def _segments(self, segments: Iterable[Tuple[int, int, int, int]]) -> None:
+        """Stores the segments, which can be any iterable of segment tuples,
+        in a segment table."""
+        if not isinstance(segments, SegmentTable):
+            segments = SegmentTable(segments)
+        self._segment_table = segments
+
+    def _initialize_segments(self) -> None:
+        """Loads the segments, from the persisted segment index if there is
+        one, and otherwise from the container's metadata."""
+        persist = self._persist_segments and constants.PERSISTENT_LAYER_CACHE
+        if persist and self._load_segment_index():
+            return None
+        self._load_segments()
+        if persist:
+            self._save_segment_index()
+
+    def _segment_flags(self, segment: Tuple[int, int, int, int]) -> int:
+        """Returns an integer of layer specific information about a segment,
+        to be stored alongside it in the segment index."""
+        return 0
+
+    def _restore_segment_flags(
+        self, segment: Tuple[int, int, int, int], flags: int
+    ) -> None:
+        """Restores the information returned by _segment_flags for a segment
+        loaded from the segment index."""
+
+    def _segment_index_state(self) -> Dict[str, Any]:
+        """Returns any (JSON serializable) state beyond the segments that must
+        be stored in the segment index."""
+        return {}
+
+    def _restore_segment_index_state(self, state: Dict[str, Any]) -> None:
+        """Restores the state returned by _segment_index_state."""
+
+    def _segment_index_filename(self) -> str:
+        """Returns the filename for the persisted segment index.
+
+        This is based on the layer type, and the identity of the layers
+        beneath it: the path, size and modification time of any local files
+        and the size and a sample of the start and end of each layer.
+        """
+        identifier = hashlib.sha256(
+            f"{self.__class__.__module__}.{self.__class__.__name__}".encode()
+        )
+        sample_length = 0x1000
+        seen: Set[str] = set()
+        pending = list(self.dependencies)
+        while pending:
+            layer_name = pending.pop(0)
+            if layer_name in seen or layer_name not in self.context.layers:
+                continue
+            seen.add(layer_name)
+            layer = self.context.layers[layer_name]
+            location = layer.config.get("location", None)
+            if location:
+                parsed = parse.urlparse(location)
+                if parsed.scheme == "file":
+                    path = request.url2pathname(parsed.path)
+                    try:
+                        stat = os.stat(path)
+                        identifier.update(
+                            f"{os.path.abspath(path)}-{stat.st_size}-"
+                            f"{stat.st_mtime_ns}".encode()
+                        )
+                    except OSError:
+                        pass
+            identifier.update(
+                f"{layer.minimum_address}-{layer.maximum_address}".encode()
+            )
+            for offset in [
+                layer.minimum_address,
+                max(layer.minimum_address, layer.maximum_address + 1 - sample_length),
+            ]:
+                identifier.update(layer.read(offset, sample_length, pad=True))
+            pending.extend(layer.dependencies)
+        return os.path.join(
+            constants.CACHE_PATH, f"segments_{identifier.hexdigest()}.cache"
+        )
+
+    def _load_segment_index(self) -> bool:
+        """Populates the segments (and any other state) from the persisted
+        segment index, returning whether one could be loaded."""
+        try:
+            filename = self._segment_index_filename()
+            if not os.path.exists(filename):
+                return False
+            with open(filename, "rb") as fp:
+                if fp.read(len(self._segment_index_magic)) != self._segment_index_magic:
+                    raise ValueError(f"Invalid segment index file: {filename}")
+                (state_length,) = struct.unpack("<I", fp.read(4))
+                state = json.loads(fp.read(state_length))
+                records = array.array("Q")
+                records.frombytes(fp.read())
+        except (
+            OSError,
+            ValueError,
+            struct.error,
+            exceptions.InvalidAddressException,
+        ) as excp:
+            vollog.debug(f"Unable to load segment index for {self.name}: {excp}")
+            return False
+        if sys.byteorder != "little":
+            records.byteswap()
+        segments = SegmentTable()
+        for index in range(0, len(records) - 4, 5):
+            segment = tuple(records[index : index + 4])
+            segments.append(segment)
+            self._restore_segment_flags(segment, records[index + 4])
+        self._segments = segments
+        self._restore_segment_index_state(state)
+        vollog.debug(f"Loaded {len(segments)} segments for {self.name} from {filename}")
+        return True
+
+    def _save_segment_index(self) -> None:
+        """Writes the segments (and any other state) to the cache directory,
+        for later runs."""
+        records = array.array("Q")
+        for segment in self._segments:
+            records.extend(segment)
+            records.append(self._segment_flags(segment))
+        if sys.byteorder != "little":
+            records.byteswap()
+        state = json.dumps(self._segment_index_state()).encode()
+        try:
+            filename = self._segment_index_filename()
+            with tempfile.NamedTemporaryFile(
+                "wb", dir=os.path.dirname(filename), prefix=".segments_", delete=False
+            ) as fp:
+                fp.write(self._segment_index_magic)
+                fp.write(struct.pack("<I", len(state)))
+                fp.write(state)
+                records.tofile(fp)
+            os.replace(fp.name, filename)
+        except (OSError, exceptions.InvalidAddressException) as excp:
+            vollog.debug(f"Unable to save segment index for {self.name}: {excp}")
+
     def is_valid(self, offset: int, length: int = 1) -> bool:
         """Returns whether the address offset can be translated to a valid
         address."""
@@ -68,18 +341,12 @@ class NonLinearlySegmentedLayer(
         if not self._segments:
             self._load_segments()
 
-        # Find rightmost value less than or equal to x
-        i = bisect_right(
-            self._segments,
-            (offset, self.context.layers[self._base_layer].maximum_address),
-        )
-        if i and not next:
-            segment = self._segments[i - 1]
-            if segment[0] <= offset < segment[0] + segment[2]:
-                return segment
         if next:
-            if i < len(self._segments):
-                return self._segments[i]
+            index = self._segments.find_next(offset)
+        else:
+            index = self._segments.find(offset)
+        if index >= 0:
+            return self._segments[index]
         raise exceptions.InvalidAddressException(
             self.name, offset, f"Invalid address at {offset:0x}"
         )
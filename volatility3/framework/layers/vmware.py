@@ -22,6 +22,7 @@ class VmwareFormatException(exceptions.LayerException):
 class VmwareLayer(segmented.SegmentedLayer):
     header_structure = "<4sII"
     group_structure = "64sQQ"
+    _persist_segments = True
 
     def __init__(
         self,
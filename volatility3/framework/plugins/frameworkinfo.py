@@ -4,6 +4,7 @@
 
 from typing import List
 
+import volatility3.plugins
 from volatility3 import framework
 from volatility3.framework import interfaces, renderers
 from volatility3.framework.interfaces import plugins
@@ -19,6 +20,8 @@ class FrameworkInfo(plugins.PluginInterface):
         return []
 
     def _generator(self):
+        # The user interface may only have imported this plugin
+        framework.import_files(volatility3.plugins, True)
         categories = {
             "Automagic": interfaces.automagic.AutomagicInterface,
             "Requirement": interfaces.configuration.RequirementInterface,
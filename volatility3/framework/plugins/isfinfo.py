@@ -23,7 +23,7 @@ class IsfInfo(plugins.PluginInterface):
     """Determines information about the currently available ISF files, or a specific one"""
 
     _required_framework_version = (2, 0, 0)
-    _version = (2, 0, 0)
+    _version = (2, 0, 1)
 
     @classmethod
     def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
@@ -49,7 +49,7 @@ class IsfInfo(plugins.PluginInterface):
             requirements.VersionRequirement(
                 name="SQLiteCache",
                 component=symbol_cache.SqliteCache,
-                version=(1, 0, 0),
+                version=(1, 2, 0),
             ),
             requirements.BooleanRequirement(
                 name="live",
@@ -150,8 +150,8 @@ class IsfInfo(plugins.PluginInterface):
                 constants.CACHE_PATH, constants.IDENTIFIERS_FILENAME
             )
             cache = symbol_cache.SqliteCache(identifiers_path)
-            valid = "Unknown"
             for identifier, location in cache.get_identifier_dictionary().items():
+                valid = "Unknown"
                 (
                     num_bases,
                     num_types,
@@ -160,8 +160,11 @@ class IsfInfo(plugins.PluginInterface):
                 ) = cache.get_location_statistics(location)
                 if identifier:
                     json_hash = cache.get_hash(location)
-                    if json_hash and json_hash in schemas.cached_validations:
-                        valid = "True (cached)"
+                    cached_valid = (
+                        cache.get_validation(json_hash) if json_hash else None
+                    )
+                    if cached_valid is not None:
+                        valid = f"{cached_valid} (cached)"
                     if self.config["validate"]:
                         # Even if we're not live, if we've been explicitly asked to validate, then do-so
                         with resources.ResourceAccessor().open(url=location) as fp:
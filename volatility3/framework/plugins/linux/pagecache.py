@@ -455,39 +455,49 @@ class InodePages(plugins.PluginInterface):
             vollog.error("The inode is not a regular file")
             return None
 
-        # By using truncate/seek, provided the filesystem supports it, a sparse file will be
-        # created, saving both disk space and I/O time.
+        # Pages are written as file extents, which creates a sparse file provided the
+        # filesystem supports it, saving both disk space and I/O time. Adjacent pages
+        # are coalesced into larger reads and writes by the extent writer.
         # Additionally, using the page index will guarantee that each page is written at the
         # appropriate file position.
         inode_size = inode.i_size
         try:
-            file_initialized = False
             with open_method(filename) as file_obj:
-                for page_idx, page_content in inode.get_contents():
-                    current_fp = page_idx * vmlinux_layer.page_size
-                    max_length = inode_size - current_fp
-                    page_bytes_len = min(max_length, len(page_content))
-                    if (
-                        current_fp >= inode_size
-                        or current_fp + page_bytes_len > inode_size
-                    ):
-                        vollog.error(
-                            "Page out of file bounds: inode 0x%x, inode size %d, page index %d",
-                            inode.vol.offset,
-                            inode_size,
+                with interfaces.plugins.FileExtentWriter() as extent_writer:
+                    try:
+                        for (
                             page_idx,
-                        )
-                        continue
-                    page_bytes = page_content[:page_bytes_len]
-
-                    if not file_initialized:
-                        # Lazy initialization to avoid truncating the file until we are
-                        # certain there is something to write
-                        file_obj.truncate(inode_size)
-                        file_initialized = True
-
-                    file_obj.seek(current_fp)
-                    file_obj.write(page_bytes)
+                            layer_name,
+                            page_paddr,
+                            page_size,
+                        ) in inode.get_content_extents():
+                            current_fp = page_idx * vmlinux_layer.page_size
+                            max_length = inode_size - current_fp
+                            page_bytes_len = min(max_length, page_size)
+                            if (
+                                current_fp >= inode_size
+                                or current_fp + page_bytes_len > inode_size
+                            ):
+                                vollog.error(
+                                    "Page out of file bounds: inode 0x%x, inode size %d, page index %d",
+                                    inode.vol.offset,
+                                    inode_size,
+                                    page_idx,
+                                )
+                                continue
+
+                            extent_writer.write(
+                                file_obj,
+                                current_fp,
+                                vmlinux_layer.context.layers[layer_name],
+                                page_paddr,
+                                page_bytes_len,
+                            )
+                    finally:
+                        # Pages found before any error are still written out, and
+                        # the file is only extended to the inode size if there was
+                        # something to write
+                        extent_writer.finish(file_obj, inode_size)
         except exceptions.LinuxPageCacheException:
             vollog.error(
                 f"Error dumping cached pages for inode at {inode.vol.offset:#x}"
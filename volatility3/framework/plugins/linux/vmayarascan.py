@@ -18,7 +18,7 @@ class VmaYaraScan(interfaces.plugins.PluginInterface):
     """Scans all virtual memory areas for tasks using yara."""
 
     _required_framework_version = (2, 4, 0)
-    _version = (1, 0, 2)
+    _version = (1, 1, 0)
 
     @classmethod
     def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
@@ -30,6 +30,12 @@ class VmaYaraScan(interfaces.plugins.PluginInterface):
                 description="Process IDs to include (all other processes are excluded)",
                 optional=True,
             ),
+            requirements.IntRequirement(
+                name="chunk_size",
+                description="Scan each VMA in chunks of this size (16MB by default, rule "
+                "conditions only apply within a chunk)",
+                optional=True,
+            ),
             requirements.PluginRequirement(
                 name="pslist", plugin=pslist.PsList, version=(4, 0, 0)
             ),
@@ -39,6 +45,11 @@ class VmaYaraScan(interfaces.plugins.PluginInterface):
             requirements.VersionRequirement(
                 name="yarascanner", component=yarascan.YaraScanner, version=(2, 0, 0)
             ),
+            requirements.VersionRequirement(
+                name="process_yarascanner",
+                component=yarascan.ProcessYaraScanner,
+                version=(1, 0, 0),
+            ),
             requirements.ModuleRequirement(
                 name="kernel",
                 description="Linux kernel",
@@ -56,6 +67,23 @@ class VmaYaraScan(interfaces.plugins.PluginInterface):
         # use yarascan to parse the yara options provided and create the rules
         rules = yarascan.YaraScan.process_yara_options(dict(self.config))
 
+        scanner = yarascan.ProcessYaraScanner(
+            self.context, rules, self.config.get("chunk_size", None)
+        )
+        for pid, offset, rule_name, name, value in scanner.scan(
+            self._processes_to_scan()
+        ):
+            yield 0, (
+                format_hints.Hex(offset),
+                pid,
+                rule_name,
+                name,
+                value,
+            )
+
+    def _processes_to_scan(self) -> Iterable[Tuple[int, str, List[Tuple[int, int]]]]:
+        """Yields the process ID, process layer and VMAs to scan of each
+        task."""
         sanity_check = 1024 * 1024 * 1024  # 1 GB
 
         # filter based on the pid option if provided
@@ -71,10 +99,6 @@ class VmaYaraScan(interfaces.plugins.PluginInterface):
             if not proc_layer_name:
                 continue
 
-            # get the proc_layer object from the context
-            proc_layer = self.context.layers[proc_layer_name]
-
-            max_vma_size = 0
             vma_maps_to_scan = []
             for start, size in self.get_vma_maps(task):
                 if size > sanity_check:
@@ -82,28 +106,13 @@ class VmaYaraScan(interfaces.plugins.PluginInterface):
                         f"VMA at 0x{start:x} over sanity-check size, not scanning"
                     )
                     continue
-                max_vma_size = max(max_vma_size, size)
                 vma_maps_to_scan.append((start, size))
 
             if not vma_maps_to_scan:
                 vollog.warning(f"No VMAs were found for task {task.tgid}, not scanning")
                 continue
 
-            scanner = yarascan.YaraScanner(rules=rules)
-            scanner.chunk_size = max_vma_size
-
-            # scan the VMA data (in one contiguous block) with the yarascanner
-            for start, size in vma_maps_to_scan:
-                for offset, rule_name, name, value in scanner(
-                    proc_layer.read(start, size, pad=True), start
-                ):
-                    yield 0, (
-                        format_hints.Hex(offset),
-                        task.tgid,
-                        rule_name,
-                        name,
-                        value,
-                    )
+            yield int(task.tgid), proc_layer_name, vma_maps_to_scan
 
     @staticmethod
     def get_vma_maps(
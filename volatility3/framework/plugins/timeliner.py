@@ -3,16 +3,34 @@
 #
 
 import abc
+import contextlib
 import datetime
 import enum
+import heapq
 import io
 import json
 import logging
+import multiprocessing
+import multiprocessing.pool
+import os
+import pickle
+import shutil
+import tempfile
 import traceback
-from typing import Generator, Iterable, List, Optional, Tuple, Type
+from typing import IO, Any, Generator, Iterable, Iterator, List, Optional, Tuple, Type
 
+import volatility3.plugins
+import volatility3.symbols
 from volatility3 import framework
-from volatility3.framework import automagic, exceptions, interfaces, plugins, renderers
+from volatility3.framework import (
+    automagic,
+    constants,
+    contexts,
+    exceptions,
+    interfaces,
+    plugins,
+    renderers,
+)
 from volatility3.framework.configuration import requirements
 
 vollog = logging.getLogger(__name__)
@@ -45,11 +63,14 @@ class Timeliner(interfaces.plugins.PluginInterface):
     orders the results by time."""
 
     _required_framework_version = (2, 0, 0)
-    _version = (1, 1, 0)
+    _version = (1, 2, 0)
+
+    spill_rows = 0x10000
+    """The number of rows from a plugin that are sorted in memory before being
+    written to disk as a sorted run"""
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.timeline = {}
         self.usable_plugins = None
         self.automagics: Optional[List[interfaces.automagic.AutomagicInterface]] = None
 
@@ -57,7 +78,8 @@ class Timeliner(interfaces.plugins.PluginInterface):
     def get_usable_plugins(
         cls, selected_list: Optional[List[str]] = None
     ) -> List[Type]:
-        # Initialize for the run
+        # Initialize for the run, the user interface may only have imported this plugin
+        framework.import_files(volatility3.plugins, True)
         plugin_list = list(framework.class_subclasses(TimeLinerInterface))
 
         # Get the filter from the configuration
@@ -104,7 +126,8 @@ class Timeliner(interfaces.plugins.PluginInterface):
             ),
         ]
 
-    def _sort_function(self, item):
+    @staticmethod
+    def _sort_function(item):
         data = item[1]
 
         def sortable(timestamp):
@@ -120,36 +143,198 @@ class Timeliner(interfaces.plugins.PluginInterface):
     def _generator(
         self, runnable_plugins: List[TimeLinerInterface]
     ) -> Optional[Iterable[Tuple[int, Tuple]]]:
-        """Takes a timeline, sorts it and output the data from each relevant
-        row from each plugin."""
-        # Generate the results for each plugin
-        data = []
-
-        # Open the bodyfile now, so we can start outputting to it immediately
-        if self.config.get("create-bodyfile", True):
-            file_data = self.open("volatility.body")
-            fp = io.TextIOWrapper(file_data, write_through=True)
-        else:
-            file_data = None
-            fp = None
-
-        for plugin in runnable_plugins:
-            plugin_name = plugin.__class__.__name__
-            self._progress_callback(
-                (runnable_plugins.index(plugin) * 100) // len(runnable_plugins),
-                f"Running plugin {plugin_name}...",
-            )
-            try:
-                vollog.log(logging.INFO, f"Running {plugin_name}")
-                for item, timestamp_type, timestamp in plugin.generate_timeline():
-                    times = self.timeline.get((plugin_name, item), {})
-                    if times.get(timestamp_type, None) is not None:
+        """Runs each plugin, writing its rows to disk in sorted runs, and
+        then merges the runs into a single timeline."""
+        with tempfile.TemporaryDirectory(prefix="timeliner") as spill_dir:
+            results = self._run_plugins(runnable_plugins, spill_dir)
+
+            # Write out a body file if necessary (it doesn't need to be sorted)
+            if self._create_bodyfile:
+                with self.open("volatility.body") as file_data:
+                    for _, body_filename in results:
+                        if body_filename is not None:
+                            with open(body_filename, "rb") as body_fp:
+                                shutil.copyfileobj(body_fp, file_data)
+
+            with contextlib.ExitStack() as stack:
+                runs = [
+                    self._read_run(stack.enter_context(open(run_filename, "rb")))
+                    for run_filenames, _ in results
+                    for run_filename in run_filenames
+                ]
+                # Ties are broken by plugin and then by the order the plugin produced
+                # the rows, so the output is ordered as if all the rows were sorted together
+                for _, _, row in heapq.merge(*runs, key=self._run_sort_function):
+                    yield row
+
+    @property
+    def _create_bodyfile(self) -> bool:
+        return self.config.get("create-bodyfile", True)
+
+    @classmethod
+    def _run_sort_function(cls, entry: Tuple[int, int, Tuple[int, List]]):
+        index, sequence, row = entry
+        return cls._sort_function(row), index, sequence
+
+    def _run_plugins(
+        self, runnable_plugins: List[TimeLinerInterface], spill_dir: str
+    ) -> List[Tuple[List[str], Optional[str]]]:
+        """Runs each of the plugins, in parallel if parallelism is enabled,
+        returning the filenames of the sorted runs and body file entries
+        written by each plugin."""
+        results: List[Optional[Tuple[List[str], Optional[str]]]] = [None] * len(
+            runnable_plugins
+        )
+
+        if constants.PARALLELISM != constants.Parallelism.Off and runnable_plugins:
+            processes = min(os.cpu_count() or 1, len(runnable_plugins))
+            if constants.PARALLELISM == constants.Parallelism.Threading:
+                pool = multiprocessing.pool.ThreadPool(processes)
+            else:
+                pool = multiprocessing.Pool(
+                    processes,
+                    initializer=_timeline_worker_initialize,
+                    initargs=(
+                        list(volatility3.plugins.__path__),
+                        list(volatility3.symbols.__path__),
+                        constants.CACHE_PATH,
+                        constants.OFFLINE,
+                    ),
+                )
+            with pool:
+                pending = [
+                    self._run_plugin_async(pool, plugin, spill_dir, index)
+                    for index, plugin in enumerate(runnable_plugins)
+                ]
+                for index, plugin in enumerate(runnable_plugins):
+                    self._progress_callback(
+                        (index * 100) // len(runnable_plugins),
+                        f"Waiting for plugin {plugin.__class__.__name__}...",
+                    )
+                    try:
+                        if pending[index] is not None:
+                            results[index] = pending[index].get()
+                    except Exception as excp:
                         vollog.debug(
-                            f"Multiple timestamps for the same plugin/file combination found: {plugin_name} {item}"
+                            f"Parallel {plugin.__class__.__name__} failed: {excp}"
+                        )
+
+        for index, plugin in enumerate(runnable_plugins):
+            if results[index] is None:
+                # Run any plugins that were not (or could not be) run in parallel
+                self._progress_callback(
+                    (index * 100) // len(runnable_plugins),
+                    f"Running plugin {plugin.__class__.__name__}...",
+                )
+                results[index] = self._timeline_runs(
+                    plugin, spill_dir, index, self.spill_rows, self._create_bodyfile
+                )
+        return results
+
+    def _run_plugin_async(
+        self,
+        pool: multiprocessing.pool.Pool,
+        plugin: TimeLinerInterface,
+        spill_dir: str,
+        index: int,
+    ) -> Optional[multiprocessing.pool.AsyncResult]:
+        """Starts a worker running the plugin, reconstructed from its
+        configuration."""
+        try:
+            return pool.apply_async(
+                _timeline_worker,
+                (
+                    plugin.__class__,
+                    self.config_path,
+                    plugin.build_configuration(),
+                    spill_dir,
+                    index,
+                    self.spill_rows,
+                    self._create_bodyfile,
+                ),
+            )
+        except Exception as excp:
+            vollog.debug(
+                f"Unable to run {plugin.__class__.__name__} in parallel: {excp}"
+            )
+            return None
+
+    @classmethod
+    def _timeline_runs(
+        cls,
+        plugin: TimeLinerInterface,
+        spill_dir: str,
+        index: int,
+        spill_rows: int,
+        body: bool = False,
+    ) -> Tuple[List[str], Optional[str]]:
+        """Runs a plugin's timeline, writing its rows to spill_dir in sorted
+        runs of at most spill_rows, and (if body is set) its body file
+        entries to a file.
+
+        Each row holds the timestamps of its item seen so far, as the plugin
+        produces them.  So that the timestamps seen for every item needn't
+        be kept in memory, the plugin's events are first written out in runs
+        sorted by item, which are merged to combine each item's timestamps
+        one item at a time.
+
+        Returns:
+            The filenames of the runs, and of the body file entries (if any)
+        """
+        plugin_name = plugin.__class__.__name__
+        events = []
+        event_filenames = []
+        try:
+            vollog.log(logging.INFO, f"Running {plugin_name}")
+            for sequence, (item, timestamp_type, timestamp) in enumerate(
+                plugin.generate_timeline()
+            ):
+                # Descriptions may be volatility objects, which can't be pickled
+                events.append((str(item), sequence, timestamp_type, timestamp))
+                if len(events) >= spill_rows:
+                    event_filenames.append(
+                        cls._write_run(
+                            sorted(events, key=cls._event_sort_function),
+                            spill_dir,
+                            f"{index}-events-{len(event_filenames)}",
                         )
-                    times[timestamp_type] = timestamp
-                    self.timeline[(plugin_name, item)] = times
-                    data.append(
+                    )
+                    events = []
+        except Exception as e:
+            vollog.log(
+                logging.INFO,
+                f"Exception occurred running plugin: {plugin_name}: {e}",
+            )
+            vollog.log(logging.DEBUG, traceback.format_exc())
+
+        rows = []
+        run_filenames = []
+        body_lines = []
+        body_filenames = []
+        with contextlib.ExitStack() as stack:
+            runs = [
+                cls._read_run(stack.enter_context(open(event_filename, "rb")))
+                for event_filename in event_filenames
+            ]
+            runs.append(iter(sorted(events, key=cls._event_sort_function)))
+            events = []
+            last_item = None
+            times = {}
+            for item, sequence, timestamp_type, timestamp in heapq.merge(
+                *runs, key=cls._event_sort_function
+            ):
+                if item != last_item:
+                    last_item = item
+                    times = {}
+                if times.get(timestamp_type, None) is not None:
+                    vollog.debug(
+                        f"Multiple timestamps for the same plugin/file combination found: {plugin_name} {item}"
+                    )
+                times[timestamp_type] = timestamp
+                rows.append(
+                    (
+                        index,
+                        sequence,
                         (
                             0,
                             [
@@ -172,52 +357,104 @@ class Timeliner(interfaces.plugins.PluginInterface):
                                     renderers.NotApplicableValue(),
                                 ),
                             ],
+                        ),
+                    )
+                )
+                if len(rows) >= spill_rows:
+                    run_filenames.append(
+                        cls._write_run(
+                            sorted(rows, key=cls._run_sort_function),
+                            spill_dir,
+                            f"{index}-{len(run_filenames)}",
                         )
                     )
+                    rows = []
 
-                    # Write each entry because the body file doesn't need to be sorted
-                    if fp:
-                        times = self.timeline[(plugin_name, item)]
-                        # Body format is: MD5|name|inode|mode_as_string|UID|GID|size|atime|mtime|ctime|crtime
-
-                        if self._any_time_present(times):
-                            fp.write(
-                                "|{} - {}|0|0|0|0|0|{}|{}|{}|{}\n".format(
-                                    plugin_name,
-                                    self._sanitize_body_format(item),
-                                    self._text_format(
-                                        times.get(TimeLinerType.ACCESSED, "0")
-                                    ),
-                                    self._text_format(
-                                        times.get(TimeLinerType.MODIFIED, "0")
-                                    ),
-                                    self._text_format(
-                                        times.get(TimeLinerType.CHANGED, "0")
-                                    ),
-                                    self._text_format(
-                                        times.get(TimeLinerType.CREATED, "0")
-                                    ),
-                                )
+                # Body format is: MD5|name|inode|mode_as_string|UID|GID|size|atime|mtime|ctime|crtime
+                if body and cls._any_time_present(times):
+                    body_lines.append(
+                        (
+                            sequence,
+                            "|{} - {}|0|0|0|0|0|{}|{}|{}|{}\n".format(
+                                plugin_name,
+                                cls._sanitize_body_format(item),
+                                cls._text_format(
+                                    times.get(TimeLinerType.ACCESSED, "0")
+                                ),
+                                cls._text_format(
+                                    times.get(TimeLinerType.MODIFIED, "0")
+                                ),
+                                cls._text_format(times.get(TimeLinerType.CHANGED, "0")),
+                                cls._text_format(times.get(TimeLinerType.CREATED, "0")),
+                            ),
+                        )
+                    )
+                    if len(body_lines) >= spill_rows:
+                        body_filenames.append(
+                            cls._write_run(
+                                sorted(body_lines),
+                                spill_dir,
+                                f"{index}-body-{len(body_filenames)}",
                             )
-            except Exception as e:
-                vollog.log(
-                    logging.INFO,
-                    f"Exception occurred running plugin: {plugin_name}: {e}",
+                        )
+                        body_lines = []
+        if rows:
+            run_filenames.append(
+                cls._write_run(
+                    sorted(rows, key=cls._run_sort_function),
+                    spill_dir,
+                    f"{index}-{len(run_filenames)}",
                 )
-                vollog.log(logging.DEBUG, traceback.format_exc())
-
-        yield from sorted(data, key=self._sort_function)
-
-        # Write out a body file if necessary
-        if self.config.get("create-bodyfile", True):
-            if fp:
-                fp.close()
-                file_data.close()
+            )
+        for event_filename in event_filenames:
+            os.remove(event_filename)
+        if not body:
+            return run_filenames, None
+
+        # The body file entries are written in the order the plugin produced them
+        body_filename = os.path.join(spill_dir, f"{index}.body")
+        with contextlib.ExitStack() as stack:
+            runs = [
+                cls._read_run(stack.enter_context(open(body_run_filename, "rb")))
+                for body_run_filename in body_filenames
+            ]
+            runs.append(iter(sorted(body_lines)))
+            with open(body_filename, "w") as fp:
+                for _, line in heapq.merge(*runs):
+                    fp.write(line)
+        for body_run_filename in body_filenames:
+            os.remove(body_run_filename)
+        return run_filenames, body_filename
+
+    @staticmethod
+    def _event_sort_function(event: Tuple[str, int, TimeLinerType, Any]):
+        return event[0], event[1]
+
+    @staticmethod
+    def _write_run(entries: Iterable[Any], spill_dir: str, name: str) -> str:
+        """Writes the (already sorted) entries to a run file, returning its
+        name."""
+        run_filename = os.path.join(spill_dir, f"{name}.run")
+        with open(run_filename, "wb") as fp:
+            for entry in entries:
+                pickle.dump(entry, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        return run_filename
+
+    @staticmethod
+    def _read_run(fp: IO[bytes]) -> Iterator[Any]:
+        """Yields the entries of a run file."""
+        while True:
+            try:
+                yield pickle.load(fp)
+            except EOFError:
+                return None
 
-    def _sanitize_body_format(self, value):
+    @staticmethod
+    def _sanitize_body_format(value):
         return value.replace("|", "_")
 
-    def _any_time_present(self, times):
+    @staticmethod
+    def _any_time_present(times):
         for time in TimeLinerType:
             if not isinstance(
                 times.get(time, renderers.NotApplicableValue),
@@ -226,7 +463,8 @@ class Timeliner(interfaces.plugins.PluginInterface):
                 return True
         return False
 
-    def _text_format(self, value):
+    @staticmethod
+    def _text_format(value):
         """Formats a value as text, in case it is an AbsentValue"""
         if isinstance(value, interfaces.renderers.BaseAbsentValue):
             return "0"
@@ -328,3 +566,45 @@ class Timeliner(interfaces.plugins.PluginInterface):
         reconstructed."""
         vollog.warning("Unable to record configuration data for the timeliner plugin")
         return []
+
+
+def _timeline_worker_initialize(
+    plugin_paths: List[str], symbol_paths: List[str], cache_path: str, offline: bool
+) -> None:
+    """Sets up the global state of a worker process to match the parent's."""
+    volatility3.plugins.__path__ = plugin_paths
+    volatility3.symbols.__path__ = symbol_paths
+    constants.CACHE_PATH = cache_path
+    constants.OFFLINE = offline
+
+
+def _timeline_worker(
+    plugin_class: Type[interfaces.plugins.PluginInterface],
+    config_path: str,
+    plugin_config: interfaces.configuration.HierarchicalDict,
+    spill_dir: str,
+    index: int,
+    spill_rows: int,
+    body: bool,
+) -> Optional[Tuple[List[str], Optional[str]]]:
+    """Reconstructs a plugin in its own context from its configuration, and
+    writes its timeline to spill_dir, returning None if the plugin could not
+    be reconstructed."""
+    context = contexts.Context()
+    context.config.splice(
+        interfaces.configuration.path_join(config_path, plugin_class.__name__),
+        plugin_config,
+    )
+    try:
+        plugin = plugins.construct_plugin(
+            context,
+            automagic.choose_automagic(automagic.available(context), plugin_class),
+            plugin_class,
+            config_path,
+            None,
+            None,
+        )
+    except exceptions.UnsatisfiedException as excp:
+        vollog.debug(f"Unable to reconstruct {plugin_class.__name__}: {excp}")
+        return None
+    return Timeliner._timeline_runs(plugin, spill_dir, index, spill_rows, body)
@@ -28,7 +28,7 @@ class DumpFiles(interfaces.plugins.PluginInterface):
     """Dumps cached file contents from Windows memory samples."""
 
     _required_framework_version = (2, 0, 0)
-    _version = (1, 0, 0)
+    _version = (1, 1, 0)
 
     @classmethod
     def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
@@ -81,6 +81,7 @@ class DumpFiles(interfaces.plugins.PluginInterface):
         open_method: Type[interfaces.plugins.FileHandlerInterface],
         layer: interfaces.layers.DataLayerInterface,
         desired_file_name: str,
+        extent_writer: Optional[interfaces.plugins.FileExtentWriter] = None,
     ) -> Optional[interfaces.plugins.FileHandlerInterface]:
         """Produce a file from the memory object's get_available_pages() interface.
 
@@ -89,6 +90,7 @@ class DumpFiles(interfaces.plugins.PluginInterface):
         :param open_method: class for constructing output files
         :param layer: the memory layer to read from
         :param desired_file_name: name of the output file
+        :param extent_writer: the writer to queue the pages on, shared between files
         :return: result status
         """
         filedata = open_method(desired_file_name)
@@ -97,17 +99,20 @@ class DumpFiles(interfaces.plugins.PluginInterface):
         #   fileoffset: write to this offset in the destination file
         #   datasize: size of the page
 
-        # track number of bytes written so we don't write empty files to disk
-        bytes_written = 0
+        # The pages are coalesced into larger reads and writes by the writer
+        writer = extent_writer or interfaces.plugins.FileExtentWriter()
         try:
             for memoffset, fileoffset, datasize in memory_object.get_available_pages():
-                data = layer.read(memoffset, datasize, pad=True)
-                bytes_written += len(data)
-                filedata.seek(fileoffset)
-                filedata.write(data)
+                writer.write(filedata, fileoffset, layer, memoffset, datasize)
+            # track number of bytes written so we don't write empty files to disk
+            bytes_written = writer.finish(filedata)
         except exceptions.InvalidAddressException:
+            writer.discard(filedata)
             vollog.debug(f"Unable to dump file at {file_object.vol.offset:#x}")
             return None
+        finally:
+            if extent_writer is None:
+                writer.close()
         if not bytes_written:
             vollog.debug(
                 f"No data is cached for the file at {file_object.vol.offset:#x}"
@@ -124,6 +129,7 @@ class DumpFiles(interfaces.plugins.PluginInterface):
         primary_layer_name: str,
         open_method: Type[interfaces.plugins.FileHandlerInterface],
         file_obj: interfaces.objects.ObjectInterface,
+        extent_writer: Optional[interfaces.plugins.FileExtentWriter] = None,
     ) -> Generator[Tuple, None, None]:
         """Given a FILE_OBJECT, dump data to separate files for each of the three file caches.
 
@@ -131,6 +137,7 @@ class DumpFiles(interfaces.plugins.PluginInterface):
         :param primary_layer_name: primary/virtual layer to operate on
         :param open_method: class for constructing output files
         :param file_obj: the FILE_OBJECT
+        :param extent_writer: the writer to queue the pages of the files on
         """
         # Filtering by these types of devices prevents us from processing other types of devices that
         # use the "File" object type, such as \Device\Tcp and \Device\NamedPipe.
@@ -195,7 +202,12 @@ class DumpFiles(interfaces.plugins.PluginInterface):
             desired_file_name = f"file.{file_obj.vol.offset:#x}.{memory_object.vol.offset:#x}.{cache_name}.{ntpath.basename(obj_name)}.{extension}"
 
             file_handle = cls.dump_file_producer(
-                file_obj, memory_object, open_method, layer, desired_file_name
+                file_obj,
+                memory_object,
+                open_method,
+                layer,
+                desired_file_name,
+                extent_writer,
             )
 
             file_output = "Error dumping file"
@@ -219,42 +231,87 @@ class DumpFiles(interfaces.plugins.PluginInterface):
             flags = re.I if self.config["ignore-case"] else 0
             file_re = re.compile(self.config["filter"], flags)
 
-        if procs:
-            # The handles plugin doesn't expose any staticmethod/classmethod, and it also requires stashing
-            # private variables, so we need an instance (for now, anyway). We _could_ call Handles._generator()
-            # to do some of the other work that is duplicated here, but then we'd need to parse the TreeGrid
-            # results instead of just dealing with them as direct objects here.
-            handles_plugin = handles.Handles(
-                context=self.context, config_path=self._config_path
-            )
-            type_map = handles_plugin.get_type_map(
-                context=self.context,
-                layer_name=kernel.layer_name,
-                symbol_table=kernel.symbol_table_name,
-            )
-            cookie = handles_plugin.find_cookie(
-                context=self.context,
-                layer_name=kernel.layer_name,
-                symbol_table=kernel.symbol_table_name,
-            )
-
-            dumped_files = set()
+        with interfaces.plugins.FileExtentWriter() as extent_writer:
+            if procs:
+                # The handles plugin doesn't expose any staticmethod/classmethod, and it also requires stashing
+                # private variables, so we need an instance (for now, anyway). We _could_ call Handles._generator()
+                # to do some of the other work that is duplicated here, but then we'd need to parse the TreeGrid
+                # results instead of just dealing with them as direct objects here.
+                handles_plugin = handles.Handles(
+                    context=self.context, config_path=self._config_path
+                )
+                type_map = handles_plugin.get_type_map(
+                    context=self.context,
+                    layer_name=kernel.layer_name,
+                    symbol_table=kernel.symbol_table_name,
+                )
+                cookie = handles_plugin.find_cookie(
+                    context=self.context,
+                    layer_name=kernel.layer_name,
+                    symbol_table=kernel.symbol_table_name,
+                )
 
-            for proc in procs:
-                try:
-                    object_table = proc.ObjectTable
-                except exceptions.InvalidAddressException:
-                    vollog.log(
-                        constants.LOGLEVEL_VVV,
-                        f"Cannot access _EPROCESS.ObjectTable at {proc.vol.offset:#x}",
-                    )
-                    continue
+                dumped_files = set()
 
-                for entry in handles_plugin.handles(object_table):
+                for proc in procs:
                     try:
-                        obj_type = entry.get_object_type(type_map, cookie)
-                        if obj_type == "File":
-                            file_obj = entry.Body.cast("_FILE_OBJECT")
+                        object_table = proc.ObjectTable
+                    except exceptions.InvalidAddressException:
+                        vollog.log(
+                            constants.LOGLEVEL_VVV,
+                            f"Cannot access _EPROCESS.ObjectTable at {proc.vol.offset:#x}",
+                        )
+                        continue
+
+                    for entry in handles_plugin.handles(object_table):
+                        try:
+                            obj_type = entry.get_object_type(type_map, cookie)
+                            if obj_type == "File":
+                                file_obj = entry.Body.cast("_FILE_OBJECT")
+
+                                if file_re:
+                                    name = file_obj.file_name_with_device()
+                                    if isinstance(name, UnreadableValue):
+                                        continue
+                                    if not file_re.search(name):
+                                        continue
+
+                                if file_obj.vol.offset in dumped_files:
+                                    continue
+                                dumped_files.add(file_obj.vol.offset)
+
+                                for result in self.process_file_object(
+                                    self.context,
+                                    kernel.layer_name,
+                                    self.open,
+                                    file_obj,
+                                    extent_writer,
+                                ):
+                                    yield (0, result)
+                        except exceptions.InvalidAddressException:
+                            vollog.log(
+                                constants.LOGLEVEL_VVV,
+                                f"Cannot extract file from _OBJECT_HEADER at {entry.vol.offset:#x}",
+                            )
+
+                    # Pull file objects from the VADs. This will produce DLLs and EXEs that are
+                    # mapped into the process as images, but that the process doesn't have an
+                    # explicit handle remaining open to those files on disk.
+                    for vad in proc.get_vad_root().traverse():
+                        try:
+                            if vad.has_member("ControlArea"):
+                                # Windows xp and 2003
+                                file_obj = vad.ControlArea.FilePointer.dereference()
+                            elif vad.has_member("Subsection"):
+                                # Vista and beyond
+                                file_obj = vad.Subsection.ControlArea.FilePointer.dereference().cast(
+                                    "_FILE_OBJECT"
+                                )
+                            else:
+                                continue
+
+                            if not file_obj.is_valid():
+                                continue
 
                             if file_re:
                                 name = file_obj.file_name_with_device()
@@ -268,81 +325,50 @@ class DumpFiles(interfaces.plugins.PluginInterface):
                             dumped_files.add(file_obj.vol.offset)
 
                             for result in self.process_file_object(
-                                self.context, kernel.layer_name, self.open, file_obj
+                                self.context,
+                                kernel.layer_name,
+                                self.open,
+                                file_obj,
+                                extent_writer,
                             ):
                                 yield (0, result)
-                    except exceptions.InvalidAddressException:
-                        vollog.log(
-                            constants.LOGLEVEL_VVV,
-                            f"Cannot extract file from _OBJECT_HEADER at {entry.vol.offset:#x}",
-                        )
-
-                # Pull file objects from the VADs. This will produce DLLs and EXEs that are
-                # mapped into the process as images, but that the process doesn't have an
-                # explicit handle remaining open to those files on disk.
-                for vad in proc.get_vad_root().traverse():
-                    try:
-                        if vad.has_member("ControlArea"):
-                            # Windows xp and 2003
-                            file_obj = vad.ControlArea.FilePointer.dereference()
-                        elif vad.has_member("Subsection"):
-                            # Vista and beyond
-                            file_obj = vad.Subsection.ControlArea.FilePointer.dereference().cast(
-                                "_FILE_OBJECT"
+                        except exceptions.InvalidAddressException:
+                            vollog.log(
+                                constants.LOGLEVEL_VVV,
+                                f"Cannot extract file from VAD at {vad.vol.offset:#x}",
                             )
-                        else:
-                            continue
-
-                        if not file_obj.is_valid():
-                            continue
-
-                        if file_re:
-                            name = file_obj.file_name_with_device()
-                            if isinstance(name, UnreadableValue):
-                                continue
-                            if not file_re.search(name):
-                                continue
-
-                        if file_obj.vol.offset in dumped_files:
-                            continue
-                        dumped_files.add(file_obj.vol.offset)
 
+            elif offsets:
+                # Now process any offsets explicitly requested by the user.
+                for offset, is_virtual in offsets:
+                    try:
+                        layer_name = kernel.layer_name
+                        # switch to a memory layer if the user provided --physaddr instead of --virtaddr
+                        if not is_virtual:
+                            layer_name = self.context.layers[layer_name].config[
+                                "memory_layer"
+                            ]
+
+                        file_obj = self.context.object(
+                            kernel.symbol_table_name + constants.BANG + "_FILE_OBJECT",
+                            layer_name=layer_name,
+                            native_layer_name=kernel.layer_name,
+                            offset=offset,
+                        )
                         for result in self.process_file_object(
-                            self.context, kernel.layer_name, self.open, file_obj
+                            self.context,
+                            kernel.layer_name,
+                            self.open,
+                            file_obj,
+                            extent_writer,
                         ):
                             yield (0, result)
                     except exceptions.InvalidAddressException:
                         vollog.log(
                             constants.LOGLEVEL_VVV,
-                            f"Cannot extract file from VAD at {vad.vol.offset:#x}",
+                            f"Cannot extract file at {offset:#x}",
                         )
 
-        elif offsets:
-            # Now process any offsets explicitly requested by the user.
-            for offset, is_virtual in offsets:
-                try:
-                    layer_name = kernel.layer_name
-                    # switch to a memory layer if the user provided --physaddr instead of --virtaddr
-                    if not is_virtual:
-                        layer_name = self.context.layers[layer_name].config[
-                            "memory_layer"
-                        ]
-
-                    file_obj = self.context.object(
-                        kernel.symbol_table_name + constants.BANG + "_FILE_OBJECT",
-                        layer_name=layer_name,
-                        native_layer_name=kernel.layer_name,
-                        offset=offset,
-                    )
-                    for result in self.process_file_object(
-                        self.context, kernel.layer_name, self.open, file_obj
-                    ):
-                        yield (0, result)
-                except exceptions.InvalidAddressException:
-                    vollog.log(
-                        constants.LOGLEVEL_VVV, f"Cannot extract file at {offset:#x}"
-                    )
-
     def run(self):
         # a list of tuples (<int>, <bool>) where <int> is the address and <bool> is True for virtual.
         offsets = list()
@@ -2,9 +2,22 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 
+import array
 import enum
+import heapq
+import itertools
 import logging
-from typing import Dict, Generator, List, Optional, Tuple
+import struct
+import types
+import weakref
+from typing import (
+    Dict,
+    FrozenSet,
+    Generator,
+    List,
+    Optional,
+    Tuple,
+)
 
 from volatility3.framework import constants, interfaces, renderers, exceptions, symbols
 from volatility3.framework.configuration import requirements
@@ -54,7 +67,20 @@ class PoolConstraint:
         self.additional_structures = additional_structures
 
 
-class PoolHeaderScanner(interfaces.layers.ScannerInterface):
+class PoolHeaderOffsetScanner(interfaces.layers.ScannerInterface):
+    """Scans for pool headers whose tag, size, type and index match one of
+    the constraints, yielding the constraint and the offset of the header.
+
+    The header fields are decoded directly from the scanned data, using
+    the field offsets of the _POOL_HEADER type, so the scanner does not
+    touch the context and can be run in parallel.  Constructing the
+    _POOL_HEADER objects is left to the consumer.
+    """
+
+    thread_safe = True
+
+    accepts_buffer = True
+
     def __init__(
         self,
         module: interfaces.context.ModuleInterface,
@@ -62,73 +88,241 @@ class PoolHeaderScanner(interfaces.layers.ScannerInterface):
         alignment: int,
     ):
         super().__init__()
-        self._module = module
         self._constraint_lookup = constraint_lookup
         self._alignment = alignment
 
-        header_type = self._module.get_type("_POOL_HEADER")
+        header_type = module.get_type("_POOL_HEADER")
         self._header_offset = header_type.relative_child_offset("PoolTag")
+        self._fields = {
+            name: self._field_decoder(header_type, name)
+            for name in ["BlockSize", "PoolIndex", "PoolType"]
+        }
+        self._fields_length = max(
+            offset + struct.calcsize(field_format)
+            for offset, field_format, _, _ in self._fields.values()
+        )
+
+        # The type checks only depend on the value of PoolType, so precompute them
+        _, _, _, mask = self._fields["PoolType"]
+        self._pool_types = {
+            constraint.tag: self._matching_pool_types(
+                header_type.vol.object_class, constraint.page_type, mask
+            )
+            for constraint in constraint_lookup.values()
+            if constraint.page_type is not None
+        }
+
         self._subscanner = scanners.MultiStringScanner(
             [c for c in constraint_lookup.keys()]
         )
 
-    def __call__(self, data: bytes, data_offset: int):
-        for offset, pattern in self._subscanner(data, data_offset):
-            header = self._module.object(
-                object_type="_POOL_HEADER",
-                offset=offset - self._header_offset,
-                absolute=True,
-            )
-            constraint = self._constraint_lookup[pattern]
-            try:
-                # Size check
-                if constraint.size is not None:
-                    if constraint.size[0]:
-                        if (self._alignment * header.BlockSize) < constraint.size[0]:
-                            continue
-                    if constraint.size[1]:
-                        if (self._alignment * header.BlockSize) > constraint.size[1]:
-                            continue
+    @property
+    def header_offset(self) -> int:
+        """The offset of the PoolTag within a _POOL_HEADER."""
+        return self._header_offset
 
-                # Type check
-                if constraint.page_type is not None:
-                    checks_pass = False
-
-                    if (constraint.page_type & PoolType.FREE) and header.is_free_pool():
-                        checks_pass = True
-                    elif (
-                        constraint.page_type & PoolType.NONPAGED
-                    ) and header.is_nonpaged_pool():
-                        checks_pass = True
-                    elif (
-                        constraint.page_type & PoolType.PAGED
-                    ) and header.is_paged_pool():
-                        checks_pass = True
-
-                    if not checks_pass:
-                        continue
+    @property
+    def fields_length(self) -> int:
+        """The length of the start of a _POOL_HEADER needed to check it."""
+        return self._fields_length
 
-                if constraint.index is not None:
-                    if constraint.index[0]:
-                        if header.PoolIndex < constraint.index[0]:
-                            continue
-                    if constraint.index[1]:
-                        if header.PoolIndex > constraint.index[1]:
-                            continue
+    @staticmethod
+    def _field_decoder(
+        header_type: interfaces.objects.Template, name: str
+    ) -> Tuple[int, str, int, int]:
+        """Returns the offset, struct format, shift and mask needed to decode
+        an integer or bitfield member of a structure from its data."""
+        field = header_type.child_template(name)
+        shift = 0
+        if "base_type" in field.vol:
+            shift = field.vol.start_bit
+            mask = (1 << (field.vol.end_bit - field.vol.start_bit)) - 1
+            field = field.vol.base_type
+        else:
+            mask = (1 << (field.size * 8)) - 1
+        data_format = field.vol.data_format
+        struct_format = {1: "b", 2: "h", 4: "i", 8: "q"}[data_format.length]
+        if not data_format.signed:
+            struct_format = struct_format.upper()
+        struct_format = ("<" if data_format.byteorder == "little" else ">") + (
+            struct_format
+        )
+        return header_type.relative_child_offset(name), struct_format, shift, mask
 
-            except exceptions.InvalidAddressException:
-                # The tested object's header doesn't point to valid addresses, ignore it
+    @staticmethod
+    def _matching_pool_types(
+        header_class: type, page_type: PoolType, mask: int
+    ) -> FrozenSet[int]:
+        """Returns the PoolType values for which a header of header_class
+        would pass the page_type check."""
+        matching = set()
+        for value in range(mask + 1):
+            header = types.SimpleNamespace(PoolType=value)
+            if (
+                (page_type & PoolType.FREE and header_class.is_free_pool(header))
+                or (
+                    page_type & PoolType.NONPAGED
+                    and header_class.is_nonpaged_pool(header)
+                )
+                or (page_type & PoolType.PAGED and header_class.is_paged_pool(header))
+            ):
+                matching.add(value)
+        return frozenset(matching)
+
+    def _field(self, name: str, data: bytes, header_start: int) -> int:
+        offset, field_format, shift, mask = self._fields[name]
+        (value,) = struct.unpack_from(field_format, data, header_start + offset)
+        return (value >> shift) & mask
+
+    def header_data_matches(
+        self, constraint: PoolConstraint, data: bytes, header_start: int
+    ) -> bool:
+        """Determines whether the pool header starting at header_start within
+        data meets the size, type and index requirements of a constraint.
+
+        This is equivalent to header_matches, but operates purely on the data.
+
+        Args:
+            constraint: The constraint to test the header against
+            data: The data containing the pool header
+            header_start: The offset of the pool header within data
+
+        Returns:
+            Whether the header passes all the checks of the constraint
+        """
+        if header_start < 0 or header_start + self._fields_length > len(data):
+            return False
+
+        if constraint.size is not None:
+            size = self._alignment * self._field("BlockSize", data, header_start)
+            if constraint.size[0] and size < constraint.size[0]:
+                return False
+            if constraint.size[1] and size > constraint.size[1]:
+                return False
+
+        if constraint.page_type is not None:
+            pool_type = self._field("PoolType", data, header_start)
+            if pool_type not in self._pool_types[constraint.tag]:
+                return False
+
+        if constraint.index is not None:
+            index = self._field("PoolIndex", data, header_start)
+            if constraint.index[0] and index < constraint.index[0]:
+                return False
+            if constraint.index[1] and index > constraint.index[1]:
+                return False
+
+        return True
+
+    def __call__(
+        self, data: bytes, data_offset: int
+    ) -> Generator[Tuple[PoolConstraint, int], None, None]:
+        for offset, pattern in self._subscanner.search(data):
+            # Headers belong to the chunk they start in, their tag may be in the overlap
+            header_start = offset - self._header_offset
+            if header_start >= self.chunk_size:
                 continue
+            constraint = self._constraint_lookup[pattern]
+            if self.header_data_matches(constraint, data, header_start):
+                # We found one that passed!
+                yield (constraint, header_start + data_offset)
+
+    @staticmethod
+    def header_matches(
+        header: interfaces.objects.ObjectInterface,
+        constraint: PoolConstraint,
+        alignment: int,
+    ) -> bool:
+        """Determines whether a pool header meets the size, type and index
+        requirements of a constraint.
+
+        Args:
+            header: The _POOL_HEADER whose PoolTag matched the constraint's tag
+            constraint: The constraint to test the header against
+            alignment: The alignment (in bytes) of a pool block
+
+        Returns:
+            Whether the header passes all the checks of the constraint
+        """
+        try:
+            # Size check
+            if constraint.size is not None:
+                if constraint.size[0]:
+                    if (alignment * header.BlockSize) < constraint.size[0]:
+                        return False
+                if constraint.size[1]:
+                    if (alignment * header.BlockSize) > constraint.size[1]:
+                        return False
+
+            # Type check
+            if constraint.page_type is not None:
+                checks_pass = False
+
+                if (constraint.page_type & PoolType.FREE) and header.is_free_pool():
+                    checks_pass = True
+                elif (
+                    constraint.page_type & PoolType.NONPAGED
+                ) and header.is_nonpaged_pool():
+                    checks_pass = True
+                elif (constraint.page_type & PoolType.PAGED) and header.is_paged_pool():
+                    checks_pass = True
+
+                if not checks_pass:
+                    return False
+
+            if constraint.index is not None:
+                if constraint.index[0]:
+                    if header.PoolIndex < constraint.index[0]:
+                        return False
+                if constraint.index[1]:
+                    if header.PoolIndex > constraint.index[1]:
+                        return False
+
+        except exceptions.InvalidAddressException:
+            # The tested object's header doesn't point to valid addresses, ignore it
+            return False
+
+        return True
+
+
+class PoolHeaderScanner(PoolHeaderOffsetScanner):
+    """Scans for pool headers whose tag, size, type and index match one of
+    the constraints, yielding the constraint and the _POOL_HEADER object.
+
+    Constructing the objects uses the context, so unlike the
+    PoolHeaderOffsetScanner this scanner cannot be run in parallel.
+    """
+
+    thread_safe = False
 
-            # We found one that passed!
-            yield (constraint, header)
+    def __init__(
+        self,
+        module: interfaces.context.ModuleInterface,
+        constraint_lookup: Dict[bytes, PoolConstraint],
+        alignment: int,
+    ):
+        super().__init__(module, constraint_lookup, alignment)
+        self._module = module
+
+    def __call__(
+        self, data: bytes, data_offset: int
+    ) -> Generator[
+        Tuple[PoolConstraint, interfaces.objects.ObjectInterface], None, None
+    ]:
+        for constraint, offset in super().__call__(data, data_offset):
+            yield constraint, self._module.object(
+                object_type="_POOL_HEADER", offset=offset, absolute=True
+            )
 
 
 class PoolScanner(plugins.PluginInterface):
     """A generic pool scanner plugin."""
 
-    _version = (1, 0, 0)
-    _required_framework_version = (2, 0, 0)
+    _version = (1, 3, 0)
+    _required_framework_version = (2, 22, 0)
+
+    # Maps each scanned layer to the offsets of the headers that matched each constraint
+    _header_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
     @classmethod
     def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
@@ -181,6 +375,22 @@ class PoolScanner(plugins.PluginInterface):
                 ),
             )
 
+    shared_tags: Dict[str, Tuple[bytes, ...]] = {
+        "windows.callbacks.Callbacks": (
+            b"IoFs",
+            b"IoSh",
+            b"Cbrb",
+            b"DbCb",
+            b"Pnp9",
+            b"PnpD",
+            b"PnpC",
+        ),
+        "windows.netscan.NetScan": (b"TcpL", b"TcpE", b"UdpA", b"TTcb"),
+    }
+    """The pool tags that other plugins scan for (by plugin), which are searched
+    for along with the builtin constraints whenever a layer is scanned, so that
+    those plugins can be served from the cache rather than scanning again"""
+
     @staticmethod
     def builtin_constraints(
         symbol_table: str, tags_filter: Optional[List[bytes]] = None
@@ -366,15 +576,9 @@ class PoolScanner(plugins.PluginInterface):
             context=context, layer_name=layer_name, symbol_table=symbol_table
         )
 
-        is_windows_10 = versions.is_windows_10(context, symbol_table)
         is_windows_8_or_later = versions.is_windows_8_or_later(context, symbol_table)
 
-        # start off with the primary virtual layer
-        scan_layer = layer_name
-
-        # switch to a non-virtual layer if necessary
-        if not is_windows_10:
-            scan_layer = context.layers[scan_layer].config["memory_layer"]
+        scan_layer = cls.get_scan_layer(context, layer_name, symbol_table)
 
         if symbols.symbol_table_is_64bit(context, symbol_table):
             alignment = 0x10
@@ -417,6 +621,39 @@ class PoolScanner(plugins.PluginInterface):
 
                 yield constraint, mem_object, header
 
+    @classmethod
+    def get_scan_layer(
+        cls,
+        context: interfaces.context.ContextInterface,
+        layer_name: str,
+        symbol_table: str,
+    ) -> str:
+        """Returns the name of the layer that pools are scanned for within.
+
+        This is the primary virtual layer on Windows 10 and later, and the
+        physical layer beneath it on earlier versions.
+
+        Args:
+            context: The context to retrieve required elements (layers, symbol tables) from
+            layer_name: The name of the kernel's virtual layer
+            symbol_table: The name of the table containing the kernel symbols
+        """
+        if versions.is_windows_10(context, symbol_table):
+            return layer_name
+        return context.layers[layer_name].config["memory_layer"]
+
+    @staticmethod
+    def _constraint_key(constraint: PoolConstraint, alignment: int) -> Tuple:
+        """Returns the parts of a constraint that determine which pool headers
+        it matches, to cache the headers found for it by."""
+        return (
+            constraint.tag,
+            constraint.size,
+            constraint.page_type,
+            constraint.index,
+            alignment,
+        )
+
     @classmethod
     def pool_scan(
         cls,
@@ -434,6 +671,13 @@ class PoolScanner(plugins.PluginInterface):
         of the constraints provided.  Only one constraint can be provided per
         tag.
 
+        The headers found are cached against the layer, so that scanning for
+        constraints that have previously been scanned for does not read
+        through the layer again.  When a layer must be scanned, the builtin
+        constraints and the shared tags are searched for at the same
+        time, so that a single pass through the layer serves every pool
+        scanning plugin.
+
         Args:
             context: The context to retrieve required elements (layers, symbol tables) from
             layer_name: The name of the layer on which to operate
@@ -456,11 +700,67 @@ class PoolScanner(plugins.PluginInterface):
 
         pool_header_table_name = cls.get_pool_header_table(context, symbol_table)
         module = context.module(pool_header_table_name, layer_name, offset=0)
-
-        # Run the scan locating the offsets of a particular tag
         layer = context.layers[layer_name]
-        scanner = PoolHeaderScanner(module, constraint_lookup, alignment)
-        yield from layer.scan(context, scanner, progress_callback)
+        cached = cls._header_cache.setdefault(layer, {})
+
+        # Headers found for a constraint are final, those found for just the tag
+        # must still be checked against the constraint
+        sources = {}
+        for tag, constraint in constraint_lookup.items():
+            key = cls._constraint_key(constraint, alignment)
+            tag_key = cls._constraint_key(PoolConstraint(tag, ""), alignment)
+            if key in cached:
+                sources[tag] = (cached[key], True)
+            elif tag_key in cached:
+                sources[tag] = (cached[tag_key], False)
+
+        if len(sources) == len(constraint_lookup):
+            for offset, tag, checked in heapq.merge(
+                *[
+                    zip(offsets, itertools.repeat(tag), itertools.repeat(checked))
+                    for tag, (offsets, checked) in sorted(sources.items())
+                ]
+            ):
+                constraint = constraint_lookup[tag]
+                header = module.object(
+                    object_type="_POOL_HEADER", offset=offset, absolute=True
+                )
+                if checked or PoolHeaderOffsetScanner.header_matches(
+                    header, constraint, alignment
+                ):
+                    yield constraint, header
+            return None
+
+        scan_lookup = dict(constraint_lookup)
+        for constraint in cls.builtin_constraints(symbol_table):
+            if (
+                constraint.tag not in scan_lookup
+                and cls._constraint_key(constraint, alignment) not in cached
+            ):
+                scan_lookup[constraint.tag] = constraint
+        for tag in itertools.chain.from_iterable(cls.shared_tags.values()):
+            tag_constraint = PoolConstraint(tag, "")
+            if (
+                tag not in scan_lookup
+                and cls._constraint_key(tag_constraint, alignment) not in cached
+            ):
+                scan_lookup[tag] = tag_constraint
+        vollog.debug(f"Scanning {layer_name} for {len(scan_lookup)} pool tags")
+
+        found: Dict[bytes, array.array] = {tag: array.array("Q") for tag in scan_lookup}
+        scanner = PoolHeaderOffsetScanner(module, scan_lookup, alignment)
+        # Constraints may come back from worker processes as copies, so match by tag
+        for constraint, offset in layer.scan(context, scanner, progress_callback):
+            found[constraint.tag].append(offset)
+            if constraint.tag in constraint_lookup:
+                yield constraint_lookup[constraint.tag], module.object(
+                    object_type="_POOL_HEADER", offset=offset, absolute=True
+                )
+
+        # A scan that failed part way through must not be served from the cache
+        if scanner.scan_error is None:
+            for tag, offsets in found.items():
+                cached[cls._constraint_key(scan_lookup[tag], alignment)] = offsets
 
     @classmethod
     def get_pool_header_table(
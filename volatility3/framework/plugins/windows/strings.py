@@ -2,9 +2,14 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 
+import array
+import bisect
+import concurrent.futures
+import contextlib
 import logging
+import os
 import re
-from typing import Dict, Generator, List, Set, Tuple, Optional
+from typing import Dict, Generator, Iterable, List, Tuple, Optional
 
 from volatility3.framework import interfaces, renderers, exceptions, constants
 from volatility3.framework.configuration import requirements
@@ -15,10 +20,139 @@ from volatility3.plugins.windows import pslist
 vollog = logging.getLogger(__name__)
 
 
+class PhysicalReverseMap(interfaces.configuration.VersionableInterface):
+    """Maps physical addresses back to their owners (such as the kernel or a
+    process) and the virtual addresses at which each owner maps them.
+
+    Rather than recording each page, contiguous runs are stored as
+    (physical start, length, owner, virtual start) records in array columns,
+    which are sorted by physical address and binary searched.  Maps can be
+    built separately (for instance one per process, in parallel) and then
+    merged together.
+    """
+
+    _version = (1, 0, 0)
+    _required_framework_version = (2, 0, 0)
+
+    max_run_length = 0x10000
+    """Runs are split into pieces no longer than this, which bounds how far
+    before an address a lookup must search"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._owners: List[str] = []
+        self._owner_ids: Dict[str, int] = {}
+        self._physical = array.array("Q")
+        self._lengths = array.array("I")
+        self._owner_index = array.array("I")
+        self._virtual = array.array("Q")
+        self._sorted = True
+
+    def __len__(self) -> int:
+        return len(self._physical)
+
+    @property
+    def owners(self) -> List[str]:
+        """The owners that have runs in the map."""
+        return list(self._owners)
+
+    def _owner_id(self, owner: str) -> int:
+        owner_id = self._owner_ids.get(owner)
+        if owner_id is None:
+            owner_id = self._owner_ids[owner] = len(self._owners)
+            self._owners.append(owner)
+        return owner_id
+
+    def add_run(self, owner: str, physical: int, virtual: int, length: int) -> None:
+        """Records that owner maps length bytes of physical memory, starting
+        at physical, from the virtual address virtual."""
+        owner_id = self._owner_id(owner)
+        while length > 0:
+            piece = min(length, self.max_run_length)
+            self._physical.append(physical)
+            self._lengths.append(piece)
+            self._owner_index.append(owner_id)
+            self._virtual.append(virtual)
+            physical += piece
+            virtual += piece
+            length -= piece
+        self._sorted = False
+
+    def add_layer(
+        self,
+        owner: str,
+        layer: interfaces.layers.TranslationLayerInterface,
+        mapped_layer_name: Optional[str] = None,
+        progress_callback: constants.ProgressCallback = None,
+        description: Optional[str] = None,
+    ) -> None:
+        """Records every run of layer, as belonging to owner.
+
+        Args:
+            owner: the name of the owner of the layer
+            layer: the (virtual) layer to map
+            mapped_layer_name: if provided, only runs mapped to this layer are recorded
+            progress_callback: an optional callable to display progress
+            description: the description to provide to the progress callback
+        """
+        for offset, _, mapped_offset, mapped_size, map_layer in layer.mapping(
+            0x0, layer.maximum_address, ignore_errors=True
+        ):
+            if mapped_layer_name is None or map_layer == mapped_layer_name:
+                self.add_run(owner, mapped_offset, offset, mapped_size)
+            if progress_callback:
+                progress_callback(
+                    (offset * 100) / layer.maximum_address,
+                    description or f"Creating reverse map for {owner}",
+                )
+
+    def merge(self, other: "PhysicalReverseMap") -> None:
+        """Adds all the runs of another map to this one."""
+        owner_ids = [self._owner_id(owner) for owner in other._owners]
+        self._physical.extend(other._physical)
+        self._lengths.extend(other._lengths)
+        self._owner_index.extend(owner_ids[index] for index in other._owner_index)
+        self._virtual.extend(other._virtual)
+        self._sorted = self._sorted and not len(other)
+
+    def sort(self) -> None:
+        """Sorts the runs by physical address, this happens automatically
+        before the first lookup after runs have been added, but should be
+        called before the map is shared between threads."""
+        if self._sorted:
+            return None
+        order = sorted(range(len(self._physical)), key=self._physical.__getitem__)
+        for name in ["_physical", "_lengths", "_owner_index", "_virtual"]:
+            column = getattr(self, name)
+            setattr(
+                self, name, array.array(column.typecode, map(column.__getitem__, order))
+            )
+        self._sorted = True
+
+    def lookup(self, address: int) -> List[Tuple[str, int]]:
+        """Returns the (owner, virtual address) of every mapping of the
+        physical address."""
+        self.sort()
+        physical = self._physical
+        results = []
+        for index in range(
+            bisect.bisect_right(physical, address - self.max_run_length),
+            bisect.bisect_right(physical, address),
+        ):
+            if address < physical[index] + self._lengths[index]:
+                results.append(
+                    (
+                        self._owners[self._owner_index[index]],
+                        self._virtual[index] + address - physical[index],
+                    )
+                )
+        return results
+
+
 class Strings(interfaces.plugins.PluginInterface):
     """Reads output from the strings command and indicates which process(es) each string belongs to."""
 
-    _version = (1, 2, 0)
+    _version = (2, 0, 0)
     _required_framework_version = (2, 0, 0)
     strings_pattern = re.compile(rb"^(?:\W*)([0-9]+)(?:\W*)(\w[\w\W]+)\n?")
 
@@ -83,11 +217,10 @@ class Strings(interfaces.plugins.PluginInterface):
         num_strings = len(string_list)
         for offset, string in string_list:
             line_count += 1
-            try:
-                revmap_list = [
-                    name + ":" + hex(offset) for (name, offset) in revmap[offset >> 12]
-                ]
-            except (IndexError, KeyError):
+            revmap_list = [
+                name + ":" + hex(virtual) for (name, virtual) in revmap.lookup(offset)
+            ]
+            if not revmap_list:
                 revmap_list = ["FREE MEMORY"]
             yield (
                 0,
@@ -126,9 +259,9 @@ class Strings(interfaces.plugins.PluginInterface):
         symbol_table: str,
         progress_callback: constants.ProgressCallback = None,
         pid_list: Optional[List[int]] = None,
-    ) -> Dict[int, Set[Tuple[str, int]]]:
-        """Creates a reverse mapping between virtual addresses and physical
-        addresses.
+    ) -> "PhysicalReverseMap":
+        """Creates a reverse mapping between physical addresses and the
+        kernel and process virtual addresses that map them.
 
         Args:
             context: the context for the method to run against
@@ -138,61 +271,71 @@ class Strings(interfaces.plugins.PluginInterface):
             pid_list: a lit of process IDs to consider when generating the reverse map
 
         Returns:
-            A mapping of virtual offsets to strings and physical offsets
+            A map from physical addresses to the kernel or processes and the
+            virtual addresses at which they are mapped
         """
         filter = pslist.PsList.create_pid_filter(pid_list)
 
         layer = context.layers[layer_name]
-        reverse_map: Dict[int, Set[Tuple[str, int]]] = dict()
-        if isinstance(layer, intel.Intel):
-            # We don't care about errors, we just wanted chunks that map correctly
-            for mapval in layer.mapping(0x0, layer.maximum_address, ignore_errors=True):
-                offset, _, mapped_offset, mapped_size, maplayer = mapval
-                for val in range(mapped_offset, mapped_offset + mapped_size, 0x1000):
-                    cur_set = reverse_map.get(val >> 12, set())
-                    cur_set.add(("kernel", offset))
-                    reverse_map[val >> 12] = cur_set
+        reverse_map = PhysicalReverseMap()
+        if not isinstance(layer, intel.Intel):
+            return reverse_map
+        memory_layer_name = layer.config["memory_layer"]
+
+        reverse_map.add_layer(
+            "kernel",
+            layer,
+            memory_layer_name,
+            progress_callback=progress_callback,
+            description="Creating reverse kernel map",
+        )
+
+        # TODO: Include kernel modules
+
+        process_layers = []
+        for process in pslist.PsList.list_processes(
+            context, layer_name, symbol_table, filter_func=filter
+        ):
+            proc_id = "Unknown"
+            try:
+                proc_id = process.UniqueProcessId
+                proc_layer_name = process.add_process_layer()
+            except exceptions.InvalidAddressException as excp:
+                vollog.debug(
+                    f"Process {proc_id}: invalid address {excp.invalid_address} in layer {excp.layer_name}"
+                )
+                continue
+            proc_layer = context.layers[proc_layer_name]
+            if isinstance(proc_layer, linear.LinearlyMappedLayer):
+                process_layers.append((f"Process {proc_id}", proc_layer))
+
+        def map_process(
+            owner_layer: Tuple[str, linear.LinearlyMappedLayer],
+        ) -> PhysicalReverseMap:
+            owner, proc_layer = owner_layer
+            process_map = PhysicalReverseMap()
+            process_map.add_layer(owner, proc_layer, memory_layer_name)
+            return process_map
+
+        # Each process is mapped separately, so that they can be mapped in parallel
+        # threads (the layers are only safe to read from several threads when
+        # threading parallelism is enabled)
+        with contextlib.ExitStack() as stack:
+            process_maps: Iterable[PhysicalReverseMap] = map(
+                map_process, process_layers
+            )
+            if constants.PARALLELISM == constants.Parallelism.Threading:
+                executor = stack.enter_context(
+                    concurrent.futures.ThreadPoolExecutor(os.cpu_count() or 1)
+                )
+                process_maps = executor.map(map_process, process_layers)
+            for index, process_map in enumerate(process_maps):
+                reverse_map.merge(process_map)
                 if progress_callback:
                     progress_callback(
-                        (offset * 100) / layer.maximum_address,
-                        "Creating reverse kernel map",
+                        (index * 100) / len(process_layers),
+                        f"Creating mapping for {process_layers[index][0]}",
                     )
 
-            # TODO: Include kernel modules
-
-            for process in pslist.PsList.list_processes(
-                context, layer_name, symbol_table
-            ):
-                if not filter(process):
-                    proc_id = "Unknown"
-                    try:
-                        proc_id = process.UniqueProcessId
-                        proc_layer_name = process.add_process_layer()
-                    except exceptions.InvalidAddressException as excp:
-                        vollog.debug(
-                            f"Process {proc_id}: invalid address {excp.invalid_address} in layer {excp.layer_name}"
-                        )
-                        continue
-
-                    proc_layer = context.layers[proc_layer_name]
-                    if isinstance(proc_layer, linear.LinearlyMappedLayer):
-                        for mapval in proc_layer.mapping(
-                            0x0, proc_layer.maximum_address, ignore_errors=True
-                        ):
-                            mapped_offset, _, offset, mapped_size, maplayer = mapval
-                            for val in range(
-                                mapped_offset, mapped_offset + mapped_size, 0x1000
-                            ):
-                                cur_set = reverse_map.get(mapped_offset >> 12, set())
-                                cur_set.add(
-                                    (f"Process {process.UniqueProcessId}", offset)
-                                )
-                                reverse_map[mapped_offset >> 12] = cur_set
-                            # FIXME: make the progress for all processes, rather than per-process
-                            if progress_callback:
-                                progress_callback(
-                                    (offset * 100) / layer.maximum_address,
-                                    f"Creating mapping for task {process.UniqueProcessId}",
-                                )
-
+        reverse_map.sort()
         return reverse_map
@@ -18,7 +18,7 @@ class VadYaraScan(interfaces.plugins.PluginInterface):
     """Scans all the Virtual Address Descriptor memory maps using yara."""
 
     _required_framework_version = (2, 4, 0)
-    _version = (1, 1, 1)
+    _version = (1, 2, 0)
 
     @classmethod
     def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
@@ -35,6 +35,11 @@ class VadYaraScan(interfaces.plugins.PluginInterface):
             requirements.VersionRequirement(
                 name="yarascanner", component=yarascan.YaraScanner, version=(2, 0, 0)
             ),
+            requirements.VersionRequirement(
+                name="process_yarascanner",
+                component=yarascan.ProcessYaraScanner,
+                version=(1, 0, 0),
+            ),
             requirements.PluginRequirement(
                 name="yarascan", plugin=yarascan.YaraScan, version=(2, 0, 0)
             ),
@@ -44,6 +49,12 @@ class VadYaraScan(interfaces.plugins.PluginInterface):
                 description="Process IDs to include (all other processes are excluded)",
                 optional=True,
             ),
+            requirements.IntRequirement(
+                name="chunk_size",
+                description="Scan each VAD in chunks of this size (16MB by default, rule "
+                "conditions only apply within a chunk)",
+                optional=True,
+            ),
         ]
 
         # get base yarascan requirements for command line options
@@ -53,10 +64,27 @@ class VadYaraScan(interfaces.plugins.PluginInterface):
         return yarascan_requirements + vadyarascan_requirements
 
     def _generator(self):
-        kernel = self.context.modules[self.config["kernel"]]
-
         rules = yarascan.YaraScan.process_yara_options(dict(self.config))
 
+        scanner = yarascan.ProcessYaraScanner(
+            self.context, rules, self.config.get("chunk_size", None)
+        )
+        for pid, offset, rule_name, name, value in scanner.scan(
+            self._processes_to_scan()
+        ):
+            yield 0, (
+                format_hints.Hex(offset),
+                pid,
+                rule_name,
+                name,
+                value,
+            )
+
+    def _processes_to_scan(self) -> Iterable[Tuple[int, str, List[Tuple[int, int]]]]:
+        """Yields the process ID, process layer and VADs to scan of each
+        process."""
+        kernel = self.context.modules[self.config["kernel"]]
+
         filter_func = pslist.PsList.create_pid_filter(self.config.get("pid", None))
 
         sanity_check = 1024 * 1024 * 1024  # 1 GB
@@ -68,9 +96,7 @@ class VadYaraScan(interfaces.plugins.PluginInterface):
             filter_func=filter_func,
         ):
             layer_name = task.add_process_layer()
-            layer = self.context.layers[layer_name]
 
-            max_vad_size = 0
             vad_maps_to_scan = []
 
             for start, size in self.get_vad_maps(task):
@@ -79,30 +105,15 @@ class VadYaraScan(interfaces.plugins.PluginInterface):
                         f"VAD at 0x{start:x} over sanity-check size, not scanning"
                     )
                     continue
-                max_vad_size = max(max_vad_size, size)
                 vad_maps_to_scan.append((start, size))
 
             if not vad_maps_to_scan:
                 vollog.warning(
-                    f"No VADs were found for task {task.UniqueProcessID}, not scanning"
+                    f"No VADs were found for task {task.UniqueProcessId}, not scanning"
                 )
                 continue
 
-            scanner = yarascan.YaraScanner(rules=rules)
-            scanner.chunk_size = max_vad_size
-
-            # scan the VAD data (in one contiguous block) with the yarascanner
-            for start, size in vad_maps_to_scan:
-                for offset, rule_name, name, value in scanner(
-                    layer.read(start, size, pad=True), start
-                ):
-                    yield 0, (
-                        format_hints.Hex(offset),
-                        task.UniqueProcessId,
-                        rule_name,
-                        name,
-                        value,
-                    )
+            yield int(task.UniqueProcessId), layer_name, vad_maps_to_scan
 
     @staticmethod
     def get_vad_maps(
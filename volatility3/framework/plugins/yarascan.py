@@ -2,10 +2,14 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 
+import collections
+import concurrent.futures
 import logging
-from typing import Any, Dict, Iterable, List, Tuple
+import os
+import threading
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
 
-from volatility3.framework import interfaces, renderers
+from volatility3.framework import constants, interfaces, renderers
 from volatility3.framework.configuration import requirements
 from volatility3.framework.interfaces import plugins
 from volatility3.framework.layers import resources
@@ -37,7 +41,7 @@ except ImportError:
 
 
 class YaraScanner(interfaces.layers.ScannerInterface):
-    _version = (2, 1, 0)
+    _version = (2, 1, 1)
 
     # yara.Rules isn't exposed, so we can't type this properly
     def __init__(self, rules) -> None:
@@ -58,6 +62,8 @@ class YaraScanner(interfaces.layers.ScannerInterface):
             for match in self._rules.scan(data).matching_rules:
                 for match_string in match.patterns:
                     for instance in match_string.matches:
+                        if instance.offset >= self.chunk_size:
+                            continue
                         yield (
                             instance.offset + data_offset,
                             f"{match.namespace}.{match.identifier}",
@@ -69,6 +75,8 @@ class YaraScanner(interfaces.layers.ScannerInterface):
                 if YaraScan.yara_returns_instances():
                     for match_string in match.strings:
                         for instance in match_string.instances:
+                            if instance.offset >= self.chunk_size:
+                                continue
                             yield (
                                 instance.offset + data_offset,
                                 match.rule,
@@ -77,7 +85,8 @@ class YaraScanner(interfaces.layers.ScannerInterface):
                             )
                 else:
                     for offset, name, value in match.strings:
-                        yield (offset + data_offset, match.rule, name, value)
+                        if offset < self.chunk_size:
+                            yield (offset + data_offset, match.rule, name, value)
 
     @staticmethod
     def get_rule(rule):
@@ -102,6 +111,233 @@ class YaraScanner(interfaces.layers.ScannerInterface):
             return yara.compile(file=fp)
 
 
+class ProcessYaraScanner(interfaces.configuration.VersionableInterface):
+    """Scans the memory regions of a number of processes using yara.
+
+    Regions are read in chunks of at most chunk_size (plus an overlap),
+    which defaults to the yara scanner's own chunk size.  Each chunk is
+    divided into page sized blocks, and the physical pages behind each block
+    (and the overlap that follows it) are noted.  The hits of each scanned
+    block are remembered, so a block backed by the same physical pages as one
+    that has recently been scanned (such as a shared page of a DLL or library
+    mapped by many processes) is not scanned again, instead its earlier hits
+    are reported for the new process.  Only the runs of blocks that have not
+    been scanned are read and matched, so a rule whose condition depends on
+    several strings only sees those strings within the same run.  Processes
+    are scanned in parallel threads if threading parallelism is enabled.
+    """
+
+    _version = (1, 0, 0)
+    _required_framework_version = (2, 0, 0)
+
+    # yara supports at most 32 threads scanning with the same rules
+    max_threads = 32
+
+    # The size of the blocks whose hits are remembered by their physical pages
+    block_size = 0x1000
+
+    # The number of scanned blocks whose hits are remembered
+    max_scanned = 0x10000
+
+    def __init__(
+        self,
+        context: interfaces.context.ContextInterface,
+        rules,
+        chunk_size: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        self._context = context
+        self._rules = rules
+        self._chunk_size = chunk_size
+        self._scanned: (
+            "collections.OrderedDict[Tuple, List[Tuple[int, str, str, bytes]]]"
+        ) = collections.OrderedDict()
+        self._scanned_lock = threading.Lock()
+
+    def scan(
+        self, processes: Iterable[Tuple[int, str, List[Tuple[int, int]]]]
+    ) -> Iterable[Tuple[int, int, str, str, bytes]]:
+        """Scans the memory of a number of processes.
+
+        Args:
+            processes: An iterable of (process id, process layer name, regions)
+                where regions is a list of (start, size) tuples to scan
+
+        Returns:
+            An iterable of (process id, offset, rule name, component, value)
+            tuples, in the order of the processes and regions given
+        """
+        if constants.PARALLELISM != constants.Parallelism.Threading:
+            for process_id, layer_name, regions in processes:
+                yield from self._scan_process(process_id, layer_name, regions)
+            return None
+
+        threads = min(os.cpu_count() or 1, self.max_threads)
+        window = threads * constants.PARALLEL_SCAN_WINDOW
+        pending: Deque[concurrent.futures.Future] = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+            # Processes are submitted from this thread, so the process layers are
+            # constructed here, and only a window of processes is in flight at once
+            for process_id, layer_name, regions in processes:
+                if len(pending) >= window:
+                    yield from pending.popleft().result()
+                pending.append(
+                    executor.submit(self._scan_process, process_id, layer_name, regions)
+                )
+            while pending:
+                yield from pending.popleft().result()
+
+    def _scan_process(
+        self, process_id: int, layer_name: str, regions: List[Tuple[int, int]]
+    ) -> List[Tuple[int, int, str, str, bytes]]:
+        results: List[Tuple[int, int, str, str, bytes]] = []
+        if not regions:
+            return results
+
+        layer = self._context.layers[layer_name]
+        scanner = YaraScanner(rules=self._rules)
+        if self._chunk_size:
+            scanner.chunk_size = self._chunk_size
+
+        for start, size in regions:
+            end = start + size
+            for chunk_start in range(start, end, scanner.chunk_size):
+                length = min(scanner.chunk_size + scanner.overlap, end - chunk_start)
+                for offset, rule_name, name, value in self._scan_chunk(
+                    layer, scanner, chunk_start, length
+                ):
+                    results.append(
+                        (process_id, offset + chunk_start, rule_name, name, value)
+                    )
+        return results
+
+    def _block_identities(
+        self, layer: interfaces.layers.DataLayerInterface, start: int, length: int
+    ) -> List[Tuple]:
+        """Returns an identity for each block of length bytes from start, made
+        up of the pieces of the lower layers that the block maps to, so that
+        blocks backed by the same physical pages have the same identity."""
+        count = -(-length // self.block_size)
+        pieces: List[List[Tuple]] = [[] for _ in range(count)]
+        for (
+            offset,
+            sublength,
+            mapped_offset,
+            mapped_length,
+            mapped_layer,
+        ) in layer.mapping(start, length, ignore_errors=True):
+            linear = sublength == mapped_length
+            end = offset + sublength
+            while offset < end:
+                index = (offset - start) // self.block_size
+                block_start = start + index * self.block_size
+                piece = min(end, block_start + self.block_size) - offset
+                if linear:
+                    pieces[index].append(
+                        (offset - block_start, piece, mapped_layer, mapped_offset)
+                    )
+                    mapped_offset += piece
+                else:
+                    # Encoded data can't be split, so every block notes all of it
+                    pieces[index].append(
+                        (
+                            offset - block_start,
+                            piece,
+                            mapped_layer,
+                            mapped_offset,
+                            mapped_length,
+                        )
+                    )
+                offset += piece
+        return [
+            (min(self.block_size, length - index * self.block_size), tuple(block))
+            for index, block in enumerate(pieces)
+        ]
+
+    def _scan_chunk(
+        self,
+        layer: interfaces.layers.DataLayerInterface,
+        scanner: YaraScanner,
+        chunk_start: int,
+        length: int,
+    ) -> List[Tuple[int, str, str, bytes]]:
+        """Returns the hits (relative to chunk_start) in a chunk of a process
+        layer, only scanning the blocks whose physical pages (along with those
+        of the overlap after them) have not recently been scanned."""
+        chunk_length = min(length, scanner.chunk_size)
+        identities = self._block_identities(layer, chunk_start, length)
+        following = -(-scanner.overlap // self.block_size)
+        keys = [
+            tuple(identities[index : index + 1 + following])
+            for index in range(-(-chunk_length // self.block_size))
+        ]
+
+        block_hits: List[Optional[List[Tuple[int, str, str, bytes]]]] = []
+        with self._scanned_lock:
+            for key in keys:
+                hits = self._scanned.get(key)
+                if hits is not None:
+                    self._scanned.move_to_end(key)
+                block_hits.append(hits)
+
+        index = 0
+        while index < len(keys):
+            if block_hits[index] is not None:
+                index += 1
+                continue
+            # Scan the whole run of blocks that have not been scanned at once
+            run_start = index
+            while index < len(keys) and block_hits[index] is None:
+                index += 1
+            run_offset = run_start * self.block_size
+            run_length = min(chunk_length, index * self.block_size) - run_offset
+            run_hits = self._scan_run(
+                layer,
+                chunk_start + run_offset,
+                run_length,
+                min(length - run_offset, run_length + scanner.overlap),
+            )
+            block_hits[run_start:index] = run_hits
+            with self._scanned_lock:
+                for key, hits in zip(keys[run_start:index], run_hits):
+                    # Hits beyond the block's overlap depend on more than its key
+                    if all(
+                        offset + len(value) <= self.block_size + scanner.overlap
+                        for offset, _, _, value in hits
+                    ):
+                        self._scanned[key] = hits
+                while len(self._scanned) > self.max_scanned:
+                    self._scanned.popitem(last=False)
+
+        results = []
+        for index, hits in enumerate(block_hits):
+            block_offset = index * self.block_size
+            for offset, rule_name, name, value in hits or []:
+                results.append((offset + block_offset, rule_name, name, value))
+        return results
+
+    def _scan_run(
+        self,
+        layer: interfaces.layers.DataLayerInterface,
+        start: int,
+        run_length: int,
+        data_length: int,
+    ) -> List[List[Tuple[int, str, str, bytes]]]:
+        """Scans a run of blocks from start, returning the hits that start in
+        each block (relative to the block).  Reads data_length bytes, so that
+        hits can run on past the end of the run."""
+        run_scanner = YaraScanner(rules=self._rules)
+        run_scanner.chunk_size = run_length
+        data = layer.read(start, data_length, pad=True)
+        run_hits: List[List[Tuple[int, str, str, bytes]]] = [
+            [] for _ in range(-(-run_length // self.block_size))
+        ]
+        for offset, rule_name, name, value in run_scanner(data, 0):
+            index, offset = divmod(offset, self.block_size)
+            run_hits[index].append((offset, rule_name, name, value))
+        return run_hits
+
+
 class YaraScan(plugins.PluginInterface):
     """Scans kernel memory using yara rules (string or file)."""
 
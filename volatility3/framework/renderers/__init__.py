@@ -177,6 +177,7 @@ class TreeGrid(interfaces.renderers.TreeGrid):
             generator: An iterable containing row for a tree grid, each row contains a indent level followed by the values for each column in order.
         """
         self._populated = False
+        self._retained = True
         self._row_count = 0
         self._children: List[interfaces.renderers.TreeNode] = []
         converted_columns: List[interfaces.renderers.Column] = []
@@ -216,6 +217,7 @@ class TreeGrid(interfaces.renderers.TreeGrid):
         function: Optional[interfaces.renderers.VisitorSignature] = None,
         initial_accumulator: Any = None,
         fail_on_errors: bool = True,
+        retain: bool = True,
     ) -> Optional[Exception]:
         """Populates the tree by consuming the TreeGrid's construction
         generator Func is called on every node, so can be used to create output
@@ -227,6 +229,8 @@ class TreeGrid(interfaces.renderers.TreeGrid):
             function: The visitor to be called on each row of the treegrid
             initial_accumulator: The initial value for an accumulator passed to the visitor to allow it to maintain state
             fail_on_errors: A boolean defining whether exceptions should be caught or bubble up
+            retain: Whether to keep the rows within the tree, if not only the ancestors of the current row are kept
+                (so memory use does not grow with the number of rows) and the tree cannot be visited afterwards
         """
         accumulator = initial_accumulator
         if function is None:
@@ -235,12 +239,25 @@ class TreeGrid(interfaces.renderers.TreeGrid):
                 return None
 
         if not self.populated:
+            self._retained = retain
             try:
                 prev_nodes: List[interfaces.renderers.TreeNode] = []
+                # The number of children seen so far for each of the prev_nodes' parents
+                child_counts: List[int] = []
                 for level, item in self._generator:
                     parent_index = min(len(prev_nodes), level)
                     parent = prev_nodes[parent_index - 1] if parent_index > 0 else None
-                    treenode = self._append(parent, item)
+                    if retain:
+                        treenode = self._append(parent, item)
+                    else:
+                        del child_counts[parent_index + 1 :]
+                        if len(child_counts) <= parent_index:
+                            child_counts.append(0)
+                        path = str(child_counts[parent_index])
+                        if parent is not None:
+                            path = parent.path + self.path_sep + path
+                        treenode = TreeNode(path, self, parent, item)
+                        child_counts[parent_index] += 1
                     prev_nodes = prev_nodes[0:parent_index] + [treenode]
                     if function is not None:
                         accumulator = function(treenode, accumulator)
@@ -364,6 +381,8 @@ class TreeGrid(interfaces.renderers.TreeGrid):
         """
         if not self.populated:
             self.populate()
+        if not self._retained:
+            raise ValueError("TreeGrid was populated without retaining its rows")
 
         # Find_nodes is path dependent, whereas _visit is not
         # So in case the function modifies the node's path, find the nodes first
@@ -0,0 +1,233 @@
+# This file is Copyright 2026 Volatility Foundation and licensed under the Volatility Software License 1.0
+# which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
+#
+"""Compiled (binary) copies of Intermediate Symbol Format files.
+
+Large ISF files (such as those for linux kernels) take seconds to decompress
+and parse, and hundreds of megabytes to hold in memory, even though only a
+small fraction of their types and symbols are ever used.  A compiled ISF
+holds the same document, but with each entry of the user_types, symbols and
+enums sections encoded separately behind an offset table, so that the file
+can be memory mapped and individual entries decoded only when requested.
+
+Compiled files live in the cache directory, named after the ISF hash tracked
+by the symbol cache, and record the size and modification time of the file
+they were built from, so that a changed file is never served from a stale
+compiled copy.  The symbol cache removes the compiled copy of a hash once no
+location it tracks has that hash.
+"""
+import array
+import collections.abc
+import contextlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from volatility3.framework import constants
+
+vollog = logging.getLogger(__name__)
+
+MAGIC = b"VOLISFC\x01"
+"""Identifies a compiled ISF file, and the version of its layout"""
+
+LAZY_SECTIONS = ["user_types", "symbols", "enums"]
+"""The sections of the ISF whose entries are decoded on demand"""
+
+
+class CompiledSection(collections.abc.Mapping):
+    """A read-only mapping of the entries in one section of a compiled ISF.
+
+    The names are read when first needed, and each entry is decoded the
+    first time it is looked up.
+    """
+
+    def __init__(
+        self, filename: str, names: Tuple[int, int], index: int, count: int
+    ) -> None:
+        self._filename = filename
+        self._names_location = names
+        self._index_offset = index
+        self._count = count
+        self._mapped: Optional[mmap.mmap] = None
+        self._names: Optional[Dict[str, int]] = None
+        self._offsets: Optional[array.array] = None
+        self._decoded: Dict[str, Any] = {}
+
+    def _buffer(self) -> mmap.mmap:
+        if self._mapped is None:
+            with open(self._filename, "rb") as fp:
+                self._mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mapped
+
+    def _index(self) -> Dict[str, int]:
+        if self._names is None:
+            buffer = self._buffer()
+            start, length = self._names_location
+            names = json.loads(buffer[start : start + length])
+            offsets = array.array("Q")
+            offsets.frombytes(
+                buffer[
+                    self._index_offset : self._index_offset
+                    + (self._count + 1) * offsets.itemsize
+                ]
+            )
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            self._offsets = offsets
+            self._names = dict(zip(names, range(len(names))))
+        return self._names
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._decoded:
+            return self._decoded[name]
+        index = self._index()[name]
+        value = json.loads(
+            self._buffer()[self._offsets[index] : self._offsets[index + 1]]
+        )
+        self._decoded[name] = value
+        return value
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index())
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Do not pickle the mapped file, it is reopened in each process"""
+        state = self.__dict__.copy()
+        state.update(_mapped=None, _names=None, _offsets=None, _decoded={})
+        return state
+
+
+def source_identity(isf_url: str) -> Optional[List[int]]:
+    """Returns the size and modification time of the local file holding an
+    ISF, or None if the url does not refer to a local file."""
+    parsed = urllib.parse.urlparse(isf_url)
+    pathname = None
+    if parsed.scheme == "file":
+        pathname = urllib.request.url2pathname(parsed.path)
+    elif parsed.scheme == "jar":
+        inner_url = urllib.parse.urlparse(parsed.path)
+        if inner_url.scheme == "file":
+            pathname = urllib.request.url2pathname(inner_url.path.split("!")[0])
+    if pathname is None:
+        return None
+    try:
+        stat = os.stat(pathname)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def cache_filename(json_hash: str) -> str:
+    """Returns the location of the compiled ISF for a particular ISF hash"""
+    return os.path.join(constants.CACHE_PATH, f"isf_{json_hash}.cache")
+
+
+def remove(json_hash: str) -> None:
+    """Removes the compiled ISF for a particular ISF hash, if there is one"""
+    try:
+        os.remove(cache_filename(json_hash))
+    except FileNotFoundError:
+        pass
+    except OSError as excp:
+        vollog.debug(f"Unable to remove compiled ISF for {json_hash}: {excp}")
+
+
+def load(isf_url: str, json_hash: str) -> Optional[Dict[str, Any]]:
+    """Loads the compiled copy of an ISF file, if there is an up to date one
+
+    Args:
+        isf_url: The location of the original ISF file
+        json_hash: The hash of the original ISF file
+
+    Returns:
+        The ISF document, with lazily decoded sections, or None
+    """
+    identity = source_identity(isf_url)
+    filename = cache_filename(json_hash)
+    if identity is None or not os.path.exists(filename):
+        return None
+    try:
+        with open(filename, "rb") as fp:
+            if fp.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Invalid compiled ISF file: {filename}")
+            fp.seek(-8, os.SEEK_END)
+            (header_offset,) = struct.unpack("<Q", fp.read(8))
+            fp.seek(header_offset)
+            header = json.loads(fp.read()[:-8])
+    except (OSError, ValueError, struct.error) as excp:
+        vollog.debug(f"Unable to load compiled ISF for {isf_url}: {excp}")
+        return None
+    if header.get("source") != identity:
+        return None
+    document = header["document"]
+    for section, (names, index, count) in header["sections"].items():
+        document[section] = CompiledSection(filename, tuple(names), index, count)
+    vollog.debug(f"Loaded compiled ISF for {isf_url} from {filename}")
+    return document
+
+
+def save(isf_url: str, json_hash: str, json_object: Dict[str, Any]) -> None:
+    """Writes a compiled copy of an ISF document to the cache directory
+
+    Args:
+        isf_url: The location of the original ISF file
+        json_hash: The hash of the original ISF file
+        json_object: The ISF document
+    """
+    identity = source_identity(isf_url)
+    if identity is None:
+        return None
+    filename = cache_filename(json_hash)
+    sections = {}
+    fp = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=os.path.dirname(filename), prefix=".isf_", delete=False
+        ) as fp:
+            fp.write(MAGIC)
+            for section in LAZY_SECTIONS:
+                entries = json_object.get(section, None)
+                if not isinstance(entries, dict):
+                    continue
+                names = json.dumps(list(entries)).encode()
+                names_offset = fp.tell()
+                fp.write(names)
+                offsets = array.array("Q", [fp.tell()])
+                for value in entries.values():
+                    fp.write(json.dumps(value, separators=(",", ":")).encode())
+                    offsets.append(fp.tell())
+                sections[section] = (
+                    (names_offset, len(names)),
+                    fp.tell(),
+                    len(entries),
+                )
+                if sys.byteorder != "little":
+                    offsets.byteswap()
+                offsets.tofile(fp)
+            # The header goes last, once the location of every section is known
+            header_offset = fp.tell()
+            document = {
+                key: value for key, value in json_object.items() if key not in sections
+            }
+            header = {"source": identity, "document": document, "sections": sections}
+            fp.write(json.dumps(header).encode())
+            fp.write(struct.pack("<Q", header_offset))
+        os.replace(fp.name, filename)
+    except (OSError, TypeError, ValueError) as excp:
+        vollog.debug(f"Unable to save compiled ISF for {isf_url}: {excp}")
+        if fp is not None:
+            with contextlib.suppress(OSError):
+                os.remove(fp.name)
@@ -3,15 +3,29 @@
 #
 
 import base64
-import codecs
+import collections.abc
+import concurrent.futures
 import copy
 import json
 import logging
 import os
 import pathlib
+import sqlite3
+import threading
 import zipfile
 from abc import ABCMeta
-from typing import Any, Dict, Generator, Iterable, List, Mapping, Optional, Tuple, Type
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+)
 
 from volatility3 import schemas, symbols
 from volatility3.framework import (
@@ -23,7 +37,7 @@ from volatility3.framework import (
 )
 from volatility3.framework.configuration import requirements
 from volatility3.framework.layers import resources
-from volatility3.framework.symbols import metadata, native
+from volatility3.framework.symbols import compiled, metadata, native
 
 vollog = logging.getLogger(__name__)
 
@@ -112,15 +126,32 @@ class IntermediateSymbolTable(interfaces.symbols.SymbolTableInterface):
         # Check there are no obvious errors
         # Open the file and test the version
         self._versions = dict((x.version, x) for x in class_subclasses(ISFormatTable))
-        with resources.ResourceAccessor().open(isf_url) as fp:
-            reader = codecs.getreader("utf-8")
-            json_object = json.load(reader(fp))  # type: ignore
 
-        # Validation is expensive, but we cache to store the hashes of successfully validated json objects
-        if validate and not schemas.validate(json_object):
-            raise exceptions.SymbolSpaceError(
-                f"File does not pass version validation: {isf_url}"
-            )
+        # Files tracked by the symbol cache are compiled on first use, and read lazily from then on
+        cache = self._identifier_cache()
+        json_hash = cache.get_hash(isf_url) if cache else None
+        json_object = None
+        if json_hash and (
+            not validate
+            or not schemas.validator_available()
+            or cache.get_validation(json_hash)
+        ):
+            json_object = compiled.load(isf_url, json_hash)
+        if json_object is None:
+            with resources.ResourceAccessor().open(isf_url) as fp:
+                data = fp.read()
+            content_hash = schemas.create_content_hash(data)
+            json_object = json.loads(data)
+
+            # Validation is expensive, so the result is recorded against the hash of the file
+            if validate and not self._validate(
+                cache, isf_url, json_object, content_hash
+            ):
+                raise exceptions.SymbolSpaceError(
+                    f"File does not pass version validation: {isf_url}"
+                )
+            if json_hash == content_hash and compiled.load(isf_url, json_hash) is None:
+                compiled.save(isf_url, json_hash, json_object)
 
         metadata = json_object.get("metadata", None)
 
@@ -158,6 +189,65 @@ class IntermediateSymbolTable(interfaces.symbols.SymbolTableInterface):
         self.config["isf_url"] = isf_url
         self.config["symbol_mask"] = symbol_mask
 
+    _identifier_caches = threading.local()
+    """The symbol caches opened by each thread, by process and filename"""
+
+    @classmethod
+    def _identifier_cache(
+        cls,
+    ) -> Optional[interfaces.configuration.VersionableInterface]:
+        """Returns the symbol cache, which tracks the hash and the validation
+        state of each ISF file, or None if it cannot be opened
+
+        The cache is opened once and reused by every table constructed from
+        then on.  SQLite connections can't be shared between threads or carried
+        across a fork, so each thread and process opens its own.
+        """
+        # Imported here since the symbol cache itself depends on the symbol tables
+        from volatility3.framework.automagic import symbol_cache
+
+        filename = os.path.join(constants.CACHE_PATH, constants.IDENTIFIERS_FILENAME)
+        caches = cls._identifier_caches.__dict__.setdefault("caches", {})
+        key = (os.getpid(), filename)
+        if key not in caches:
+            try:
+                caches[key] = symbol_cache.SqliteCache(filename)
+            except (OSError, sqlite3.Error) as excp:
+                vollog.log(
+                    constants.LOGLEVEL_VVVV, f"Unable to open symbol cache: {excp}"
+                )
+                return None
+        return caches[key]
+
+    @staticmethod
+    def _validate(
+        cache: Optional[interfaces.configuration.VersionableInterface],
+        isf_url: str,
+        json_object: Dict[str, Any],
+        json_hash: str,
+    ) -> bool:
+        """Validates an ISF document, unless a result has already been recorded
+        in the symbol cache for the hash of its file.
+
+        When background validation is enabled, a file that has not been
+        validated before is validated in a separate process and accepted in
+        the meantime.  A file that fails is reported, and rejected by later runs.
+        """
+        if cache is None or not schemas.validator_available():
+            return schemas.validate(json_object)
+        valid = cache.get_validation(json_hash)
+        if valid is not None:
+            return valid
+        if constants.BACKGROUND_ISF_VALIDATION:
+            _validate_in_background(
+                isf_url,
+                os.path.join(constants.CACHE_PATH, constants.IDENTIFIERS_FILENAME),
+            )
+            return True
+        valid = schemas.validate(json_object, use_cache=False)
+        cache.add_validation(json_hash, valid)
+        return valid
+
     @staticmethod
     def _closest_version(
         version: str, versions: Dict[Tuple[int, int, int], Type["ISFormatTable"]]
@@ -308,6 +398,74 @@ class IntermediateSymbolTable(interfaces.symbols.SymbolTableInterface):
         ]
 
 
+_background_validations: Dict[str, concurrent.futures.Future] = {}
+_validation_executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def _background_validation(isf_url: str, cache_filename: str) -> bool:
+    """Validates an ISF file and records the result in the symbol cache, for
+    use in a separate process"""
+    from volatility3.framework.automagic import symbol_cache
+
+    with resources.ResourceAccessor().open(isf_url) as fp:
+        data = fp.read()
+    try:
+        valid = schemas.validate(json.loads(data), use_cache=False)
+    except Exception as excp:
+        vollog.debug(f"Validation of {isf_url} failed: {excp}")
+        valid = False
+    cache = symbol_cache.SqliteCache(cache_filename)
+    cache.add_validation(schemas.create_content_hash(data), valid)
+    return valid
+
+
+def _validate_in_background(isf_url: str, cache_filename: str) -> None:
+    """Starts validating an ISF file in a separate process, once per file,
+    warning if it turns out not to be valid"""
+    global _validation_executor
+
+    if isf_url in _background_validations:
+        return None
+    if _validation_executor is None:
+        _validation_executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+    future = _validation_executor.submit(
+        _background_validation, isf_url, cache_filename
+    )
+    _background_validations[isf_url] = future
+
+    def report(future: concurrent.futures.Future) -> None:
+        try:
+            if not future.result():
+                vollog.warning(
+                    f"File does not pass version validation, and will not be used in later runs: {isf_url}"
+                )
+        except Exception as excp:
+            vollog.debug(f"Unable to validate {isf_url} in the background: {excp}")
+
+    future.add_done_callback(report)
+
+
+class _TypeNamesView(collections.abc.KeysView):
+    """The names of a table's user types followed by those of its native
+    types, which neither copies nor decodes the user types."""
+
+    def __init__(self, user_types: Mapping[str, Any], native_types: Iterable[str]):
+        super().__init__(user_types)
+        self._native_types = dict.fromkeys(
+            name for name in native_types if name not in user_types
+        )
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._mapping or name in self._native_types
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._mapping
+        yield from self._native_types
+
+    def __len__(self) -> int:
+        return len(self._mapping) + len(self._native_types)
+
+
 class ISFormatTable(interfaces.symbols.SymbolTableInterface, metaclass=ABCMeta):
     """Provide a base class to identify all subclasses."""
 
@@ -422,16 +580,14 @@ class Version1Format(ISFormatTable):
     @property
     def types(self) -> Iterable[str]:
         """Returns an iterable (KeysView) of the available symbol type names."""
-        # We use ** instead of
+        # We use a view instead of
         # `set(self._json_object.get("user_types", {}).keys()).union(self.natives.types)`
-        # because converting user_types dict to a set is costly.
-        # It is more efficient to convert the (very small) self.natives.types set to a dict.
-        # FIXME: On Python3.8 support drop, merge the two dicts using the merge operator:
-        # (self._json_object.get("user_types", {}) | dict.fromkeys(self.natives.types)).keys()
-        return {
-            **self._json_object.get("user_types", {}),
-            **dict.fromkeys(self.natives.types),
-        }.keys()
+        # because converting user_types dict to a set is costly, and copying it (as
+        # iterating a ChainMap does on Python 3.8) would decode every entry of a
+        # compiled ISF.  The user types are still listed first.
+        return _TypeNamesView(
+            self._json_object.get("user_types", {}), self.natives.types
+        )
 
     def get_type_class(self, name: str) -> Type[interfaces.objects.ObjectInterface]:
         return self._overrides.get(name, objects.AggregateType)
@@ -2579,6 +2579,21 @@ class inode(objects.StructType):
             page_index (int): The page index in the Tree. File offset is page_index * PAGE_SIZE.
             page_content (bytes): The page content
         """
+        for page_index, layer_name, page_paddr, page_size in self.get_content_extents():
+            page_content = self._context.layers[layer_name].read(page_paddr, page_size)
+            if page_content:
+                yield page_index, page_content
+
+    def get_content_extents(self) -> Iterable[Tuple[int, str, int, int]]:
+        """Get the location of the inode cached pages from the page cache, so
+        that their content can be read later
+
+        Yields:
+            page_index (int): The page index in the Tree. File offset is page_index * PAGE_SIZE.
+            layer_name (str): The name of the physical layer holding the page content
+            page_paddr (int): The address of the page content in the physical layer
+            page_size (int): The size of the page content
+        """
         for page_obj in self.get_pages():
             if page_obj.mapping != self.i_mapping:
                 vollog.warning(
@@ -2586,9 +2601,9 @@ class inode(objects.StructType):
                 )
                 continue
             page_index = int(page_obj.index)
-            page_content = page_obj.get_content()
-            if page_content:
-                yield page_index, page_content
+            page_extent = page_obj.get_content_extent()
+            if page_extent:
+                yield (page_index, *page_extent)
 
 
 class address_space(objects.StructType):
@@ -2719,6 +2734,20 @@ class page(objects.StructType):
         Returns:
             The page content
         """
+        page_extent = self.get_content_extent()
+        if not page_extent:
+            return None
+
+        physical_layer_name, page_paddr, page_size = page_extent
+        return self._context.layers[physical_layer_name].read(page_paddr, page_size)
+
+    def get_content_extent(self) -> Optional[Tuple[str, int, int]]:
+        """Returns the location of the page content
+
+        Returns:
+            The name of the physical layer, and the address and size of the
+            page content within it, or None if the content is unavailable
+        """
         vmlinux = linux.LinuxUtilities.get_module_from_volobj_type(self._context, self)
         vmlinux_layer = vmlinux.context.layers[vmlinux.layer_name]
         physical_layer_name = self._context.layers[self.vol.layer_name].config.get(
@@ -2735,7 +2764,7 @@ class page(objects.StructType):
             )
             return None
 
-        return physical_layer.read(page_paddr, vmlinux_layer.page_size)
+        return physical_layer_name, page_paddr, vmlinux_layer.page_size
 
     def get_flags_list(self) -> List[str]:
         """Returns a list of page flags
@@ -171,6 +171,26 @@ class CM_KEY_NODE(objects.StructType):
     def get_subkeys(self) -> Iterator["CM_KEY_NODE"]:
         """Returns a list of the key nodes.
 
+        The subkeys are read through the hive's key index, so that the
+        subkey lists of each key are only walked once.
+
+        Raises TypeError if the key was not instantiated on a RegistryHive layer
+        """
+        hive = self._context.layers[self.vol.layer_name]
+        if not isinstance(hive, RegistryHive):
+            raise TypeError("CM_KEY_NODE was not instantiated on a RegistryHive layer")
+        try:
+            subkeys = hive.get_subkey_offsets(self.vol.offset, self)
+        except (exceptions.InvalidAddressException, RegistryFormatException):
+            # Report whatever can be read before the failure, as the walk would
+            yield from self.iterate_subkeys()
+            return None
+        for offset, _name in subkeys:
+            yield hive.get_node(offset - 4)
+
+    def iterate_subkeys(self) -> Iterator["CM_KEY_NODE"]:
+        """Walks the subkey lists of the key, returning each of the key nodes.
+
         Raises TypeError if the key was not instantiated on a RegistryHive layer
         """
         hive = self._context.layers[self.vol.layer_name]
@@ -524,6 +524,8 @@ class PdbSignatureScanner(interfaces.layers.ScannerInterface):
     """The size of overlap needed for the signature to ensure data cannot hide between two scanned chunks"""
     thread_safe = True
     """Determines whether the scanner accesses global variables in a thread safe manner (for use with :mod:`multiprocessing`)"""
+    accepts_buffer = True
+    """Determines whether the scanner can be handed a reusable bytes-like buffer rather than bytes"""
 
     _RSDS_format = struct.Struct("<16BI")
 
@@ -542,13 +544,15 @@ class PdbSignatureScanner(interfaces.layers.ScannerInterface):
             + b")\x00"
         )
         for match in re.finditer(pattern, data, flags=re.DOTALL):
-            pdb_name = data[
-                match.start(0)
-                + 4
-                + self._RSDS_format.size : match.start(0)
-                + len(match.group())
-                - 1
-            ]
+            pdb_name = bytes(
+                data[
+                    match.start(0)
+                    + 4
+                    + self._RSDS_format.size : match.start(0)
+                    + len(match.group())
+                    - 1
+                ]
+            )
             if pdb_name in self._pdb_names:
                 ## this ordering is intentional due to mixed endianness in the GUID
                 (
@@ -2,6 +2,8 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 
+import functools
+import glob
 import hashlib
 import json
 import logging
@@ -75,6 +77,42 @@ def create_json_hash(
     ).hexdigest()
 
 
+def create_content_hash(data: bytes) -> str:
+    """Constructs the hash of the raw contents of a JSON file, which (unlike
+    create_json_hash) does not require the file to be re-serialized."""
+    hasher = content_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def content_hasher() -> "hashlib._Hash":
+    """Returns a hash object that gives the same digest as create_content_hash
+    once updated with the contents of a file, so large files can be hashed
+    as they are read."""
+    return hashlib.sha1()
+
+
+@functools.lru_cache(maxsize=None)
+def schemas_hash() -> str:
+    """Constructs a hash of all the available schemas, so that validations
+    recorded against one set of schemas are not reused with another."""
+    basepath = os.path.abspath(os.path.dirname(__file__))
+    schemas_hasher = hashlib.sha1()
+    for schema_path in sorted(glob.glob(os.path.join(basepath, "schema-*.json"))):
+        with open(schema_path, "rb") as s:
+            schemas_hasher.update(s.read())
+    return schemas_hasher.hexdigest()
+
+
+def validator_available() -> bool:
+    """Returns whether the dependency for validation is available."""
+    try:
+        import jsonschema  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
 def valid(
     input: Dict[str, Any], schema: Dict[str, Any], use_cache: bool = True
 ) -> bool:
@@ -90,9 +128,10 @@ def valid(
                     "This ISF was generated by dwarf2json < 0.9.0, which is known to produce inaccurate results (see dwarf2json GitHub issue #63)."
                 )
 
-    input_hash = create_json_hash(input, schema)
-    if input_hash in cached_validations and use_cache:
-        return True
+    if use_cache:
+        input_hash = create_json_hash(input, schema)
+        if input_hash in cached_validations:
+            return True
     try:
         import jsonschema
 
@@ -110,6 +149,9 @@ def valid(
     try:
         vollog.debug("Validating JSON against schema...")
         validators[schema_key].validate(input)
+        if not use_cache:
+            vollog.debug("JSON validated against schema")
+            return True
         cached_validations.add(input_hash)
         vollog.debug("JSON validated against schema (result cached)")
     except jsonschema.exceptions.SchemaError: